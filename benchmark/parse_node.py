@@ -0,0 +1,76 @@
+"""Micro-benchmark of `parse_node` per tag
+
+Usage: python benchmark/parse_node.py [--number N]
+
+For draw/discard tags, the code path used before dispatch was table-driven
+(attribute copy, `if/elif` chain and tag arithmetic) is also measured for
+comparison.
+"""
+from __future__ import print_function
+from __future__ import absolute_import
+
+import timeit
+import argparse
+
+from tenhou_log_utils import parser
+
+_NODES = [
+    ('T52', {}),
+    ('D17', {}),
+    ('N', {'who': '1', 'm': '42031'}),
+    ('DORA', {'hai': '53'}),
+    ('REACH', {'who': '2', 'step': '1'}),
+    ('INIT', {
+        'seed': '0,0,0,3,4,67', 'ten': '250,250,250,250', 'oya': '0',
+        'hai0': '16,25,27,41,56,61,65,78,83,91,100,110,124',
+        'hai1': '1,9,20,33,42,50,69,70,88,95,102,119,131',
+        'hai2': '5,12,28,36,47,53,66,74,86,99,111,120,135',
+        'hai3': '3,14,22,38,44,58,63,79,80,97,104,116,127',
+    }),
+    ('AGARI', {
+        'ba': '0,1', 'hai': '16,25,27,41,56,61,65,78,83,91,100,110,124,125',
+        'machi': '125', 'ten': '30,7700,0', 'yaku': '1,1,0,1,52,2',
+        'doraHai': '67', 'doraHaiUra': '5', 'who': '0', 'fromWho': '1',
+        'sc': '250,77,250,-77,250,0,250,0',
+    }),
+]
+
+
+def _legacy_parse_node(tag, attrib):
+    # pylint: disable=protected-access
+    attrib = {key: value for key, value in attrib.items()}
+    parser._LG.debug('Input:  %s: %s', tag, attrib)
+    for skipped in ['GO', 'UN', 'TAIKYOKU', 'SHUFFLE', 'INIT', 'DORA']:
+        if tag == skipped:
+            raise AssertionError('Only draw/discard is supported.')
+    if tag[0] in {'T', 'U', 'V', 'W'}:
+        data = parser._parse_draw(tag)
+        tag = 'DRAW'
+    else:
+        data = parser._parse_discard(tag)
+        tag = 'DISCARD'
+    parser._LG.debug('Output: %s: %s', tag, data)
+    return {'tag': tag, 'data': data}
+
+
+def _time(func, tag, attrib, number):
+    timer = timeit.Timer(lambda: func(tag, attrib))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def _main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--number', type=int, default=100000)
+    args = arg_parser.parse_args()
+    print('{:>8s}: {:>10s} {:>10s}'.format('Tag', 'ns/node', 'legacy'))
+    for tag, attrib in _NODES:
+        elapsed = _time(parser.parse_node, tag, attrib, args.number)
+        legacy = ''
+        if tag in parser._TILE_TAGS:  # pylint: disable=protected-access
+            legacy = '{:10.1f}'.format(
+                _time(_legacy_parse_node, tag, attrib, args.number))
+        print('{:>8s}: {:10.1f} {}'.format(tag, elapsed, legacy))
+
+
+if __name__ == '__main__':
+    _main()
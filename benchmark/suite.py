@@ -0,0 +1,211 @@
+"""Benchmark suite over a synthetic mjlog corpus
+
+Usage: python benchmark/suite.py [--games N] [--seed S] [--output FILE]
+                                 [--compare FILE]
+
+A corpus is generated with :mod:`tenhou_log_utils.synthetic` into a
+temporary directory, so that results only depend on the seed and the code
+being measured. The following are measured:
+
+ - `parse_node` per tag (ns/node). Calls are broken down by call type.
+ - `load_mjlog` on plain and gzipped files (ms/game)
+ - `parse_mjlog` structuring of loaded trees (ms/game)
+ - `view` rendering of parsed games (ms/game)
+
+Results are saved as JSON. Pass the JSON of another commit with `--compare`
+to print the relative change of each entry.
+"""
+from __future__ import print_function
+from __future__ import absolute_import
+
+import io
+import os
+import sys
+import gzip
+import json
+import shutil
+import timeit
+import argparse
+import platform
+import tempfile
+import subprocess
+import collections
+
+from tenhou_log_utils import synthetic, parser
+from tenhou_log_utils.io import load_mjlog
+from tenhou_log_utils.renderer import Renderer
+
+
+def _parse_args():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--games', type=int, default=20)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='The best of this many runs is reported.')
+    arg_parser.add_argument(
+        '--nodes-per-tag', type=int, default=2000,
+        help='The maximum number of nodes measured per tag.')
+    arg_parser.add_argument('--output', help='Save result to this JSON file.')
+    arg_parser.add_argument('--compare', help='JSON of a previous run.')
+    return arg_parser.parse_args()
+
+
+def _best(func, repeat, number=1):
+    return min(timeit.Timer(func).repeat(repeat=repeat, number=number))
+
+
+###############################################################################
+def _generate(directory, n_games, seed):
+    """Write each game both as plain and gzipped file"""
+    paths = {'plain': [], 'gz': []}
+    for i in range(n_games):
+        xml = synthetic.generate_mjlog(
+            seed + i, sanma=i % 10 == 9, old_format=i % 10 == 8)
+        xml = xml.encode('utf-8')
+        path = os.path.join(directory, '{:06d}.mjlog'.format(i))
+        with open(path, 'wb') as file_:
+            file_.write(xml)
+        paths['plain'].append(path)
+        with gzip.open(path + '.gz', 'wb') as file_:
+            file_.write(xml)
+        paths['gz'].append(path + '.gz')
+    return paths
+
+
+def _node_key(tag, attrib):
+    if tag in parser._TILE_TAGS:  # pylint: disable=protected-access
+        return parser._TILE_TAGS[tag][0]  # pylint: disable=protected-access
+    if tag == 'N':
+        return 'N:' + parser.decode_meld(int(attrib['m']))[0]
+    if tag == 'UN' and len(attrib) == 1:
+        return 'UN:RESUME'
+    return tag
+
+
+def _bench_parse_node(roots, max_nodes, repeat):
+    nodes = collections.OrderedDict()
+    for root in roots:
+        for child in root:
+            key = _node_key(child.tag, child.attrib)
+            samples = nodes.setdefault(key, [])
+            if len(samples) < max_nodes:
+                samples.append((child.tag, dict(child.attrib)))
+
+    def _run(samples):
+        parse_node = parser.parse_node
+        for tag, attrib in samples:
+            parse_node(tag, attrib)
+
+    result = collections.OrderedDict()
+    for key in sorted(nodes):
+        samples = nodes[key]
+        elapsed = _best(lambda: _run(samples), repeat, number=10)
+        result[key] = elapsed / 10 / len(samples) * 1e9
+    return result
+
+
+def _bench_load(paths, repeat):
+    def _run():
+        for path in paths:
+            load_mjlog(path)
+    return _best(_run, repeat) / len(paths) * 1e3
+
+
+def _bench_parse_mjlog(roots, repeat):
+    def _run():
+        for root in roots:
+            parser.parse_mjlog(root)
+    return _best(_run, repeat) / len(roots) * 1e3
+
+
+def _bench_view(games, repeat):
+    def _run():
+        renderer = Renderer(io.StringIO())
+        for game in games:
+            renderer.render_meta(game['meta'])
+            for round_ in game['rounds']:
+                renderer.render_round(round_)
+    return _best(_run, repeat) / len(games) * 1e3
+
+
+def _run_suite(args):
+    directory = tempfile.mkdtemp()
+    try:
+        paths = _generate(directory, args.games, args.seed)
+        roots = [load_mjlog(path) for path in paths['plain']]
+        games = [parser.parse_mjlog(root) for root in roots]
+        results = collections.OrderedDict()
+        results['parse_node'] = _bench_parse_node(
+            roots, args.nodes_per_tag, args.repeat)
+        results['load_mjlog'] = collections.OrderedDict(
+            (key, _bench_load(paths[key], args.repeat))
+            for key in ['plain', 'gz'])
+        results['parse_mjlog'] = _bench_parse_mjlog(roots, args.repeat)
+        results['view'] = _bench_view(games, args.repeat)
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+###############################################################################
+def _get_commit():
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit.decode('ascii').strip()
+
+
+def _flatten(results, prefix=''):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            for item in _flatten(value, prefix + key + '.'):
+                yield item
+        else:
+            yield prefix + key, value
+
+
+def _unit(key):
+    return 'ns/node' if key.startswith('parse_node.') else 'ms/game'
+
+
+def _print(results, baseline=None):
+    baseline = dict(_flatten(baseline)) if baseline else {}
+    for key, value in _flatten(results):
+        line = '{:>24s}: {:10.3f} {}'.format(key, value, _unit(key))
+        if baseline.get(key):
+            line += ' ({:+6.1f} %)'.format(100. * (value / baseline[key] - 1))
+        print(line)
+
+
+def _main():
+    args = _parse_args()
+    output = collections.OrderedDict([
+        ('commit', _get_commit()),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('games', args.games),
+        ('seed', args.seed),
+        ('results', _run_suite(args)),
+    ])
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as file_:
+            previous = json.load(file_)
+        if (previous['games'], previous['seed']) != (args.games, args.seed):
+            print(
+                'Warning: {} was measured on a different corpus.'.format(
+                    args.compare), file=sys.stderr)
+        print('Compared against commit {}'.format(previous['commit']))
+        baseline = previous['results']
+    _print(output['results'], baseline)
+    if args.output:
+        with open(args.output, 'w') as file_:
+            json.dump(output, file_, indent=2)
+
+
+if __name__ == '__main__':
+    _main()
@@ -10,6 +10,10 @@ def _setup():
         install_requires=[
             'requests',
         ],
+        extras_require={
+            'numpy': ['numpy'],
+            'orjson': ['orjson'],
+        },
         entry_points={
             'console_scripts': [
                 'tlu = tenhou_log_utils.command.main:main'
@@ -0,0 +1,254 @@
+"""Compact binary format of mjlog events with random access reader
+
+Layout (all integers are little endian)::
+
+    magic (4 bytes) | version (u16)
+    game 0 | game 1 | ... | game N-1
+    game table: offset of round table of each game (u64 x N)
+    trailer: offset of game table (u64) | N (u32) | magic (4 bytes)
+
+Each game consists of segments followed by its round table::
+
+    segment 0 (nodes before the first INIT) | segment 1 (round 0) | ...
+    round table: number of segments S (u32) | offsets (u64 x S+1)
+
+A segment is a sequence of records. Draws, discards and calls, which make up
+the majority of the nodes, have fixed width records. The other nodes are
+stored with their raw attributes so that decoding them goes through
+:func:`parse_node` and gives exactly the same result as parsing XML.
+
+=========  ===================  ======================================
+Opcode     Node                 Payload
+=========  ===================  ======================================
+0x00-0x03  Draw (player 0-3)    tile (u8)
+0x04-0x07  Discard (player 0-3) tile (u8)
+0x08-0x0b  Call (caller 0-3)    m (u16)
+0xff       Other                tag, then attributes; see below
+=========  ===================  ======================================
+
+Variable records are ``len(tag) (u8) | tag | n_attrib (u16)`` followed by
+``len(key) (u8) | key | len(value) (u16) | value`` for each attribute.
+Strings are UTF-8 encoded.
+"""
+from __future__ import absolute_import
+
+import mmap
+import struct
+import logging
+
+from tenhou_log_utils.io import iter_mjlog_nodes, ensure_unicode
+from tenhou_log_utils.parser import parse_node, structure_parsed_result
+
+_LG = logging.getLogger(__name__)
+
+_MAGIC = b'TLUB'
+_VERSION = 1
+_HEADER = struct.Struct('<4sH')
+_TRAILER = struct.Struct('<QI4s')
+
+_OP_DRAW = 0x00
+_OP_DISCARD = 0x04
+_OP_CALL = 0x08
+_OP_VAR = 0xff
+
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_TILE = struct.Struct('<BB')
+_CALL = struct.Struct('<BH')
+
+
+###############################################################################
+def _encode_str(string, size):
+    data = ensure_unicode(string).encode('utf-8')
+    return size.pack(len(data)) + data
+
+
+def _encode_node(tag, attrib):
+    if tag[1:].isdigit():
+        if tag[0] in 'TUVW':
+            return _TILE.pack(_OP_DRAW + ord(tag[0]) - ord('T'), int(tag[1:]))
+        if tag[0] in 'DEFG':
+            return _TILE.pack(
+                _OP_DISCARD + ord(tag[0]) - ord('D'), int(tag[1:]))
+    if tag == 'N' and sorted(attrib.keys()) == ['m', 'who']:
+        return _CALL.pack(_OP_CALL + int(attrib['who']), int(attrib['m']))
+    chunks = [_U8.pack(_OP_VAR), _encode_str(tag, _U8), _U16.pack(len(attrib))]
+    for key, value in attrib.items():
+        chunks.append(_encode_str(key, _U8))
+        chunks.append(_encode_str(value, _U16))
+    return b''.join(chunks)
+
+
+def _write_game(file_, filepath):
+    offsets, segment = [file_.tell()], []
+    for tag, attrib in iter_mjlog_nodes(filepath):
+        if tag == 'INIT':
+            file_.write(b''.join(segment))
+            offsets.append(file_.tell())
+            segment = []
+        segment.append(_encode_node(tag, attrib))
+    file_.write(b''.join(segment))
+    offsets.append(file_.tell())
+    table_offset = file_.tell()
+    file_.write(_U32.pack(len(offsets) - 1))
+    file_.write(b''.join(_U64.pack(offset) for offset in offsets))
+    return table_offset
+
+
+def write_binary(filepaths, outpath):
+    """Convert mjlog files into one binary file
+
+    Parameters
+    ----------
+    filepaths : iterable of str
+        Paths to [gzipped] mjlog files. Each file becomes one game.
+
+    outpath : str
+        Path to the output file.
+
+    Returns
+    -------
+    int
+        The number of games written.
+    """
+    with open(outpath, 'wb') as file_:
+        file_.write(_HEADER.pack(_MAGIC, _VERSION))
+        tables = []
+        for filepath in filepaths:
+            _LG.debug('Packing %s', filepath)
+            tables.append(_write_game(file_, filepath))
+        game_table = file_.tell()
+        file_.write(b''.join(_U64.pack(offset) for offset in tables))
+        file_.write(_TRAILER.pack(game_table, len(tables), _MAGIC))
+    return len(tables)
+
+
+###############################################################################
+def _decode_str(buffer_, offset, size):
+    length = size.unpack_from(buffer_, offset)[0]
+    offset += size.size
+    return buffer_[offset:offset + length].decode('utf-8'), offset + length
+
+
+def _decode_var(buffer_, offset):
+    tag, offset = _decode_str(buffer_, offset, _U8)
+    n_attrib = _U16.unpack_from(buffer_, offset)[0]
+    offset += _U16.size
+    attrib = {}
+    for _ in range(n_attrib):
+        key, offset = _decode_str(buffer_, offset, _U8)
+        attrib[key], offset = _decode_str(buffer_, offset, _U16)
+    return parse_node(str(tag), attrib), offset
+
+
+def _decode_segment(buffer_, start, end):
+    nodes, offset = [], start
+    while offset < end:
+        opcode = _U8.unpack_from(buffer_, offset)[0]
+        if opcode == _OP_VAR:
+            node, offset = _decode_var(buffer_, offset + 1)
+        elif opcode >= _OP_CALL:
+            caller, meld = _CALL.unpack_from(buffer_, offset)
+            offset += _CALL.size
+            attrib = {'who': str(caller - _OP_CALL), 'm': str(meld)}
+            node = parse_node('N', attrib)
+        else:
+            opcode, tile = _TILE.unpack_from(buffer_, offset)
+            offset += _TILE.size
+            tag = 'DISCARD' if opcode >= _OP_DISCARD else 'DRAW'
+            node = {'tag': tag, 'data': {'player': opcode % 4, 'tile': tile}}
+        nodes.append(node)
+    return nodes
+
+
+class BinaryLogReader(object):
+    """Random access reader of files written with :func:`write_binary`
+
+    The file is memory-mapped and only the requested game/round is decoded.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the binary file.
+    """
+    def __init__(self, filepath):
+        self._file = open(filepath, 'rb')
+        self._buffer = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(
+                '{} is not a binary mjlog file (version {}).'.format(
+                    filepath, _VERSION))
+        game_table, n_games, _ = _TRAILER.unpack_from(
+            self._buffer, len(self._buffer) - _TRAILER.size)
+        self._games = struct.unpack_from(
+            '<{}Q'.format(n_games), self._buffer, game_table)
+
+    def close(self):
+        """Release the memory map and the underlying file"""
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self):
+        return len(self._games)
+
+    def _get_segments(self, game):
+        offset = self._games[game]
+        n_segments = _U32.unpack_from(self._buffer, offset)[0]
+        return struct.unpack_from(
+            '<{}Q'.format(n_segments + 1), self._buffer, offset + _U32.size)
+
+    def _read_segment(self, game, index):
+        segments = self._get_segments(game)
+        return _decode_segment(
+            self._buffer, segments[index], segments[index + 1])
+
+    def num_rounds(self, game):
+        """Get the number of rounds in the game"""
+        return len(self._get_segments(game)) - 2
+
+    def read_meta(self, game):
+        """Decode meta data of the game
+
+        Returns
+        -------
+        dict
+            Same as ``'meta'`` of :func:`parse_mjlog` result.
+        """
+        return {
+            node['tag']: node['data'] for node in self._read_segment(game, 0)}
+
+    def read_round(self, game, round_):
+        """Decode a round of the game without decoding the others
+
+        Returns
+        -------
+        list of dict
+            Same as an item of ``'rounds'`` of :func:`parse_mjlog` result.
+        """
+        if round_ < 0:
+            round_ += self.num_rounds(game)
+        if not 0 <= round_ < self.num_rounds(game):
+            raise IndexError('Round index out of range: {}'.format(round_))
+        return self._read_segment(game, round_ + 1)
+
+    def read_game(self, game):
+        """Decode the whole game
+
+        Returns
+        -------
+        dict
+            Same as :func:`parse_mjlog` result.
+        """
+        segments = self._get_segments(game)
+        return structure_parsed_result(
+            _decode_segment(self._buffer, segments[0], segments[-1]))
@@ -0,0 +1,221 @@
+"""On-disk cache of parsed mjlog data
+
+Entries are keyed on the hash of file content and ``PARSER_VERSION``, so that
+renamed or copied files hit the same entry and results of older parser are
+never returned. Least recently used entries are evicted when the total size
+exceeds the limit. The total size is tracked in memory after the first
+write, so the cache directory is scanned only when eviction is needed.
+
+The location and the size limit can be changed with ``TLU_CACHE_DIR`` and
+``TLU_CACHE_SIZE_MB`` environment variables.
+"""
+from __future__ import absolute_import
+
+import os
+import sys
+import errno
+import pickle
+import glob
+import hashlib
+import logging
+import tempfile
+
+from tenhou_log_utils.parser import parse_mjlog_file, PARSER_VERSION
+
+_LG = logging.getLogger(__name__)
+
+_DEFAULT_DIR = os.path.join(
+    os.path.expanduser('~'), '.cache', 'tenhou_log_utils', 'parse')
+_DEFAULT_SIZE_MB = 1024
+_EXT = '.pickle'
+# Eviction removes entries until the total size falls below this fraction of
+# the limit, so that it does not run again at the next write.
+_LOW_WATER = 0.9
+# Errors of reading truncated or incompatible pickle
+_LOAD_ERRORS = (
+    EOFError, pickle.UnpicklingError, ValueError, AttributeError, ImportError)
+
+
+def _hash_file(filepath):
+    hash_ = hashlib.sha1()
+    hash_.update('{}:{}:'.format(PARSER_VERSION, sys.version_info[0]).encode())
+    with open(filepath, 'rb') as file_:
+        for chunk in iter(lambda: file_.read(1 << 16), b''):
+            hash_.update(chunk)
+    return hash_.hexdigest()
+
+
+class ParseCache(object):
+    """Content-addressed LRU cache of :func:`parse_mjlog_file` results
+
+    Parameters
+    ----------
+    directory : str
+        Directory to store cache entries. Defaults to ``TLU_CACHE_DIR``
+        environment variable or ``~/.cache/tenhou_log_utils/parse``.
+
+    max_size : int
+        Maximum total size of entries in bytes. Defaults to
+        ``TLU_CACHE_SIZE_MB`` environment variable or 1 GiB.
+    """
+    def __init__(self, directory=None, max_size=None):
+        self.directory = directory or os.environ.get(
+            'TLU_CACHE_DIR', _DEFAULT_DIR)
+        if max_size is None:
+            max_size = 1024 * 1024 * int(
+                os.environ.get('TLU_CACHE_SIZE_MB', _DEFAULT_SIZE_MB))
+        self.max_size = max_size
+        # Total size of entries, unknown until the directory is first scanned.
+        # Writes by other processes are not counted until the next scan.
+        self._size = None
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key[:2], key + _EXT)
+
+    def _list_entries(self):
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '??', '*' + _EXT)):
+            try:
+                stat = os.stat(path)
+            except OSError as error:
+                # Evicted by another process
+                if error.errno != errno.ENOENT:
+                    raise
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError as error:
+            if error.errno != errno.ENOENT:
+                raise
+
+    def get(self, key):
+        """Fetch cached data. Returns None when not found.
+
+        Entries which cannot be loaded, such as the ones truncated or
+        written by incompatible Python, are removed and treated as not found.
+        """
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as file_:
+                data = pickle.load(file_)
+        except (IOError, OSError) as error:
+            if error.errno not in (errno.ENOENT, errno.ENOTDIR):
+                raise
+            return None
+        except _LOAD_ERRORS as error:
+            _LG.warning('Removing broken cache entry %s: %r', path, error)
+            self._remove(path)
+            return None
+        # Mark as recently used
+        try:
+            os.utime(path, None)
+        except OSError as error:
+            # Evicted by another process after being read.
+            if error.errno != errno.ENOENT:
+                raise
+        return data
+
+    def put(self, key, data):
+        """Store data and evict old entries if the size limit is exceeded
+
+        Failure to write, such as read-only or full disk, is logged and
+        otherwise ignored, so that callers can go on without cache.
+
+        Returns
+        -------
+        bool
+            True if the data is stored.
+        """
+        try:
+            self._put(key, data)
+        except (IOError, OSError) as error:
+            _LG.warning('Failed to write parse cache: %s', error)
+            return False
+        return True
+
+    def _put(self, key, data):
+        path = self._get_path(key)
+        dirpath = os.path.dirname(path)
+        if not os.path.isdir(dirpath):
+            os.makedirs(dirpath)
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._list_entries())
+        # Write to temporary file first so that readers never see partial data
+        fd_, tmppath = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+        try:
+            with os.fdopen(fd_, 'wb') as file_:
+                pickle.dump(data, file_, protocol=pickle.HIGHEST_PROTOCOL)
+                size = file_.tell()
+            if os.path.exists(path):
+                self._size -= os.path.getsize(path)
+            os.rename(tmppath, path)
+        except BaseException:
+            self._remove(tmppath)
+            raise
+        self._size += size
+        if self._size > self.max_size:
+            self._evict()
+
+    def _evict(self):
+        entries = sorted(self._list_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size * _LOW_WATER:
+                break
+            _LG.debug('Evicting %s', path)
+            self._remove(path)
+            total -= size
+        self._size = total
+
+    def stats(self):
+        """Get the number of entries and their total size
+
+        Returns
+        -------
+        dict
+            'directory', 'entries', 'size' and 'max_size'
+        """
+        entries = self._list_entries()
+        return {
+            'directory': self.directory,
+            'entries': len(entries),
+            'size': sum(size for _, size, _ in entries),
+            'max_size': self.max_size,
+        }
+
+    def clear(self):
+        """Remove all the entries
+
+        Other files in the directory are left untouched.
+        """
+        for _, _, path in self._list_entries():
+            self._remove(path)
+        for dirpath in glob.glob(os.path.join(self.directory, '??')):
+            if os.path.isdir(dirpath) and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+        self._size = 0
+
+    def parse(self, filepath):
+        """Parse mjlog file, using cached result if available
+
+        Parameters
+        ----------
+        filepath : str
+            Path to [gzipped] mjlog file.
+
+        Returns
+        -------
+        dict
+            Same as :func:`parse_mjlog_file` result.
+        """
+        key = _hash_file(filepath)
+        data = self.get(key)
+        if data is None:
+            _LG.debug('Cache miss: %s (%s)', filepath, key)
+            data = parse_mjlog_file(filepath)
+            self.put(key, data)
+        return data
@@ -0,0 +1,170 @@
+"""Convert parsed mjlog data into columnar (struct-of-arrays) form
+
+Each event in rounds of games parsed with :func:`parse_mjlog` becomes one
+row of the following columns.
+
+- ``game``: Index of the game.
+- ``round``: Index of the round in the game.
+- ``event``: Index of the event in the round.
+- ``tag``: Tag code. See ``TAG_CODES``.
+- ``player``: Player of DRAW, DISCARD and REACH, caller of CALL, winner of
+  AGARI, dealer of INIT and player index of BYE and RESUME. -1 otherwise.
+- ``tile``: Tile of DRAW, DISCARD and DORA, dora indicator of INIT, winning
+  tile of AGARI and step of REACH. -1 otherwise.
+- ``call_type``: Call type code of CALL. See ``CALL_TYPE_CODES``.
+  -1 otherwise.
+- ``callee``: Callee of CALL, loser of AGARI (winner itself on Tsumo).
+  -1 otherwise.
+- ``offset``: Offset into ``tiles`` side array. Tiles of event ``i`` are
+  ``tiles[offset[i]:offset[i+1]]``, thus this column has one more element
+  than the others. Side tiles are mentsu of CALL, winning hand of AGARI and
+  concatenated initial hands of INIT (13 tiles per player).
+
+Meta data of games (``GO``, ``UN`` etc...) are not exported.
+"""
+from __future__ import absolute_import
+
+import array
+import logging
+
+import numpy as np
+
+from tenhou_log_utils.parser import CALL_TYPES
+
+_LG = logging.getLogger(__name__)
+
+TAG_CODES = {
+    'INIT': 0,
+    'DRAW': 1,
+    'DISCARD': 2,
+    'CALL': 3,
+    'REACH': 4,
+    'DORA': 5,
+    'AGARI': 6,
+    'RYUUKYOKU': 7,
+    'BYE': 8,
+    'RESUME': 9,
+}
+
+CALL_TYPE_CODES = {type_: code for code, type_ in enumerate(CALL_TYPES)}
+
+_COLUMNS = [
+    # name, array typecode, numpy dtype
+    ('game', 'i', np.int32),
+    ('round', 'h', np.int16),
+    ('event', 'i', np.int32),
+    ('tag', 'b', np.int8),
+    ('player', 'b', np.int8),
+    ('tile', 'h', np.int16),
+    ('call_type', 'b', np.int8),
+    ('callee', 'b', np.int8),
+]
+
+
+def _get_fields(tag, data):
+    """Returns player, tile, call_type, callee and side tiles of event"""
+    # pylint: disable=too-many-return-statements
+    if tag in ['DRAW', 'DISCARD']:
+        return data['player'], data['tile'], -1, -1, ()
+    if tag == 'CALL':
+        call_type = CALL_TYPE_CODES[data['call_type']]
+        return data['caller'], -1, call_type, data['callee'], data['mentsu']
+    if tag == 'REACH':
+        return data['player'], data['step'], -1, -1, ()
+    if tag == 'DORA':
+        return -1, data['hai'], -1, -1, ()
+    if tag == 'INIT':
+        tiles = [tile for hand in data['hands'] for tile in hand]
+        return int(data['oya']), data['dora'], -1, -1, tiles
+    if tag == 'AGARI':
+        winner = data['winner']
+        loser = data.get('loser', winner)
+        return winner, data['machi'][0], -1, loser, data['hand']
+    if tag in ['BYE', 'RESUME']:
+        return data['index'], -1, -1, -1, ()
+    return -1, -1, -1, -1, ()
+
+
+def to_columns(games, game_offset=0):
+    """Convert parsed games into struct-of-arrays
+
+    Parameters
+    ----------
+    games : iterable of dict
+        Games parsed with :func:`tenhou_log_utils.parser.parse_mjlog`.
+
+    game_offset : int
+        Index assigned to the first game.
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        Columns described in module docstring, and ``tiles`` side array.
+    """
+    buffers = {name: array.array(code) for name, code, _ in _COLUMNS}
+    offsets, tiles = [0], array.array('h')
+    for i_game, game in enumerate(games, start=game_offset):
+        for i_round, round_ in enumerate(game['rounds']):
+            for i_event, item in enumerate(round_):
+                tag = item['tag']
+                player, tile, call_type, callee, side = _get_fields(
+                    tag, item['data'])
+                buffers['game'].append(i_game)
+                buffers['round'].append(i_round)
+                buffers['event'].append(i_event)
+                buffers['tag'].append(TAG_CODES[tag])
+                buffers['player'].append(player)
+                buffers['tile'].append(tile)
+                buffers['call_type'].append(call_type)
+                buffers['callee'].append(callee)
+                tiles.extend(side)
+                offsets.append(len(tiles))
+    columns = {
+        name: np.array(buffers[name], dtype=dtype)
+        for name, _, dtype in _COLUMNS
+    }
+    columns['offset'] = np.asarray(offsets, dtype=np.int64)
+    columns['tiles'] = np.asarray(tiles, dtype=np.int16)
+    return columns
+
+
+def _save_shard(games, prefix, index, game_offset):
+    path = '{}-{:05d}.npz'.format(prefix, index)
+    _LG.debug('Saving %s games on %s', len(games), path)
+    np.savez(path, **to_columns(games, game_offset=game_offset))
+    return path
+
+
+def export_npz(games, prefix, games_per_shard=1000):
+    """Save parsed games in sharded ``.npz`` files
+
+    Parameters
+    ----------
+    games : iterable of dict
+        Games parsed with :func:`tenhou_log_utils.parser.parse_mjlog`.
+        Games are consumed lazily, so that only one shard of games is held
+        in memory at a time.
+
+    prefix : str
+        Output path prefix. Shards are saved as ``<prefix>-00000.npz``,
+        ``<prefix>-00001.npz`` and so on. Game indices are contiguous across
+        shards.
+
+    games_per_shard : int
+        The number of games stored in each shard.
+
+    Returns
+    -------
+    list of str
+        Paths of the saved shards.
+    """
+    paths, buffer_, n_games = [], [], 0
+    for game in games:
+        buffer_.append(game)
+        if len(buffer_) == games_per_shard:
+            paths.append(_save_shard(buffer_, prefix, len(paths), n_games))
+            n_games += len(buffer_)
+            buffer_ = []
+    if buffer_:
+        paths.append(_save_shard(buffer_, prefix, len(paths), n_games))
+    return paths
@@ -0,0 +1,26 @@
+"""Define `cache` command"""
+from __future__ import absolute_import
+
+import logging
+
+from tenhou_log_utils.cache import ParseCache
+
+_LG = logging.getLogger(__name__)
+
+
+def _print_stats(stats):
+    _LG.info('Directory: %s', stats['directory'])
+    _LG.info('Entries: %s', stats['entries'])
+    _LG.info(
+        'Size: %.2f / %.2f [MB]',
+        stats['size'] / 1024. / 1024, stats['max_size'] / 1024. / 1024)
+
+
+def main(args):
+    """Entry point for `cache` command."""
+    cache = ParseCache()
+    if args.action == 'stats':
+        _print_stats(cache.stats())
+    elif args.action == 'clear':
+        cache.clear()
+        _LG.info('Cleared %s', cache.directory)
@@ -1,32 +1,82 @@
 """Download Tenhou.net mahjong log"""
 from __future__ import absolute_import
 
+import os
 import sys
+import gzip
+import time
 import logging
+import threading
+import collections
+import xml.etree.ElementTree as ET
+from multiprocessing.pool import ThreadPool
 
 import requests
 
+from tenhou_log_utils.io import open_mjlog
+
 _ARCHIVE_URL = 'http://tenhou.net/0/log/?'
 _LG = logging.getLogger(__name__)
 
+# Status codes worth retrying
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
 
-def _download(url):
-    resp = requests.get(url)
-    resp.raise_for_status()
-    return resp.content
+_CHUNK_SIZE = 64 * 1024
 
 
-def _save(data, filepath):
-    with open(filepath, 'wb') as file_:
-        file_.write(data)
+def _download(url, file_, session=requests):
+    # Write response body in chunks, so that it is never held in memory.
+    resp = session.get(url, timeout=60, stream=True)
+    try:
+        resp.raise_for_status()
+        for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+            file_.write(chunk)
+    finally:
+        resp.close()
+
+
+def _verify(filepath):
+    with open_mjlog(filepath) as file_:
+        root = None
+        for event, elem in ET.iterparse(file_, events=('start', 'end')):
+            if root is None:
+                root = elem
+                if root.tag != 'mjloggm':
+                    raise ValueError(
+                        'Unexpected root element: {}'.format(root.tag))
+            elif event == 'end':
+                root.clear()
+
+
+def _save(url, filepath, session=requests):
+    """Download data and save it on file, compressing it if path ends with .gz
+
+    Data is written to temporary file, verified and renamed, so that an
+    interrupted download does not leave a partial file.
+    """
+    compress = filepath.endswith('.gz')
+    tmppath = filepath + '.part'
+    try:
+        with open(tmppath, 'wb') as file_:
+            if compress:
+                with gzip.GzipFile(
+                        filename='', mode='wb', fileobj=file_) as gz_file:
+                    _download(url, gz_file, session)
+            else:
+                _download(url, file_, session)
+        _verify(tmppath)
+        os.rename(tmppath, filepath)
+    except BaseException:
+        if os.path.exists(tmppath):
+            os.remove(tmppath)
+        raise
 
 
 def _download_mjlog(log_id, outpath):
     url = '{}{}'.format(_ARCHIVE_URL, log_id)
-    _LG.info('Downloading %s', log_id)
-    data = _download(url)
-    _LG.info('Saving data on %s', outpath)
-    _save(data, outpath)
+    _LG.info('Downloading %s to %s', log_id, outpath)
+    _save(url, outpath)
 
 
 def main(args):
@@ -39,3 +89,127 @@ def main(args):
         else:
             _LG.exception('Unexpected error.')
         sys.exit(1)
+    except (ValueError, ET.ParseError) as error:
+        _LG.error('Downloaded data is not valid mjlog: %s', error)
+        sys.exit(1)
+
+
+###############################################################################
+class _RateLimiter(object):
+    """Space out requests across threads to at most `rate` per second"""
+    def __init__(self, rate):
+        self._interval = 1. / rate if rate else 0.
+        self._lock = threading.Lock()
+        self._next = 0.
+
+    def wait(self):
+        with self._lock:
+            now = time.time()
+            wait = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _BulkDownloader(object):
+    def __init__(self, output_dir, workers, rate, retries, backoff,
+                 archive_url=None, compress=True):
+        self.output_dir = output_dir
+        self.compress = compress
+        self.retries = retries
+        self.backoff = backoff
+        self.archive_url = archive_url or _ARCHIVE_URL
+        self._limiter = _RateLimiter(rate)
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=workers)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def _fetch(self, url, outpath):
+        for attempt in range(self.retries + 1):
+            self._limiter.wait()
+            try:
+                return _save(url, outpath, self._session)
+            except requests.exceptions.HTTPError as error:
+                status = error.response.status_code
+                if status not in _RETRY_STATUS or attempt == self.retries:
+                    raise
+                _LG.debug('%s: Status %s. Retrying.', url, status)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout) as error:
+                if attempt == self.retries:
+                    raise
+                _LG.debug('%s: %s. Retrying.', url, error)
+            time.sleep(self.backoff * 2 ** attempt)
+        raise AssertionError('Unreachable')
+
+    def get_output_path(self, log_id):
+        """Get the path to save the log"""
+        ext = '.mjlog.gz' if self.compress else '.mjlog'
+        return os.path.join(self.output_dir, log_id + ext)
+
+    def download(self, log_id):
+        """Download one log. Returns 'skipped', 'downloaded' or 'failed'"""
+        outpath = self.get_output_path(log_id)
+        if os.path.exists(outpath):
+            _LG.debug('Skipping %s', log_id)
+            return 'skipped'
+        url = '{}{}'.format(self.archive_url, log_id)
+        try:
+            self._fetch(url, outpath)
+        except requests.exceptions.HTTPError as error:
+            if error.response.status_code == 404:
+                _LG.error('Log file (%s) not found.', log_id)
+            else:
+                _LG.error('Failed to download %s: %s', log_id, error)
+            return 'failed'
+        except requests.exceptions.RequestException as error:
+            _LG.error('Failed to download %s: %s', log_id, error)
+            return 'failed'
+        except (ValueError, ET.ParseError) as error:
+            _LG.error('Downloaded data (%s) is not valid mjlog: %s', log_id, error)
+            return 'failed'
+        _LG.info('Saved %s', outpath)
+        return 'downloaded'
+
+
+def _read_ids(file_):
+    ids = []
+    for line in file_:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            ids.append(line)
+    return ids
+
+
+def _load_ids(path):
+    if path is None or path == '-':
+        return _read_ids(sys.stdin)
+    with open(path, 'r') as file_:
+        return _read_ids(file_)
+
+
+def bulk_main(args):
+    """Download mjlog files of IDs listed in file or stdin"""
+    # Duplicated IDs would be downloaded concurrently into the same file.
+    log_ids = list(collections.OrderedDict.fromkeys(_load_ids(args.id_file)))
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    downloader = _BulkDownloader(
+        args.output_dir, workers=args.workers, rate=args.rate,
+        retries=args.retries, backoff=args.backoff,
+        archive_url=args.archive_url, compress=not args.no_gzip)
+    pool = ThreadPool(args.workers)
+    try:
+        results = pool.map(downloader.download, log_ids)
+    finally:
+        pool.close()
+        pool.join()
+    counts = {key: results.count(key)
+              for key in ['downloaded', 'skipped', 'failed']}
+    _LG.info(
+        'Downloaded: %s, Skipped: %s, Failed: %s',
+        counts['downloaded'], counts['skipped'], counts['failed'])
+    if counts['failed']:
+        sys.exit(1)
@@ -0,0 +1,30 @@
+"""Define `export-npz` command"""
+from __future__ import absolute_import
+
+import os
+import logging
+
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.parser import parse_mjlog_file
+
+_LG = logging.getLogger(__name__)
+
+
+def _iter_games(files):
+    for filepath in files:
+        _LG.debug('Parsing %s', filepath)
+        yield parse_mjlog_file(filepath)
+
+
+def main(args):
+    """Entry point for `export-npz` command."""
+    # NumPy is optional, so import only when the command is run.
+    from tenhou_log_utils.columnar import export_npz
+    logging.getLogger('tenhou_log_utils.parser').setLevel(logging.WARN)
+    files = find_mjlog_files(args.inputs)
+    output_dir = os.path.dirname(args.prefix)
+    if output_dir and not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    paths = export_npz(
+        _iter_games(files), args.prefix, games_per_shard=args.games_per_shard)
+    _LG.info('Exported %s games into %s shards.', len(files), len(paths))
@@ -0,0 +1,74 @@
+"""Define `extract-features` command"""
+from __future__ import absolute_import
+
+import os
+import sys
+import logging
+import multiprocessing
+
+from tenhou_log_utils.io import find_mjlog_files
+
+_LG = logging.getLogger(__name__)
+
+
+def _extract(job):
+    # Each job writes its own shards, so that samples never go through the
+    # parent process and memory use is bounded by the shard size.
+    # NumPy is optional, so import only when the command is run.
+    from tenhou_log_utils.features import extract_file, ShardWriter
+    index, filepaths, output_dir, samples_per_shard = job
+    prefix = os.path.join(output_dir, 'samples-{:05d}'.format(index))
+    writer, n_failed = ShardWriter(prefix, samples_per_shard), 0
+    for filepath in filepaths:
+        try:
+            writer.write(extract_file(filepath))
+        except Exception:  # pylint: disable=broad-except
+            _LG.exception('Failed to extract %s', filepath)
+            n_failed += 1
+    writer.flush()
+    return writer.shards, n_failed
+
+
+def _chunk(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _map(jobs, workers):
+    if workers == 1:
+        for job in jobs:
+            yield _extract(job)
+        return
+    pool = multiprocessing.Pool(workers)
+    try:
+        for result in pool.imap(_extract, jobs):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main(args):
+    """Entry point for `extract-features` command."""
+    from tenhou_log_utils.features import write_manifest
+    logging.getLogger('tenhou_log_utils.parser').setLevel(logging.WARN)
+    files = find_mjlog_files(args.inputs)
+    _LG.debug('Found %s files.', len(files))
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    jobs = [
+        (i, chunk, args.output_dir, args.samples_per_shard)
+        for i, chunk in enumerate(_chunk(files, args.files_per_job))
+    ]
+    workers = args.workers or multiprocessing.cpu_count()
+    shards, n_failed = [], 0
+    for job_shards, failed in _map(jobs, workers):
+        shards.extend(job_shards)
+        n_failed += failed
+    manifest = write_manifest(
+        os.path.join(args.output_dir, 'manifest.json'), shards,
+        n_files=len(files) - n_failed)
+    _LG.info(
+        'Extracted %s samples from %s files into %s shards. (%s failed)',
+        manifest['n_samples'], len(files) - n_failed, len(shards), n_failed)
+    if n_failed:
+        sys.exit(1)
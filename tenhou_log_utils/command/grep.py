@@ -0,0 +1,71 @@
+"""Define `grep` command"""
+from __future__ import absolute_import
+
+import sys
+import logging
+import functools
+import multiprocessing
+
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.header import read_header, HeaderFilter
+
+_LG = logging.getLogger(__name__)
+
+
+def _match(header_filter, filepath):
+    try:
+        return filepath, header_filter(read_header(filepath))
+    except Exception:  # pylint: disable=broad-except
+        _LG.exception('Failed to read %s', filepath)
+        return filepath, None
+
+
+def _map(func, files, workers, chunksize):
+    if workers == 1:
+        for file_ in files:
+            yield func(file_)
+        return
+    pool = multiprocessing.Pool(workers)
+    completed = False
+    try:
+        for result in pool.imap(func, files, chunksize):
+            yield result
+        completed = True
+    finally:
+        # When the caller stops early (`--limit`), files already queued
+        # need not be read.
+        if completed:
+            pool.close()
+        else:
+            pool.terminate()
+        pool.join()
+
+
+def main(args):
+    """Entry point for `grep` command."""
+    logging.getLogger('tenhou_log_utils.parser').setLevel(logging.WARN)
+    header_filter = HeaderFilter(
+        player=args.player, min_rate=args.min_rate, max_rate=args.max_rate,
+        min_dan=args.min_dan, table=args.table, lobby=args.lobby,
+        ton_nan=args.ton_nan, sanma=args.sanma)
+    files = find_mjlog_files(args.inputs)
+    _LG.debug('Found %s files.', len(files))
+    workers = args.workers or multiprocessing.cpu_count()
+    func = functools.partial(_match, header_filter)
+    n_matched, n_failed = 0, 0
+    results = _map(func, files, workers, args.chunksize)
+    try:
+        for filepath, matched in results:
+            if matched is None:
+                n_failed += 1
+            elif matched:
+                _LG.info(filepath)
+                n_matched += 1
+                if args.limit is not None and n_matched >= args.limit:
+                    break
+    finally:
+        results.close()
+    _LG.debug('%s of %s files matched.', n_matched, len(files))
+    if n_failed:
+        _LG.error('Failed to read %s files.', n_failed)
+        sys.exit(1)
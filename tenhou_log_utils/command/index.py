@@ -0,0 +1,99 @@
+"""Define `index` and `query` commands"""
+from __future__ import absolute_import
+
+import os
+import sys
+import json
+import time
+import logging
+import multiprocessing
+
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.index import GameIndex, extract_metadata
+
+_LG = logging.getLogger(__name__)
+
+
+def _extract(job):
+    path, mtime, size = job
+    try:
+        return path, mtime, size, extract_metadata(path)
+    except Exception:  # pylint: disable=broad-except
+        _LG.exception('Failed to parse %s', path)
+        return path, mtime, size, None
+
+
+def _map(jobs, workers, chunksize):
+    if workers == 1:
+        for job in jobs:
+            yield _extract(job)
+        return
+    pool = multiprocessing.Pool(workers)
+    try:
+        for result in pool.imap_unordered(_extract, jobs, chunksize):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main(args):
+    """Entry point for `index` command."""
+    logging.getLogger('tenhou_log_utils.parser').setLevel(logging.WARN)
+    files = [os.path.abspath(path) for path in find_mjlog_files(args.inputs)]
+    workers = args.workers or multiprocessing.cpu_count()
+    n_indexed, n_failed = 0, 0
+    with GameIndex(args.index) as index:
+        if args.prune:
+            _LG.info('Removed %s missing files.', index.prune())
+        jobs = index.find_stale(files)
+        _LG.debug('%s of %s files need indexing.', len(jobs), len(files))
+        for path, mtime, size, meta in _map(jobs, workers, args.chunksize):
+            if meta is None:
+                n_failed += 1
+                continue
+            index.put(path, mtime, size, meta)
+            n_indexed += 1
+            if n_indexed % 1000 == 0:
+                index.commit()
+        index.commit()
+        _LG.info(
+            'Indexed %s files. (%s unchanged, %s failed, %s in index)',
+            n_indexed, len(files) - len(jobs), n_failed, index.count())
+    if n_failed:
+        sys.exit(1)
+
+
+###############################################################################
+def _print_game(game):
+    _LG.info(
+        '%s: %s, lobby %s, %s, %s, %s rounds', game['path'], game['table'],
+        game['lobby'], 'Hanchan' if game['ton-nan'] else 'Tonpuu',
+        'Sanma' if game['sanma'] else 'Yonma', game['n_rounds'])
+    for player in game['players']:
+        _LG.info(
+            '  %-12s dan: %2s, rate: %7.2f, score: %s', player['name'],
+            player['dan'], player['rate'], player['score'])
+
+
+def query_main(args):
+    """Entry point for `query` command."""
+    if not os.path.exists(args.index):
+        _LG.error('Index file (%s) not found. Run `tlu index` first.', args.index)
+        sys.exit(1)
+    t0 = time.time()
+    with GameIndex(args.index) as index:
+        games = index.query(
+            player=args.player, min_rate=args.min_rate,
+            max_rate=args.max_rate, min_dan=args.min_dan, table=args.table,
+            lobby=args.lobby, ton_nan=args.ton_nan, sanma=args.sanma,
+            limit=args.limit)
+    _LG.debug('Query took %.3f [ms]', 1000 * (time.time() - t0))
+    if args.json:
+        _LG.info(json.dumps(games, indent=2))
+    elif args.path_only:
+        for game in games:
+            _LG.info(game['path'])
+    else:
+        for game in games:
+            _print_game(game)
@@ -12,6 +12,7 @@ def _parse_command_line_args():
     parser = argparse.ArgumentParser(
         description='Utility for tenhou.net log files.'
     )
+    _populate_profile_options(parser)
     subparsers = parser.add_subparsers(dest='sub_command')
     subparsers.required = True
     _add_subparsers(subparsers)
@@ -21,12 +22,52 @@ def _parse_command_line_args():
 def _add_subparsers(subparsers):
     parser = subparsers.add_parser('parse')
     _populate_parse_options(parser)
+    parser = subparsers.add_parser('parse-dir')
+    _populate_parse_dir_options(parser)
+    parser = subparsers.add_parser('export-npz')
+    _populate_export_npz_options(parser)
+    parser = subparsers.add_parser('extract-features')
+    _populate_extract_features_options(parser)
+    parser = subparsers.add_parser('pack')
+    _populate_pack_options(parser)
     parser = subparsers.add_parser('view')
     _populate_view_options(parser)
     parser = subparsers.add_parser('list')
     _populate_list_options(parser)
     parser = subparsers.add_parser('download')
     _populate_download_options(parser)
+    parser = subparsers.add_parser('download-bulk')
+    _populate_download_bulk_options(parser)
+    parser = subparsers.add_parser('cache')
+    _populate_cache_options(parser)
+    parser = subparsers.add_parser('stats')
+    _populate_stats_options(parser)
+    parser = subparsers.add_parser('index')
+    _populate_index_options(parser)
+    parser = subparsers.add_parser('query')
+    _populate_query_options(parser)
+    parser = subparsers.add_parser('grep')
+    _populate_grep_options(parser)
+    parser = subparsers.add_parser('watch')
+    _populate_watch_options(parser)
+
+
+###############################################################################
+def _populate_profile_options(parser):
+    parser.add_argument(
+        '--profile', action='store_true',
+        help='Print wall/CPU time of each stage (reading, XML parsing, node '
+        'parsing, rendering, ...) and parse time per tag to stderr at exit. '
+        'Only the main process is measured.')
+    parser.add_argument(
+        '--profile-format', choices=['table', 'json'], default='table',
+        help='Format of `--profile` summary.')
+    parser.add_argument(
+        '--profile-output', help='Write `--profile` summary to this file.')
+    parser.add_argument(
+        '--profile-dump',
+        help='Run the command under cProfile and save stats to this file. '
+        'The stats can be read with `pstats` module.')
 
 
 ###############################################################################
@@ -37,6 +78,111 @@ def _populate_parse_options(parser):
     )
     parser.set_defaults(func=_main)
     parser.add_argument('--tags', help='Display only given tags', nargs='*')
+    parser.add_argument(
+        '--fields', nargs='*',
+        help='Parse only given fields, such as `AGARI.ten` or `GO`, and skip '
+        'nodes of other tags. Rounds are kept. Parse cache is not used.')
+    parser.add_argument(
+        '--no-cache', help='Do not use parse cache', action='store_true')
+    parser.add_argument(
+        '--format', choices=['json', 'ndjson'], default='json',
+        help='`ndjson` writes one compact JSON object per line as the file is '
+        'parsed. Parse cache is not used.')
+    parser.add_argument(
+        '--unit', choices=['event', 'round'], default='event',
+        help='Unit of `ndjson` line. `round` writes meta data first, then one '
+        'line per round. INIT is always kept with `--tags` to delimit rounds.')
+    parser.add_argument(
+        '--output', help='Output file. Defaults to stdout.')
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_parse_dir_options(parser):
+    from .parse_dir import main as _main
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='Directories, glob patterns or paths of mjlog files.'
+    )
+    parser.add_argument(
+        '--output-dir', required=True,
+        help='Directory to write parsed JSON files, one file per game. Paths '
+        'relative to the common directory of the inputs are mirrored.'
+    )
+    parser.set_defaults(func=_main)
+    parser.add_argument(
+        '--workers', type=int,
+        help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument(
+        '--chunksize', type=int, default=16,
+        help='Number of files sent to a worker at a time.')
+    parser.add_argument(
+        '--ordered', action='store_true',
+        help='Process files in sorted order rather than completion order.')
+    parser.add_argument(
+        '--indent', type=int, help='Indentation of output JSON.')
+    parser.add_argument('--tags', help='Parse only given tags', nargs='*')
+    parser.add_argument(
+        '--fields', nargs='*',
+        help='Parse only given fields, such as `AGARI.ten` or `GO`, and skip '
+        'nodes of other tags. Rounds are kept.')
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_export_npz_options(parser):
+    from .export_npz import main as _main
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='Directories, glob patterns or paths of mjlog files.'
+    )
+    parser.add_argument(
+        '--prefix', required=True,
+        help='Output path prefix. `-XXXXX.npz` is appended to each shard.'
+    )
+    parser.set_defaults(func=_main)
+    parser.add_argument(
+        '--games-per-shard', type=int, default=1000,
+        help='The number of games saved in one shard.')
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_extract_features_options(parser):
+    from .extract_features import main as _main
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='Directories, glob patterns or paths of mjlog files.'
+    )
+    parser.add_argument(
+        '--output-dir', required=True,
+        help='Directory to write `.npy` shards and `manifest.json`.'
+    )
+    parser.set_defaults(func=_main)
+    parser.add_argument(
+        '--samples-per-shard', type=int, default=65536,
+        help='Maximum number of samples (discards) in one shard.')
+    parser.add_argument(
+        '--files-per-job', type=int, default=256,
+        help='Number of files processed by a worker at a time. Each job '
+        'writes its own shards.')
+    parser.add_argument(
+        '--workers', type=int,
+        help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_pack_options(parser):
+    from .pack import main as _main
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='Directories, glob patterns or paths of mjlog files.'
+    )
+    parser.add_argument(
+        'output', help='Output binary file path.'
+    )
+    parser.set_defaults(func=_main)
     parser.add_argument('--debug', help='Enable debug log', action='store_true')
 
 
@@ -48,6 +194,11 @@ def _populate_view_options(parser):
     )
     parser.set_defaults(func=_main)
     parser.add_argument('--round', help='Round number to view', type=int)
+    parser.add_argument(
+        '--no-cache', help='Do not use parse cache', action='store_true')
+    parser.add_argument(
+        '--legacy-renderer', action='store_true',
+        help='Print each line through logging (slower, same output).')
     parser.add_argument('--debug', help='Enable debug log', action='store_true')
 
 
@@ -68,9 +219,213 @@ def _populate_download_options(parser):
         'log_id', help='Play log ID'
     )
     parser.add_argument(
-        'output', help='Output file path.'
+        'output', help='Output file path. Compressed if it ends with `.gz`.'
+    )
+    parser.set_defaults(func=_main)
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_download_bulk_options(parser):
+    from .download import bulk_main as _main
+    parser.add_argument(
+        'id_file', nargs='?',
+        help='File with one log ID per line. Reads stdin when omitted or `-`.'
+    )
+    parser.add_argument(
+        '--output-dir', required=True,
+        help='Directory to save `<log_id>.mjlog.gz` files. Existing files are '
+        'skipped, so interrupted run can be resumed.'
+    )
+    parser.set_defaults(func=_main)
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help='The number of concurrent downloads.')
+    parser.add_argument(
+        '--rate', type=float, default=2.,
+        help='Maximum number of requests per second. 0 for unlimited.')
+    parser.add_argument(
+        '--retries', type=int, default=3,
+        help='The number of retries on connection error or 5XX status.')
+    parser.add_argument(
+        '--backoff', type=float, default=1.,
+        help='Initial wait in seconds before retry. Doubled at each retry.')
+    parser.add_argument(
+        '--archive-url',
+        help='URL to which log ID is appended. Defaults to Tenhou.net log '
+        'archive.')
+    parser.add_argument(
+        '--no-gzip', action='store_true',
+        help='Save as uncompressed `<log_id>.mjlog` files.')
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_cache_options(parser):
+    from .cache import main as _main
+    parser.add_argument(
+        'action', choices=['stats', 'clear'],
+        help='Show statistics of / Remove all the entries of parse cache.'
+    )
+    parser.set_defaults(func=_main)
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_stats_options(parser):
+    from .stats import main as _main
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='Directories, glob patterns or paths of mjlog files.'
+    )
+    parser.set_defaults(func=_main)
+    parser.add_argument(
+        '--state',
+        help='JSON file of aggregate and mtime/size of aggregated files. When '
+        'it exists, unchanged files are skipped and new files are merged into '
+        'it. The aggregate is rebuilt if aggregated files were modified. '
+        'Updated at the end.')
+    parser.add_argument(
+        '--workers', type=int,
+        help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument(
+        '--chunksize', type=int, default=64,
+        help='Number of files folded into one partial aggregate by a worker.')
+    parser.add_argument(
+        '--json', action='store_true', help='Output summary as JSON.')
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_index_options(parser):
+    from .index import main as _main
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='Directories, glob patterns or paths of mjlog files.'
+    )
+    parser.add_argument(
+        '--index', required=True,
+        help='SQLite database file. Only new or modified files are parsed '
+        'when it already exists.'
     )
     parser.set_defaults(func=_main)
+    parser.add_argument(
+        '--prune', action='store_true',
+        help='Remove entries of files which no longer exist.')
+    parser.add_argument(
+        '--workers', type=int,
+        help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument(
+        '--chunksize', type=int, default=16,
+        help='Number of files sent to a worker at a time.')
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _add_game_filter_options(parser):
+    parser.add_argument('--player', help='Name of player in the game.')
+    parser.add_argument(
+        '--min-rate', type=float,
+        help='Minimum rate of the player (or of any player).')
+    parser.add_argument(
+        '--max-rate', type=float,
+        help='Maximum rate of the player (or of any player).')
+    parser.add_argument(
+        '--min-dan', type=int,
+        help='Minimum dan of the player (or of any player).')
+    parser.add_argument(
+        '--table', choices=['dan-i', 'joukyu', 'tokujou', 'tenhou', 'test'],
+        help='Table type.')
+    parser.add_argument('--lobby', type=int, help='Lobby number.')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        '--hanchan', dest='ton_nan', action='store_const', const=True,
+        help='Only East-South games.')
+    group.add_argument(
+        '--tonpuu', dest='ton_nan', action='store_const', const=False,
+        help='Only East-only games.')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        '--sanma', dest='sanma', action='store_const', const=True,
+        help='Only three-player games.')
+    group.add_argument(
+        '--yonma', dest='sanma', action='store_const', const=False,
+        help='Only four-player games.')
+
+
+###############################################################################
+def _populate_query_options(parser):
+    from .index import query_main as _main
+    parser.add_argument(
+        '--index', required=True, help='SQLite database built by `index`.'
+    )
+    parser.set_defaults(func=_main)
+    _add_game_filter_options(parser)
+    parser.add_argument('--limit', type=int, help='Maximum number of games.')
+    parser.add_argument(
+        '--path-only', action='store_true', help='Print file paths only.')
+    parser.add_argument(
+        '--json', action='store_true', help='Output games as JSON.')
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_grep_options(parser):
+    from .grep import main as _main
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='Directories, glob patterns or paths of mjlog files.'
+    )
+    parser.set_defaults(func=_main)
+    _add_game_filter_options(parser)
+    parser.add_argument(
+        '--limit', type=int, help='Stop after this many matches.')
+    parser.add_argument(
+        '--workers', type=int,
+        help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument(
+        '--chunksize', type=int, default=64,
+        help='Number of files sent to a worker at a time.')
+    parser.add_argument('--debug', help='Enable debug log', action='store_true')
+
+
+###############################################################################
+def _populate_watch_options(parser):
+    from .watch import main as _main
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='Directories (such as download destination) or glob patterns '
+        'to watch for new or modified mjlog files.'
+    )
+    parser.add_argument(
+        '--checkpoint', required=True,
+        help='JSON file recording processed files. Files recorded in it are '
+        'skipped after restart unless modified.'
+    )
+    parser.set_defaults(func=_main)
+    parser.add_argument(
+        '--checkpoint-every', type=int, default=100,
+        help='Save the checkpoint (and commit outputs) after this many files '
+        'within a poll. At most this many files are processed again after a '
+        'crash.')
+    parser.add_argument(
+        '--cache', action='store_true',
+        help='Store parse results in parse cache.')
+    parser.add_argument(
+        '--index', help='Add games to this SQLite database. See `index`.')
+    parser.add_argument(
+        '--ndjson',
+        help='Append `{"path": ..., "game": ...}` line per game to this file.')
+    parser.add_argument(
+        '--interval', type=float, default=2.,
+        help='Seconds between polls.')
+    parser.add_argument(
+        '--settle', type=float, default=1.,
+        help='Skip files modified within this many seconds until a later '
+        'poll, so that files being written are not read.')
+    parser.add_argument(
+        '--once', action='store_true',
+        help='Process new files once and exit, instead of polling.')
     parser.add_argument('--debug', help='Enable debug log', action='store_true')
 
 
@@ -84,8 +439,43 @@ def _init_logging(debug=False):
     logging.basicConfig(level=level, format=format_, stream=sys.stdout)
 
 
+def _write_profile(profiler, args):
+    if args.profile_format == 'json':
+        summary = profiler.format_json()
+    else:
+        summary = profiler.format_table()
+    if args.profile_output is None:
+        sys.stderr.write(summary + '\n')
+    else:
+        with open(args.profile_output, 'w') as file_:
+            file_.write(summary + '\n')
+
+
+def _run_profiled(args):
+    profiler, c_profile = None, None
+    if args.profile:
+        from tenhou_log_utils.profiler import Profiler
+        profiler = Profiler().install()
+    if args.profile_dump:
+        import cProfile
+        c_profile = cProfile.Profile()
+        c_profile.enable()
+    try:
+        args.func(args)
+    finally:
+        if c_profile is not None:
+            c_profile.disable()
+            c_profile.dump_stats(args.profile_dump)
+        if profiler is not None:
+            profiler.uninstall()
+            _write_profile(profiler, args)
+
+
 def main():
     """Main entry point for Tenhou log utils CLI."""
     args = _parse_command_line_args()
     _init_logging(args.debug)
-    args.func(args)
+    if args.profile or args.profile_dump:
+        _run_profiled(args)
+    else:
+        args.func(args)
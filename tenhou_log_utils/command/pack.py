@@ -0,0 +1,16 @@
+"""Define `pack` command"""
+from __future__ import absolute_import
+
+import logging
+
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.binary import write_binary
+
+_LG = logging.getLogger(__name__)
+
+
+def main(args):
+    """Entry point for `pack` command."""
+    files = find_mjlog_files(args.inputs)
+    n_games = write_binary(files, args.output)
+    _LG.info('Packed %s games into %s.', n_games, args.output)
@@ -1,16 +1,66 @@
 """Define `parse` command"""
 from __future__ import absolute_import
 
+import os
+import sys
 import json
+import errno
 import logging
 
-from tenhou_log_utils.io import load_mjlog
-from tenhou_log_utils.parser import parse_mjlog
+from tenhou_log_utils.parser import parse_mjlog_file, iter_mjlog, iter_game
+from tenhou_log_utils.cache import ParseCache
+from tenhou_log_utils.ndjson import NDJSONWriter
 
 _LG = logging.getLogger(__name__)
 
 
+def _write_ndjson(args, file_):
+    # Write each item as soon as it is parsed, bypassing logging
+    writer = NDJSONWriter(file_)
+    tags = args.tags
+    if args.unit == 'round' and tags is not None and 'INIT' not in tags:
+        # Rounds are delimited by INIT
+        tags = tags + ['INIT']
+    parsed = iter_mjlog(args.input, tags=tags, fields=args.fields)
+    if args.unit == 'event':
+        for item in parsed:
+            writer.write(item)
+        return
+    game = iter_game(parsed)
+    writer.write({'meta': next(game)})
+    for i, round_ in enumerate(game):
+        writer.write({'round': i, 'events': round_})
+
+
+def _main_ndjson(args):
+    if args.output is None:
+        stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+        try:
+            _write_ndjson(args, stdout)
+            stdout.flush()
+        except IOError as error:
+            # Downstream of pipe (such as `head`) exited early. Point stdout
+            # to devnull so that flushing at exit does not fail again.
+            if error.errno != errno.EPIPE:
+                raise
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    else:
+        with open(args.output, 'wb') as file_:
+            _write_ndjson(args, file_)
+
+
 def main(args):
     """Entry point for `parse` command."""
-    data = parse_mjlog(load_mjlog(args.input), tags=args.tags)
-    _LG.info(json.dumps(data, indent=2))
+    if args.format == 'ndjson':
+        _main_ndjson(args)
+        return
+    if args.no_cache or args.tags is not None or args.fields is not None:
+        data = parse_mjlog_file(
+            args.input, tags=args.tags, fields=args.fields)
+    else:
+        data = ParseCache().parse(args.input)
+    if args.output is None:
+        _LG.info(json.dumps(data, indent=2))
+    else:
+        with open(args.output, 'w') as file_:
+            json.dump(data, file_, indent=2)
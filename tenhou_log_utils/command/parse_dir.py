@@ -0,0 +1,106 @@
+"""Define `parse-dir` command"""
+from __future__ import absolute_import
+
+import os
+import sys
+import json
+import logging
+import multiprocessing
+
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.parser import parse_mjlog_file
+
+_LG = logging.getLogger(__name__)
+
+
+def _get_common_dir(filepaths):
+    dirs = [os.path.dirname(os.path.abspath(path)).split(os.sep)
+            for path in filepaths]
+    return os.sep.join(os.path.commonprefix(dirs)) or os.sep
+
+
+def _get_output_path(filepath, base_dir, output_dir):
+    # Mirror the path relative to `base_dir`, so that files of the same name
+    # in different directories do not overwrite each other.
+    name = os.path.relpath(os.path.abspath(filepath), base_dir)
+    for ext in ['.gz', '.mjlog']:
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    return os.path.join(output_dir, name + '.json')
+
+
+def _get_output_paths(filepaths, output_dir):
+    base_dir = _get_common_dir(filepaths)
+    outpaths, sources = [], {}
+    for filepath in filepaths:
+        outpath = _get_output_path(filepath, base_dir, output_dir)
+        if outpath in sources:
+            raise ValueError(
+                '{} and {} are both written to {}.'.format(
+                    sources[outpath], filepath, outpath))
+        sources[outpath] = filepath
+        outpaths.append(outpath)
+    return outpaths
+
+
+def _parse(job):
+    filepath, outpath, tags, fields, indent = job
+    try:
+        data = parse_mjlog_file(filepath, tags=tags, fields=fields)
+        outdir = os.path.dirname(outpath)
+        if not os.path.isdir(outdir):
+            try:
+                os.makedirs(outdir)
+            except OSError:
+                # Created by another worker
+                if not os.path.isdir(outdir):
+                    raise
+        with open(outpath, 'w') as file_:
+            json.dump(data, file_, indent=indent)
+    except Exception:  # pylint: disable=broad-except
+        _LG.exception('Failed to parse %s', filepath)
+        return filepath, None
+    return filepath, outpath
+
+
+def _map(jobs, workers, chunksize, ordered):
+    if workers == 1:
+        for job in jobs:
+            yield _parse(job)
+        return
+    pool = multiprocessing.Pool(workers)
+    try:
+        map_ = pool.imap if ordered else pool.imap_unordered
+        for result in map_(_parse, jobs, chunksize):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main(args):
+    """Entry point for `parse-dir` command."""
+    logging.getLogger('tenhou_log_utils.parser').setLevel(logging.WARN)
+    files = find_mjlog_files(args.inputs)
+    _LG.debug('Found %s files.', len(files))
+    try:
+        outpaths = _get_output_paths(files, args.output_dir)
+    except ValueError as error:
+        _LG.error('Output files collide: %s', error)
+        sys.exit(1)
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    jobs = [
+        (file_, outpath, args.tags, args.fields, args.indent)
+        for file_, outpath in zip(files, outpaths)
+    ]
+    workers = args.workers or multiprocessing.cpu_count()
+    n_failed = 0
+    for filepath, outpath in _map(jobs, workers, args.chunksize, args.ordered):
+        if outpath is None:
+            n_failed += 1
+        else:
+            _LG.debug('%s -> %s', filepath, outpath)
+    _LG.info('Parsed %s files. (%s failed)', len(files) - n_failed, n_failed)
+    if n_failed:
+        sys.exit(1)
@@ -0,0 +1,152 @@
+"""Define `stats` command"""
+from __future__ import absolute_import
+
+import os
+import sys
+import json
+import logging
+import tempfile
+import multiprocessing
+
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.parser import parse_mjlog_file
+from tenhou_log_utils.stats import GameStats, FIELDS
+from tenhou_log_utils.viewer import LIMIT_NAMES, YAKU_NAMES, RYUUKYOKU_REASONS
+
+_LG = logging.getLogger(__name__)
+
+
+def _fold(filepaths):
+    # Fold a chunk of files into one partial aggregate, so that only small
+    # dicts are sent back to the parent process.
+    stats, folded = GameStats(), []
+    for filepath in filepaths:
+        try:
+            stats.fold(parse_mjlog_file(filepath, fields=FIELDS))
+        except Exception:  # pylint: disable=broad-except
+            _LG.exception('Failed to parse %s', filepath)
+        else:
+            folded.append(filepath)
+    return stats.to_dict(), folded, len(filepaths) - len(folded)
+
+
+def _chunk(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _map(chunks, workers):
+    if workers == 1:
+        for chunk in chunks:
+            yield _fold(chunk)
+        return
+    pool = multiprocessing.Pool(workers)
+    try:
+        for result in pool.imap_unordered(_fold, chunks):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+###############################################################################
+def _print_rates(key, summary):
+    _LG.info('%s', key)
+    _LG.info('  Games: %s, Rounds: %s', summary['games'], summary['rounds'])
+    _LG.info('  Win:        %6.2f %%', 100 * summary['win_rate'])
+    _LG.info('    Tsumo:    %6.2f %%', 100 * summary['tsumo_rate'])
+    _LG.info('  Deal-in:    %6.2f %%', 100 * summary['deal_in_rate'])
+    _LG.info('  Ryuukyoku:  %6.2f %%', 100 * summary['ryuukyoku_rate'])
+
+
+def _print_summary(key, summary):
+    _print_rates(key, summary)
+    _LG.info('  Average points:')
+    for limit, point in sorted(summary['average_points'].items()):
+        _LG.info('    %-20s %8.1f', LIMIT_NAMES[limit], point)
+    _LG.info('  Yaku (per agari):')
+    for yaku, rate in sorted(summary['yaku'].items(), key=lambda x: -x[1]):
+        _LG.info('    %-20s (%2d): %6.2f %%', YAKU_NAMES[yaku], yaku, 100 * rate)
+    if summary['yakuman']:
+        _LG.info('  Yakuman (per agari):')
+        for yaku, rate in sorted(summary['yakuman'].items(), key=lambda x: -x[1]):
+            _LG.info('    %-20s (%2d): %6.2f %%', YAKU_NAMES[yaku], yaku, 100 * rate)
+    _LG.info('  Ryuukyoku reasons:')
+    for reason, rate in sorted(summary['ryuukyoku'].items(), key=lambda x: -x[1]):
+        name = RYUUKYOKU_REASONS.get(reason, reason.capitalize())
+        _LG.info('    %-20s %6.2f %%', name, 100 * rate)
+
+
+###############################################################################
+def _load_state(path):
+    """Load aggregate and ledger of folded files (path -> [mtime, size])"""
+    if not path or not os.path.exists(path):
+        return GameStats(), {}
+    with open(path, 'r') as file_:
+        state = json.load(file_)
+    return GameStats.from_dict(state['stats']), state['files']
+
+
+def _save_state(path, stats, ledger):
+    # Write to temporary file first so that interruption does not leave
+    # broken state
+    dirpath = os.path.dirname(os.path.abspath(path))
+    fd_, tmppath = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+    with os.fdopen(fd_, 'w') as file_:
+        json.dump({'stats': stats.to_dict(), 'files': ledger}, file_)
+    os.rename(tmppath, path)
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return [stat.st_mtime, stat.st_size]
+
+
+def _find_changed(ledger):
+    """Find files in ledger which still exist but are modified"""
+    return [
+        path for path, entry in ledger.items()
+        if os.path.exists(path) and _stat(path) != entry
+    ]
+
+
+def main(args):
+    """Entry point for `stats` command."""
+    logging.getLogger('tenhou_log_utils.parser').setLevel(logging.WARN)
+    stats, ledger = _load_state(args.state)
+    _LG.debug('Loaded state with %s files.', len(ledger))
+    files = [os.path.abspath(path) for path in find_mjlog_files(args.inputs)]
+    changed = _find_changed(ledger)
+    if changed:
+        # Counts of the old content cannot be subtracted, so start over with
+        # the files folded so far and the new ones.
+        _LG.warning(
+            '%s files were modified since aggregated (e.g. %s). '
+            'Rebuilding the aggregate.', len(changed), changed[0])
+        files = sorted(set(files).union(
+            path for path in ledger if os.path.exists(path)))
+        stats, ledger = GameStats(), {}
+    # Stat before parsing, so that files modified while being parsed are
+    # detected at the next run.
+    entries = {
+        file_: _stat(file_) for file_ in files if file_ not in ledger}
+    _LG.debug('Found %s new files.', len(entries))
+    workers = args.workers or multiprocessing.cpu_count()
+    chunks = _chunk(sorted(entries), args.chunksize)
+    n_failed = 0
+    for partial, folded, failed in _map(chunks, workers):
+        stats.merge(GameStats.from_dict(partial))
+        # Failed files are not recorded, so that they are retried.
+        for path in folded:
+            ledger[path] = entries[path]
+        n_failed += failed
+    if args.state:
+        _save_state(args.state, stats, ledger)
+    summary = stats.summarize()
+    if args.json:
+        _LG.info(json.dumps(summary, indent=2, sort_keys=True))
+    else:
+        for key in sorted(summary):
+            _print_summary(key, summary[key])
+    if n_failed:
+        _LG.error('Failed to parse %s files.', n_failed)
+        sys.exit(1)
@@ -1,11 +1,16 @@
 """Define `view` command"""
 from __future__ import absolute_import
 
+import os
+import sys
+import errno
 import logging
 
-from tenhou_log_utils.io import load_mjlog
-from tenhou_log_utils.parser import parse_mjlog
+from tenhou_log_utils.parser import iter_mjlog, iter_game
+from tenhou_log_utils.game import load_game
+from tenhou_log_utils.cache import ParseCache
 from tenhou_log_utils.viewer import print_node
+from tenhou_log_utils.renderer import Renderer
 
 _LG = logging.getLogger(__name__)
 
@@ -22,16 +27,44 @@ def _print_round(round_data):
         print_node(node['tag'], node['data'])
 
 
+def _view(args, print_meta, print_round):
+    if args.round is not None:
+        # Decode only meta data and the selected round
+        lazy_game = load_game(args.input, cache=False)
+        n_rounds = len(lazy_game)
+        if not -n_rounds <= args.round < n_rounds:
+            _LG.error(
+                '--round out of range. (%s rounds in %s)',
+                n_rounds, args.input)
+            sys.exit(1)
+        game = iter([lazy_game[args.round]])
+        print_meta(lazy_game.meta)
+    elif args.no_cache:
+        game = iter_game(iter_mjlog(args.input))
+        print_meta(next(game))
+    else:
+        data = ParseCache().parse(args.input)
+        game = iter(data['rounds'])
+        print_meta(data['meta'])
+
+    for round_data in game:
+        print_round(round_data)
+
+
 def main(args):
     """Entry point for `view` command."""
     logging.getLogger('tenhou_log_utils.parser').setLevel(logging.WARN)
-    data = parse_mjlog(load_mjlog(args.input))
-    _print_meta(data['meta'])
-
-    if args.round is None:
-        rounds = data['rounds']
+    if args.legacy_renderer:
+        print_meta, print_round = _print_meta, _print_round
     else:
-        rounds = [data['rounds'][args.round]]
-
-    for round_data in rounds:
-        _print_round(round_data)
+        renderer = Renderer()
+        print_meta, print_round = renderer.render_meta, renderer.render_round
+    try:
+        _view(args, print_meta, print_round)
+        sys.stdout.flush()
+    except IOError as error:
+        # Downstream of pipe (such as `head`) exited early. Point stdout
+        # to devnull so that flushing at exit does not fail again.
+        if error.errno != errno.EPIPE:
+            raise
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
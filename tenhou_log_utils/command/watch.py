@@ -0,0 +1,82 @@
+"""Define `watch` command"""
+from __future__ import absolute_import
+
+import os
+import sys
+import logging
+
+from tenhou_log_utils.watch import Watcher
+from tenhou_log_utils.cache import ParseCache
+from tenhou_log_utils.index import GameIndex, extract_metadata
+from tenhou_log_utils.ndjson import NDJSONWriter
+from tenhou_log_utils.parser import parse_mjlog_file
+
+_LG = logging.getLogger(__name__)
+
+
+class _IndexSink(object):
+    def __init__(self, index):
+        self.index = index
+
+    def __call__(self, path, mtime, size):
+        self.index.put(path, mtime, size, extract_metadata(path))
+
+    def flush(self):
+        self.index.commit()
+
+
+class _ParseSink(object):
+    """Parse each file once and pass the result to parse cache / NDJSON"""
+    def __init__(self, cache, file_):
+        self.cache = cache
+        self.file_ = file_
+        self.writer = None if file_ is None else NDJSONWriter(file_)
+
+    def __call__(self, path, *_):
+        if self.cache is not None:
+            data = self.cache.parse(path)
+        else:
+            data = parse_mjlog_file(path)
+        if self.writer is not None:
+            self.writer.write({'path': path, 'game': data})
+
+    def flush(self):
+        if self.file_ is not None:
+            self.file_.flush()
+            os.fsync(self.file_.fileno())
+
+
+def _log(path, *_):
+    _LG.info(path)
+
+
+def main(args):
+    """Entry point for `watch` command."""
+    logging.getLogger('tenhou_log_utils.parser').setLevel(logging.WARN)
+    index, ndjson = None, None
+    handlers = []
+    if args.index:
+        index = GameIndex(args.index)
+        handlers.append(_IndexSink(index))
+    if args.ndjson:
+        ndjson = open(args.ndjson, 'ab')
+    if args.cache or ndjson is not None:
+        cache = ParseCache() if args.cache else None
+        handlers.append(_ParseSink(cache, ndjson))
+    handlers.append(_log)
+    paths = [os.path.abspath(path) for path in args.inputs]
+    watcher = Watcher(
+        paths, handlers, checkpoint=args.checkpoint, settle=args.settle,
+        checkpoint_every=args.checkpoint_every)
+    try:
+        n_processed, n_failed = watcher.run(
+            interval=args.interval, once=args.once)
+    finally:
+        if ndjson is not None:
+            ndjson.close()
+        if index is not None:
+            index.close()
+    _LG.debug('Processed %s files. (%s failed)', n_processed, n_failed)
+    if n_failed:
+        _LG.error('Failed to process %s files.', n_failed)
+        sys.exit(1)
@@ -0,0 +1,179 @@
+"""Random access reader of samples written by `extract-features`
+
+:class:`SampleDataset` memory-maps all the shards listed in the manifest
+and maps global sample index to shard and offset, so that samples are read
+straight from the page cache without loading the corpus into memory or
+parsing mjlog files again.
+"""
+from __future__ import absolute_import
+
+import os
+import json
+import logging
+
+import numpy as np
+
+from tenhou_log_utils.features import SAMPLE_DTYPE
+
+_LG = logging.getLogger(__name__)
+
+
+class SampleDataset(object):
+    """Memory-mapped dataset of :data:`features.SAMPLE_DTYPE` records
+
+    Parameters
+    ----------
+    manifest : str
+        Path to ``manifest.json`` written by `extract-features`.
+    """
+    def __init__(self, manifest):
+        with open(manifest, 'r') as file_:
+            self.manifest = json.load(file_)
+        directory = os.path.dirname(os.path.abspath(manifest))
+        self._shards = []
+        for shard in self.manifest['shards']:
+            path = os.path.join(directory, shard['path'])
+            data = np.load(path, mmap_mode='r')
+            if data.dtype != SAMPLE_DTYPE or len(data) != shard['n_samples']:
+                raise ValueError(
+                    '{} does not match the manifest.'.format(path))
+            self._shards.append(data)
+        # Global index of the first sample of each shard, and the total
+        self._offsets = np.cumsum(
+            [0] + [len(shard) for shard in self._shards], dtype=np.int64)
+
+    def close(self):
+        """Release the memory maps
+
+        Shards are unmapped once the samples and batches taken from them
+        are released too, so that views taken earlier remain valid.
+        """
+        self._shards = []
+        self._offsets = self._offsets[:1]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    ###########################################################################
+    def locate(self, indices):
+        """Map global sample indices to shard indices and local offsets
+
+        Parameters
+        ----------
+        indices : int or array-like of int
+
+        Returns
+        -------
+        tuple of int or numpy.ndarray
+            Shard index and offset in the shard.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if np.any((indices < 0) | (indices >= len(self))):
+            raise IndexError('Sample index out of range.')
+        shards = np.searchsorted(self._offsets, indices, side='right') - 1
+        return shards, indices - self._offsets[shards]
+
+    def __getitem__(self, index):
+        """Get a sample as a read-only view of the memory map (no copy)"""
+        if index < 0:
+            index += len(self)
+        shard, offset = self.locate(index)
+        return self._shards[shard][offset]
+
+    def shard(self, index):
+        """Get a whole shard as a read-only memory-mapped array"""
+        return self._shards[index]
+
+    def get_batch(self, indices):
+        """Gather samples into a new array
+
+        Parameters
+        ----------
+        indices : array-like of int
+            Global sample indices, in any order.
+
+        Returns
+        -------
+        numpy.ndarray
+            1D array of ``SAMPLE_DTYPE`` in the order of `indices`.
+        """
+        shards, offsets = self.locate(indices)
+        batch = np.empty(len(shards), dtype=SAMPLE_DTYPE)
+        # One fancy-indexing read per shard touched by the batch
+        for shard in np.unique(shards):
+            mask = shards == shard
+            batch[mask] = self._shards[shard][offsets[mask]]
+        return batch
+
+    ###########################################################################
+    def get_indices(self, shuffle=True, seed=0, epoch=0, rank=0,
+                    world_size=1):
+        """Get sample indices of one epoch for a worker
+
+        Parameters
+        ----------
+        shuffle : bool
+            Shuffle with a permutation determined by `seed` and `epoch`.
+
+        seed, epoch : int
+            All the workers must use the same values, so that they share
+            the permutation.
+
+        rank, world_size : int
+            Index of the worker and the number of workers. The permutation
+            is split into `world_size` disjoint parts of (almost) equal size.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        # pylint: disable=too-many-arguments
+        if not 0 <= rank < world_size:
+            raise ValueError(
+                'rank must be in [0, {}): {}'.format(world_size, rank))
+        if shuffle:
+            rng = np.random.RandomState([seed, epoch])
+            indices = rng.permutation(len(self))
+        else:
+            indices = np.arange(len(self))
+        return indices[rank::world_size]
+
+    def iter_batches(self, batch_size, shuffle=True, seed=0, epoch=0,
+                     rank=0, world_size=1, drop_last=False):
+        """Iterate over batches of one epoch
+
+        See :meth:`get_indices` for the parameters other than the following.
+
+        Parameters
+        ----------
+        batch_size : int
+
+        drop_last : bool
+            Skip the last batch if it is smaller than `batch_size`.
+
+        Yields
+        ------
+        numpy.ndarray
+            Batch of samples. See :meth:`get_batch`.
+        """
+        # pylint: disable=too-many-arguments
+        indices = self.get_indices(
+            shuffle=shuffle, seed=seed, epoch=epoch, rank=rank,
+            world_size=world_size)
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            if drop_last and len(batch) < batch_size:
+                break
+            yield self.get_batch(batch)
+
+    def __iter__(self):
+        """Iterate over samples in order as views of the memory map"""
+        for shard in self._shards:
+            for sample in shard:
+                yield sample
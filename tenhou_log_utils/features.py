@@ -0,0 +1,241 @@
+"""Extract per-discard training samples from parsed games
+
+Rounds are replayed with :class:`tenhou_log_utils.replay.GameState` and one
+sample is emitted for each DISCARD, holding the state right before the
+discard as seen from the discarding player. Seats are rotated so that the
+discarding player is seat 0 and the others follow in turn order. A sample
+is one record of ``SAMPLE_DTYPE``, a structured dtype of which fields are
+all fixed-shape uint8 arrays:
+
+- ``hand``: (4, 34). ``hand[i, k]`` is 1 if the player holds more than
+  ``i`` tiles of kind ``k`` in concealed hand.
+- ``kawa``, ``kawa_flags``: (4, MAX_DISCARDS). Discarded tiles (ID) of each
+  seat in order and their flags (``replay.TSUMOGIRI`` etc...).
+- ``melds``, ``meld_types``: (4, MAX_MELDS, 4) and (4, MAX_MELDS). Tiles
+  (ID) of melds and index of ``CALL_TYPES``.
+- ``nuki``: (4,). The number of North tiles extracted (Sanma).
+- ``dora``: (MAX_DORA,). Dora indicators (ID).
+- ``scores``: (4,). Score in units of 1000, plus ``SCORE_OFFSET``, clipped
+  to [0, 255].
+- ``riichi``: (4,). 0: not declared, 1: declaring now or not accepted yet,
+  2: accepted.
+- ``info``: (4,). Round number, combo, riichi sticks on table and seat of
+  dealer.
+- ``label``: Kind (0-33) of the discarded tile.
+- ``label_tile``: ID of the discarded tile.
+
+Missing values (padding, empty seat in Sanma) are ``PAD`` (255).
+
+Samples are written as ``.npy`` shards with :class:`ShardWriter`, so that
+they can be memory-mapped with ``numpy.load(path, mmap_mode='r')``.
+"""
+from __future__ import absolute_import
+
+import os
+import json
+import logging
+
+import numpy as np
+
+from tenhou_log_utils.parser import parse_mjlog_file
+from tenhou_log_utils.replay import (
+    GameState, MAX_DISCARDS, MAX_MELDS, MAX_DORA)
+
+_LG = logging.getLogger(__name__)
+
+PAD = 255
+SCORE_OFFSET = 128
+
+SAMPLE_DTYPE = np.dtype([
+    ('hand', np.uint8, (4, 34)),
+    ('kawa', np.uint8, (4, MAX_DISCARDS)),
+    ('kawa_flags', np.uint8, (4, MAX_DISCARDS)),
+    ('melds', np.uint8, (4, MAX_MELDS, 4)),
+    ('meld_types', np.uint8, (4, MAX_MELDS)),
+    ('nuki', np.uint8, (4,)),
+    ('dora', np.uint8, (MAX_DORA,)),
+    ('scores', np.uint8, (4,)),
+    ('riichi', np.uint8, (4,)),
+    ('info', np.uint8, (4,)),
+    ('label', np.uint8),
+    ('label_tile', np.uint8),
+])
+
+# Only the fields used by `GameState` are parsed.
+# See `tenhou_log_utils.parser.compile_fields`.
+FIELDS = [
+    'GO', 'INIT', 'DRAW', 'DISCARD', 'CALL', 'REACH', 'DORA',
+    'AGARI.scores', 'AGARI.gains', 'RYUUKYOKU.scores', 'RYUUKYOKU.gains',
+]
+
+_THRESHOLDS = np.arange(4, dtype=np.uint8)[:, None]
+
+# Sample field -> GameState array indexed by seat
+_SEAT_FIELDS = [
+    ('kawa', 'discards'),
+    ('kawa_flags', 'discard_flags'),
+    ('melds', 'melds'),
+    ('meld_types', 'meld_types'),
+    ('nuki', 'n_nuki'),
+    ('scores', 'scores'),
+    ('riichi', 'riichi'),
+]
+
+
+def _get_seats(players, n_players):
+    """Map rotated seat to player for each sample. Shape: (N, 4)"""
+    seats = (players[:, None] + np.arange(4)) % n_players
+    if n_players == 3:
+        # Empty seat of Sanma. Filled with PAD later.
+        seats[:, 3] = 3
+    return seats
+
+
+def _to_samples(buffers, players, tiles, n_players):
+    samples = np.zeros(len(players), dtype=SAMPLE_DTYPE)
+    rows = np.arange(len(players))
+    seats = _get_seats(players, n_players)
+    # Casting -1 padding to uint8 gives PAD
+    samples['hand'] = buffers['hands'][rows, players][:, None, :] > _THRESHOLDS
+    for name, attr in _SEAT_FIELDS:
+        samples[name] = buffers[attr][rows[:, None], seats]
+    samples['scores'] = np.clip(
+        buffers['scores'][rows[:, None], seats] // 1000 + SCORE_OFFSET, 0, 255)
+    samples['dora'] = buffers['dora']
+    info = np.minimum(buffers['info'], PAD)
+    info[:, 3] = (info[:, 3] - players) % n_players
+    samples['info'] = info
+    samples['label'] = tiles // 4
+    samples['label_tile'] = tiles
+    if n_players == 3:
+        for name, _ in _SEAT_FIELDS:
+            samples[name][:, 3] = PAD
+    return samples
+
+
+def extract_samples(game):
+    """Extract samples from a parsed game
+
+    Parameters
+    ----------
+    game : dict
+        Game parsed with :func:`parse_mjlog`, or with ``fields=FIELDS``.
+
+    Returns
+    -------
+    numpy.ndarray
+        1D array of ``SAMPLE_DTYPE``, one record per DISCARD.
+    """
+    n_players = 3 if game['meta']['GO']['config']['sanma'] else 4
+    n_samples = sum(
+        item['tag'] == 'DISCARD'
+        for round_ in game['rounds'] for item in round_)
+    state = GameState()
+    # State arrays are copied as they are at each discard, and then rotated
+    # for all the samples at once.
+    names = ['hands', 'dora'] + [attr for _, attr in _SEAT_FIELDS]
+    buffers = {
+        name: np.empty((n_samples,) + getattr(state, name).shape,
+                       dtype=getattr(state, name).dtype)
+        for name in names
+    }
+    buffers['info'] = np.empty((n_samples, 4), dtype=np.int64)
+    players = np.empty(n_samples, dtype=np.intp)
+    tiles = np.empty(n_samples, dtype=np.intp)
+    index = 0
+    for round_ in game['rounds']:
+        for item in round_:
+            tag, data = item['tag'], item['data']
+            if tag == 'DISCARD':
+                for name in names:
+                    buffers[name][index] = getattr(state, name)
+                buffers['info'][index] = (
+                    state.round, state.combo, state.deposits, state.oya)
+                players[index], tiles[index] = data['player'], data['tile']
+                index += 1
+            state.apply(tag, data)
+    return _to_samples(buffers, players, tiles, n_players)
+
+
+def extract_file(filepath):
+    """Parse [gzipped] mjlog file and extract samples
+
+    Only the fields needed for replay are parsed. See :func:`extract_samples`
+    """
+    return extract_samples(parse_mjlog_file(filepath, fields=FIELDS))
+
+
+###############################################################################
+class ShardWriter(object):
+    """Buffer samples and write them into ``.npy`` shards of bounded size
+
+    Parameters
+    ----------
+    prefix : str
+        Output path prefix. Shards are saved as ``<prefix>-000.npy``,
+        ``<prefix>-001.npy`` and so on.
+
+    samples_per_shard : int
+        Maximum number of samples in one shard. At most this many samples
+        are held in memory.
+    """
+    def __init__(self, prefix, samples_per_shard=65536):
+        self.prefix = prefix
+        self.samples_per_shard = samples_per_shard
+        self.shards = []
+        self._buffer = np.empty(samples_per_shard, dtype=SAMPLE_DTYPE)
+        self._size = 0
+
+    def write(self, samples):
+        """Add samples, writing shards as the buffer fills up"""
+        while len(samples):
+            n_copy = min(len(samples), self.samples_per_shard - self._size)
+            self._buffer[self._size:self._size + n_copy] = samples[:n_copy]
+            self._size += n_copy
+            samples = samples[n_copy:]
+            if self._size == self.samples_per_shard:
+                self.flush()
+
+    def flush(self):
+        """Write buffered samples as a shard"""
+        if not self._size:
+            return
+        path = '{}-{:03d}.npy'.format(self.prefix, len(self.shards))
+        _LG.debug('Saving %s samples on %s', self._size, path)
+        np.save(path, self._buffer[:self._size])
+        self.shards.append({'path': path, 'n_samples': self._size})
+        self._size = 0
+
+
+def write_manifest(path, shards, **extra):
+    """Write JSON manifest of shards
+
+    Parameters
+    ----------
+    path : str
+        Path of the manifest file. Paths of shards are stored relative to
+        the directory of the manifest.
+
+    shards : list of dict
+        ``path`` and ``n_samples`` of each shard, such as
+        :attr:`ShardWriter.shards`.
+
+    extra
+        Additional items stored in the manifest.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    manifest = {
+        'dtype': np.lib.format.dtype_to_descr(SAMPLE_DTYPE),
+        'n_samples': sum(shard['n_samples'] for shard in shards),
+        'shards': [
+            {
+                'path': os.path.relpath(
+                    os.path.abspath(shard['path']), directory),
+                'n_samples': shard['n_samples'],
+            } for shard in shards
+        ],
+    }
+    manifest.update(extra)
+    with open(path, 'w') as file_:
+        json.dump(manifest, file_, indent=2)
+    return manifest
@@ -0,0 +1,111 @@
+"""Lazily parsed game
+
+:func:`load_game` parses meta data nodes of mjlog file eagerly, but only
+records byte offsets of rounds. Each round is decoded the first time it is
+accessed, so jobs which only need ``meta`` or a few rounds skip the cost
+of decoding every draw and discard of the game.
+"""
+from __future__ import absolute_import
+
+import logging
+import xml.etree.ElementTree as ET
+
+from tenhou_log_utils.io import open_mjlog, find_round_offsets
+from tenhou_log_utils.parser import parse_node
+
+_LG = logging.getLogger(__name__)
+
+
+def _parse_nodes(data):
+    root = ET.fromstring(b'<mjloggm>' + data + b'</mjloggm>')
+    return [parse_node(node.tag, node.attrib) for node in root]
+
+
+class Game(object):
+    """Game of which rounds are parsed on demand
+
+    Parameters
+    ----------
+    data : bytes
+        Content of (decompressed) mjlog file.
+
+    cache : bool
+        When True, parsed rounds are kept, so that accessing the same round
+        again does not parse it again. Rounds parsed during iteration are
+        not kept either way.
+
+    Attributes
+    ----------
+    meta : dict
+        Parsed meta data. Same as 'meta' of :func:`parse_mjlog` output.
+    """
+    def __init__(self, data, cache=True):
+        self._data = data
+        self._offsets = find_round_offsets(data)
+        self._cache = {} if cache else None
+        # Skip the XML declaration and the opening root tag
+        start = data.find(b'>', data.find(b'<mjloggm')) + 1
+        self.meta = {
+            item['tag']: item['data']
+            for item in _parse_nodes(data[start:self._offsets[0]])
+        }
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _parse_round(self, index):
+        return _parse_nodes(
+            self._data[self._offsets[index]:self._offsets[index + 1]])
+
+    def __getitem__(self, index):
+        """Get parsed round. Same as an item of 'rounds' of :func:`parse_mjlog`"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Round index out of range: {}'.format(index))
+        if self._cache is None:
+            return self._parse_round(index)
+        if index not in self._cache:
+            self._cache[index] = self._parse_round(index)
+        return self._cache[index]
+
+    def __iter__(self):
+        """Iterate over parsed rounds, parsing one round at a time"""
+        for index in range(len(self)):
+            if self._cache is not None and index in self._cache:
+                yield self._cache[index]
+            else:
+                yield self._parse_round(index)
+
+    @property
+    def result(self):
+        """Final scores and uma (``owari``) or None if the game did not finish"""
+        if not len(self):
+            return None
+        for item in reversed(self[-1]):
+            if 'result' in item['data']:
+                return item['data']['result']
+        return None
+
+    def to_dict(self):
+        """Parse all the rounds and return the same data as :func:`parse_mjlog`"""
+        return {'meta': self.meta, 'rounds': list(self)}
+
+
+def load_game(filepath, cache=True):
+    """Load [gzipped] mjlog file as :class:`Game`
+
+    Parameters
+    ----------
+    filepath : str
+        Path to [gzipped] mjlog file.
+
+    cache : bool
+        See :class:`Game`.
+
+    Returns
+    -------
+    Game
+    """
+    with open_mjlog(filepath) as file_:
+        return Game(file_.read(), cache=cache)
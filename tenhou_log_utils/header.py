@@ -0,0 +1,139 @@
+"""Read and filter game header (meta data) of mjlog files
+
+``SHUFFLE``, ``GO``, ``UN`` and ``TAIKYOKU`` always come before the first
+``INIT`` node, so :func:`read_header` decompresses and reads the file only
+until the first ``INIT`` is found. Selecting games by lobby, table type or
+players with :class:`HeaderFilter` therefore costs a few kilobytes of I/O
+per file regardless of the length of the game.
+"""
+from __future__ import absolute_import
+
+import logging
+import xml.etree.ElementTree as ET
+
+from tenhou_log_utils.io import open_mjlog
+from tenhou_log_utils.parser import parse_node
+
+_LG = logging.getLogger(__name__)
+
+_INIT = b'<INIT'
+
+
+def _read_until_init(file_, chunk_size):
+    data = b''
+    while True:
+        chunk = file_.read(chunk_size)
+        if not chunk:
+            return data
+        # The tag can span two chunks.
+        start = max(0, len(data) - len(_INIT) + 1)
+        data += chunk
+        pos = data.find(_INIT, start)
+        if pos != -1:
+            return data[:pos]
+
+
+def read_header(filepath, chunk_size=4096):
+    """Parse meta data nodes of [gzipped] mjlog file
+
+    Parameters
+    ----------
+    filepath : str
+        Path to [gzipped] mjlog file.
+
+    chunk_size : int
+        Size of (decompressed) data read at a time.
+
+    Returns
+    -------
+    dict
+        Same as 'meta' of :func:`parse_mjlog`, except nodes of disconnection
+        before the first round.
+    """
+    with open_mjlog(filepath) as file_:
+        data = _read_until_init(file_, chunk_size)
+    end = data.rfind(b'</mjloggm')
+    if end != -1:
+        data = data[:end]
+    meta = {}
+    for node in ET.fromstring(data + b'</mjloggm>'):
+        if node.tag in ['SHUFFLE', 'GO', 'UN', 'TAIKYOKU']:
+            item = parse_node(node.tag, node.attrib)
+            meta[item['tag']] = item['data']
+    return meta
+
+
+class HeaderFilter(object):
+    """Predicate over game meta data
+
+    Conditions are the same as :meth:`tenhou_log_utils.index.GameIndex.query`.
+    Games must match all the given conditions.
+
+    Parameters
+    ----------
+    player : str
+        Name of a player who took part in the game.
+
+    min_rate, max_rate, min_dan : float, float, int
+        Bounds of rate and dan. When `player` is given, applied to the
+        player. Otherwise, applied to any player in the game.
+
+    table : str
+        Table type. ``'dan-i'``, ``'joukyu'``, ``'tokujou'``, ``'tenhou'``
+        or ``'test'``.
+
+    lobby : int
+        Lobby number.
+
+    ton_nan, sanma : bool
+        Hanchan (True) or tonpuu (False), sanma (True) or yonma (False).
+    """
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, player=None, min_rate=None, max_rate=None,
+                 min_dan=None, table=None, lobby=None, ton_nan=None,
+                 sanma=None):
+        # pylint: disable=too-many-arguments
+        self.player = player
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.min_dan = min_dan
+        self.table = table
+        self.lobby = lobby
+        self.ton_nan = ton_nan
+        self.sanma = sanma
+
+    def _match_player(self, player):
+        if self.player is not None and player['name'] != self.player:
+            return False
+        if self.min_rate is not None and player['rate'] < self.min_rate:
+            return False
+        if self.max_rate is not None and player['rate'] > self.max_rate:
+            return False
+        if self.min_dan is not None and player['dan'] < self.min_dan:
+            return False
+        return True
+
+    def _match_go(self, go_data):
+        config = go_data['config']
+        for expected, value in [
+                (self.table, go_data['table']),
+                (self.lobby, go_data['lobby']),
+                (self.ton_nan, config['ton-nan']),
+                (self.sanma, config['sanma'])]:
+            if expected is not None and expected != value:
+                return False
+        return True
+
+    @property
+    def needs_players(self):
+        """True if any condition on players is given"""
+        return any(value is not None for value in [
+            self.player, self.min_rate, self.max_rate, self.min_dan])
+
+    def __call__(self, meta):
+        """Test meta data returned by :func:`read_header`"""
+        if 'GO' not in meta or not self._match_go(meta['GO']):
+            return False
+        if self.needs_players:
+            return any(self._match_player(p) for p in meta.get('UN', []))
+        return True
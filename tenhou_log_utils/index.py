@@ -0,0 +1,264 @@
+"""SQLite index of game metadata
+
+:class:`GameIndex` keeps one row per game in ``games`` table, holding table
+type and config of ``GO``, round count and final scores, and one row per
+seat in ``players`` table, holding name, dan, rate and final score from
+``UN`` and ``owari``. Only meta data and the last round are decoded, using
+:func:`load_game`. Files are re-parsed only when their mtime or size
+changed since they were indexed, so refreshing the index of a large
+directory only touches new and modified files.
+"""
+from __future__ import absolute_import
+
+import os
+import sqlite3
+import logging
+
+from tenhou_log_utils.game import load_game
+
+_LG = logging.getLogger(__name__)
+
+_CONFIG_KEYS = ['red', 'kui', 'ton-nan', 'sanma', 'soku']
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    table_type TEXT,
+    lobby INTEGER,
+    red INTEGER,
+    kui INTEGER,
+    ton_nan INTEGER,
+    sanma INTEGER,
+    soku INTEGER,
+    n_rounds INTEGER
+);
+CREATE TABLE IF NOT EXISTS players (
+    path TEXT NOT NULL REFERENCES games(path) ON DELETE CASCADE,
+    seat INTEGER NOT NULL,
+    name TEXT,
+    dan INTEGER,
+    rate REAL,
+    score INTEGER,
+    PRIMARY KEY (path, seat)
+);
+CREATE INDEX IF NOT EXISTS players_name ON players(name);
+CREATE INDEX IF NOT EXISTS players_rate ON players(rate);
+CREATE INDEX IF NOT EXISTS games_table ON games(table_type, ton_nan, sanma);
+'''
+
+
+def extract_metadata(filepath):
+    """Parse mjlog file and extract metadata stored in index
+
+    Parameters
+    ----------
+    filepath : str
+        Path to [gzipped] mjlog file.
+
+    Returns
+    -------
+    dict
+        ``table``, ``lobby``, ``config`` (see :func:`parse_mjlog`),
+        ``n_rounds``, and ``players``, list of dicts with ``name``, ``dan``,
+        ``rate`` and ``score`` (None if the game did not finish).
+    """
+    game = load_game(filepath, cache=False)
+    meta = {'table': None, 'lobby': None, 'config': {}, 'n_rounds': len(game)}
+    meta.update(game.meta.get('GO', {}))
+    players = game.meta.get('UN', [])
+    result = game.result
+    scores = result['scores'] if result else []
+    meta['players'] = [
+        {
+            'name': player['name'],
+            'dan': player['dan'],
+            'rate': player['rate'],
+            'score': scores[seat] if seat < len(scores) else None,
+        } for seat, player in enumerate(players)
+    ]
+    return meta
+
+
+class GameIndex(object):
+    """SQLite index of game metadata
+
+    Parameters
+    ----------
+    path : str
+        Path to SQLite database file. Created if it does not exist.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    ###########################################################################
+    def find_stale(self, filepaths):
+        """Find files which are not indexed or changed since indexed
+
+        Parameters
+        ----------
+        filepaths : list of str
+            Absolute paths to mjlog files.
+
+        Returns
+        -------
+        list of tuple
+            ``(path, mtime, size)`` of files to (re-)index.
+        """
+        indexed = {
+            path: (mtime, size) for path, mtime, size
+            in self._conn.execute('SELECT path, mtime, size FROM games')
+        }
+        stale = []
+        for path in filepaths:
+            stat = os.stat(path)
+            if indexed.get(path) != (stat.st_mtime, stat.st_size):
+                stale.append((path, stat.st_mtime, stat.st_size))
+        return stale
+
+    def put(self, path, mtime, size, meta):
+        """Insert or replace the row of a game
+
+        Changes are not committed until :meth:`commit` is called.
+        """
+        config = meta['config']
+        self._conn.execute('DELETE FROM games WHERE path = ?', (path,))
+        self._conn.execute(
+            'INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [path, mtime, size, meta['table'], meta['lobby']] +
+            [config.get(key) for key in _CONFIG_KEYS] + [meta['n_rounds']])
+        self._conn.executemany(
+            'INSERT INTO players VALUES (?, ?, ?, ?, ?, ?)', [
+                (path, seat, player['name'], player['dan'], player['rate'],
+                 player['score'])
+                for seat, player in enumerate(meta['players'])
+            ])
+
+    def commit(self):
+        """Commit pending changes"""
+        self._conn.commit()
+
+    def prune(self):
+        """Remove rows of files which no longer exist
+
+        Returns
+        -------
+        int
+            The number of rows removed.
+        """
+        missing = [
+            (path,) for path, in self._conn.execute('SELECT path FROM games')
+            if not os.path.exists(path)
+        ]
+        self._conn.executemany('DELETE FROM games WHERE path = ?', missing)
+        self._conn.commit()
+        return len(missing)
+
+    def count(self):
+        """Get the number of indexed games"""
+        return self._conn.execute('SELECT COUNT(*) FROM games').fetchone()[0]
+
+    ###########################################################################
+    def query(self, player=None, min_rate=None, max_rate=None, min_dan=None,
+              table=None, lobby=None, ton_nan=None, sanma=None, limit=None):
+        """Find games matching all the given conditions
+
+        Parameters
+        ----------
+        player : str
+            Name of a player who took part in the game.
+
+        min_rate, max_rate, min_dan : float, float, int
+            Bounds of rate and dan. When `player` is given, applied to the
+            player. Otherwise, applied to any player in the game.
+
+        table : str
+            Table type. ``'dan-i'``, ``'joukyu'``, ``'tokujou'``,
+            ``'tenhou'`` or ``'test'``.
+
+        lobby : int
+            Lobby number.
+
+        ton_nan, sanma : bool
+            Hanchan (True) or tonpuu (False), sanma (True) or yonma (False).
+
+        limit : int
+            Maximum number of games returned.
+
+        Returns
+        -------
+        list of dict
+            Each dict has ``path``, ``table``, ``lobby``, ``ton-nan``,
+            ``sanma``, ``n_rounds`` and ``players``.
+        """
+        # pylint: disable=too-many-arguments
+        where, params = [], []
+        player_where, player_params = [], []
+        if player is not None:
+            player_where.append('p.name = ?')
+            player_params.append(player)
+        if min_rate is not None:
+            player_where.append('p.rate >= ?')
+            player_params.append(min_rate)
+        if max_rate is not None:
+            player_where.append('p.rate <= ?')
+            player_params.append(max_rate)
+        if min_dan is not None:
+            player_where.append('p.dan >= ?')
+            player_params.append(min_dan)
+        if player_where:
+            where.append(
+                'EXISTS (SELECT 1 FROM players p WHERE p.path = g.path AND {})'
+                .format(' AND '.join(player_where)))
+            params.extend(player_params)
+        for column, value in [
+                ('table_type', table), ('lobby', lobby),
+                ('ton_nan', ton_nan), ('sanma', sanma)]:
+            if value is not None:
+                where.append('g.{} = ?'.format(column))
+                params.append(value)
+        sql = 'SELECT path, table_type, lobby, ton_nan, sanma, n_rounds FROM games g'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY path'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        games = [
+            {
+                'path': path, 'table': table_, 'lobby': lobby_,
+                'ton-nan': bool(ton_nan_), 'sanma': bool(sanma_),
+                'n_rounds': n_rounds, 'players': [],
+            } for path, table_, lobby_, ton_nan_, sanma_, n_rounds
+            in self._conn.execute(sql, params)
+        ]
+        self._fill_players(games)
+        return games
+
+    def _fill_players(self, games):
+        by_path = {game['path']: game for game in games}
+        paths = list(by_path)
+        # Stay below SQLite's limit on the number of host parameters
+        for i in range(0, len(paths), 500):
+            chunk = paths[i:i + 500]
+            sql = (
+                'SELECT path, name, dan, rate, score FROM players '
+                'WHERE path IN ({}) ORDER BY path, seat'
+                .format(', '.join('?' * len(chunk))))
+            for path, name, dan, rate, score in self._conn.execute(sql, chunk):
+                by_path[path]['players'].append(
+                    {'name': name, 'dan': dan, 'rate': rate, 'score': score})
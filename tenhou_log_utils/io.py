@@ -1,7 +1,9 @@
 """Utility functions for I/O"""
 from __future__ import absolute_import
 
+import os
 import sys
+import glob
 import gzip
 import xml.etree.ElementTree as ET
 
@@ -11,6 +13,24 @@ def _load_gzipped(filepath):
         return ET.parse(file_).getroot()
 
 
+def open_mjlog(filepath):
+    """Open [gzipped] mjlog file as binary file object
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the mjlog file to open. Decompressed on the fly if the path
+        contains '.gz'.
+
+    Returns
+    -------
+    file object
+    """
+    if '.gz' in filepath:
+        return gzip.open(filepath)
+    return open(filepath, 'rb')
+
+
 def load_mjlog(filepath):
     """Load [gzipped] mjlog file
 
@@ -29,6 +49,94 @@ def load_mjlog(filepath):
     return ET.parse(filepath).getroot()
 
 
+def iter_mjlog_nodes(filepath):
+    """Iterate over child nodes of [gzipped] mjlog file without building tree
+
+    Unlike :func:`load_mjlog`, nodes are read incrementally and released as
+    soon as the next node is requested, so memory usage does not grow with
+    the size of the file.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the mjlog file to load
+
+    Yields
+    ------
+    tuple of str and dict
+        Tag name and attribute of each child node of the root node.
+    """
+    with open_mjlog(filepath) as file_:
+        root, depth = None, 0
+        for event, elem in ET.iterparse(file_, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                yield elem.tag, elem.attrib
+                # Detach processed nodes so that they can be garbage-collected
+                root.clear()
+
+
+def find_round_offsets(data):
+    """Find byte offsets of rounds in mjlog data with a plain byte scan
+
+    Parameters
+    ----------
+    data : bytes
+        Content of (decompressed) mjlog file.
+
+    Returns
+    -------
+    list of int
+        Offsets of ``<INIT`` nodes, followed by the offset of the closing
+        root tag. Data before the first offset are meta data nodes and the
+        slice between two consecutive offsets is a round.
+    """
+    offsets = []
+    pos = data.find(b'<INIT')
+    while pos != -1:
+        offsets.append(pos)
+        pos = data.find(b'<INIT', pos + 5)
+    end = data.rfind(b'</mjloggm')
+    offsets.append(len(data) if end == -1 else end)
+    return offsets
+
+
+def _is_mjlog(filepath):
+    return filepath.endswith('.mjlog') or filepath.endswith('.mjlog.gz')
+
+
+def find_mjlog_files(paths):
+    """List up mjlog files from directories, glob patterns and file paths
+
+    Parameters
+    ----------
+    paths : list of str
+        Directories are searched recursively for ``*.mjlog[.gz]`` files.
+        Other values are expanded as glob pattern.
+
+    Returns
+    -------
+    list of str
+        Sorted paths of mjlog files found. Duplicates are removed.
+    """
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.update(
+                    os.path.join(root, file_) for file_ in files
+                    if _is_mjlog(file_))
+        else:
+            found.update(
+                file_ for file_ in glob.glob(path) if os.path.isfile(file_))
+    return sorted(found)
+
+
 if sys.version_info[0] < 3:
     def ensure_unicode(string):
         """Convert string into unicode."""
@@ -0,0 +1,45 @@
+"""Write newline-delimited JSON (one compact object per line)
+
+``orjson`` is used for serialization when it is installed. Otherwise the
+standard ``json`` module is used. Both produce compact UTF-8 output.
+"""
+from __future__ import absolute_import
+
+import json
+import logging
+
+from tenhou_log_utils.io import ensure_unicode
+
+_LG = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    def dumps(obj):
+        """Serialize object into compact JSON bytes"""
+        return orjson.dumps(obj)
+else:
+    def dumps(obj):
+        """Serialize object into compact JSON bytes"""
+        text = json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+        return ensure_unicode(text).encode('utf-8')
+
+
+class NDJSONWriter(object):
+    """Write objects to binary file object, one line per object
+
+    Parameters
+    ----------
+    file_ : file object
+        Opened in binary mode.
+    """
+    def __init__(self, file_):
+        self._file = file_
+
+    def write(self, obj):
+        """Write an object as one line"""
+        self._file.write(dumps(obj) + b'\n')
@@ -2,11 +2,16 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import sys
 import logging
-from tenhou_log_utils.io import ensure_unicode, unquote
+from tenhou_log_utils.io import ensure_unicode, unquote, iter_mjlog_nodes
 
 _LG = logging.getLogger(__name__)
 
+# Increment when the structure of parsed result changes, so that results
+# cached by older versions are discarded.
+PARSER_VERSION = 1
+
 # TODO: Expose all parse_XX functions.
 
 
@@ -242,11 +247,11 @@ def _parse_kan(meld):
     return ([hai0] + h) if kui else h[:2]
 
 
-def _parse_call(attrib):
-    caller = int(attrib['who'])
-    meld = int(attrib['m'])
+CALL_TYPES = ['Chi', 'Pon', 'KaKan', 'MinKan', 'AnKan', 'Nuki']
+
+
+def _decode_meld(meld):
     callee_rel = meld & 0x3
-    _LG.debug('  Meld: %s', bin(meld))
     if meld & (1 << 2):
         mentsu = _parse_shuntsu(meld)
         type_ = 'Chi'
@@ -262,6 +267,80 @@ def _parse_call(attrib):
     else:
         type_ = 'MinKan' if callee_rel else 'AnKan'
         mentsu = _parse_kan(meld)
+    return type_, callee_rel, tuple(mentsu)
+
+
+# Decoded results of `m` attribute, filled on first lookup of each value.
+_MELD_TABLE = [None] * (1 << 16)
+
+
+def decode_meld(meld):
+    """Decode `m` attribute of call (N) node
+
+    Results are memoized in a table covering the whole 16-bit domain.
+
+    Parameters
+    ----------
+    meld : int
+        Value of `m` attribute.
+
+    Returns
+    -------
+    tuple
+        Call type (one of ``CALL_TYPES``), callee relative to caller, and
+        list of tiles in the mentsu.
+    """
+    entry = _MELD_TABLE[meld]
+    if entry is None:
+        entry = _MELD_TABLE[meld] = _decode_meld(meld)
+    type_, callee_rel, mentsu = entry
+    return type_, callee_rel, list(mentsu)
+
+
+_MELD_ARRAYS = None
+
+
+def _get_meld_arrays():
+    global _MELD_ARRAYS  # pylint: disable=global-statement
+    if _MELD_ARRAYS is None:
+        import numpy as np
+        types = np.empty(1 << 16, dtype=np.int8)
+        callees = np.empty(1 << 16, dtype=np.int8)
+        mentsu = np.full((1 << 16, 4), -1, dtype=np.int16)
+        for meld in range(1 << 16):
+            type_, callee_rel, tiles = decode_meld(meld)
+            types[meld] = CALL_TYPES.index(type_)
+            callees[meld] = callee_rel
+            mentsu[meld, :len(tiles)] = tiles
+        _MELD_ARRAYS = types, callees, mentsu
+    return _MELD_ARRAYS
+
+
+def decode_melds(melds):
+    """Decode many `m` attribute values at once with NumPy
+
+    Parameters
+    ----------
+    melds : array-like of int
+        Values of `m` attribute. Must be in range of [0, 65536).
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        Call types as index of ``CALL_TYPES``, callees relative to callers
+        and tiles of mentsu with shape ``(N, 4)``, padded with -1.
+    """
+    import numpy as np
+    melds = np.asarray(melds, dtype=np.int64)
+    types, callees, mentsu = _get_meld_arrays()
+    return types[melds], callees[melds], mentsu[melds]
+
+
+def _parse_call(attrib):
+    caller = int(attrib['who'])
+    meld = int(attrib['m'])
+    _LG.debug('  Meld: %s', bin(meld))
+    type_, callee_rel, mentsu = decode_meld(meld)
     callee_abs = (caller + callee_rel) % 4
     return {
         'caller': caller, 'callee': callee_abs,
@@ -364,11 +443,59 @@ def _parse_bye(attrib):
 
 
 ###############################################################################
-def _ensure_unicode(data):
-    return {
-        ensure_unicode(key): ensure_unicode(value)
-        for key, value in data.items()
-    }
+if sys.version_info[0] < 3:
+    def _ensure_unicode(data):
+        return {
+            ensure_unicode(key): ensure_unicode(value)
+            for key, value in data.items()
+        }
+else:
+    def _ensure_unicode(data):
+        # ElementTree gives `str` attributes on Python 3. No need to copy.
+        return data
+
+
+# Tag -> (output tag, parser of attribute)
+_NODE_PARSERS = {
+    'GO': ('GO', _parse_go),
+    'UN': ('UN', _parse_un),
+    'TAIKYOKU': ('TAIKYOKU', _parse_taikyoku),
+    'SHUFFLE': ('SHUFFLE', _parse_shuffle),
+    'INIT': ('INIT', _parse_init),
+    'DORA': ('DORA', _parse_dora),
+    'N': ('CALL', _parse_call),
+    'REACH': ('REACH', _parse_reach),
+    'AGARI': ('AGARI', _parse_agari),
+    'RYUUKYOKU': ('RYUUKYOKU', _parse_ryuukyoku),
+    'BYE': ('BYE', _parse_bye),
+}
+
+
+def _build_tile_tags():
+    tags = {}
+    for prefixes, tag in [('TUVW', 'DRAW'), ('DEFG', 'DISCARD')]:
+        for player, prefix in enumerate(prefixes):
+            for tile in range(136):
+                tags['{}{}'.format(prefix, tile)] = (tag, player, tile)
+    return tags
+
+
+# Draw/Discard tag such as 'T52' -> (output tag, player, tile)
+_TILE_TAGS = _build_tile_tags()
+
+
+def _parse_node(tag, attrib):
+    if tag in _NODE_PARSERS:
+        if tag == 'UN' and len(attrib) == 1:
+            # Disconnected player has returned
+            return 'RESUME', _parse_resume(attrib)
+        tag, parser = _NODE_PARSERS[tag]
+        return tag, parser(attrib)
+    if tag[0] in {'T', 'U', 'V', 'W'}:
+        return 'DRAW', _parse_draw(tag)
+    if tag[0] in {'D', 'E', 'F', 'G'}:
+        return 'DISCARD', _parse_discard(tag)
+    raise NotImplementedError('{}: {}'.format(tag, attrib))
 
 
 def parse_node(tag, attrib):
@@ -387,51 +514,188 @@ def parse_node(tag, attrib):
     dict
         JSON object
     """
-    attrib = _ensure_unicode(attrib)
-    _LG.debug('Input:  %s: %s', tag, attrib)
-    if tag == 'GO':
-        data = _parse_go(attrib)
-    elif tag == 'UN':
-        if len(attrib) == 1:  # Disconnected player has returned
-            data = _parse_resume(attrib)
-            tag = 'RESUME'
-        else:
-            data = _parse_un(attrib)
-    elif tag == 'TAIKYOKU':
-        data = _parse_taikyoku(attrib)
-    elif tag == 'SHUFFLE':
-        data = _parse_shuffle(attrib)
-    elif tag == 'INIT':
-        data = _parse_init(attrib)
-    elif tag == 'DORA':
-        data = _parse_dora(attrib)
-    elif tag[0] in {'T', 'U', 'V', 'W'}:
-        data = _parse_draw(tag)
-        tag = 'DRAW'
-    elif tag[0] in {'D', 'E', 'F', 'G'}:
-        data = _parse_discard(tag)
-        tag = 'DISCARD'
-    elif tag == 'N':
-        data = _parse_call(attrib)
-        tag = 'CALL'
-    elif tag == 'REACH':
-        data = _parse_reach(attrib)
-    elif tag == 'AGARI':
-        data = _parse_agari(attrib)
-    elif tag == 'RYUUKYOKU':
-        data = _parse_ryuukyoku(attrib)
-    elif tag == 'BYE':
-        data = _parse_bye(attrib)
+    tile_tag = _TILE_TAGS.get(tag)
+    if tile_tag is not None:
+        _LG.debug('Input:  %s: %s', tag, attrib)
+        tag, player, tile = tile_tag
+        data = {'player': player, 'tile': tile}
     else:
-        raise NotImplementedError('{}: {}'.format(tag, attrib))
+        attrib = _ensure_unicode(attrib)
+        _LG.debug('Input:  %s: %s', tag, attrib)
+        tag, data = _parse_node(tag, attrib)
     _LG.debug('Output: %s: %s', tag, data)
     return {'tag': tag, 'data': data}
 
 
 ###############################################################################
-def _validate_structure(parsed, meta, rounds):
+# Field projection
+_ABSENT = object()
+
+
+def _seed(index):
+    return lambda attrib: int(attrib['seed'].split(',')[index])
+
+
+def _list_of(key, type_=int, default=None):
+    if default is None:
+        return lambda attrib: _parse_str_list(attrib[key], type_=type_)
+    return lambda attrib: _parse_str_list(attrib.get(key, default), type_=type_)
+
+
+def _optional(key, parser):
+    return lambda attrib: parser(attrib[key]) if key in attrib else _ABSENT
+
+
+def _parse_loser(attrib):
+    from_who = int(attrib['fromWho'])
+    return _ABSENT if from_who == int(attrib['who']) else from_who
+
+
+_SC_FIELDS = {
+    'scores': lambda attrib: _parse_sc(attrib['sc'])[0],
+    'gains': lambda attrib: _parse_sc(attrib['sc'])[1],
+    'ba': lambda attrib: _parse_ba(attrib['ba']),
+    'result': _optional('owari', _parse_owari),
+}
+
+# Output tag -> field name -> parser of the field from attribute.
+# Parsers return `_ABSENT` for fields the full parser would omit.
+_FIELD_PARSERS = {
+    'INIT': {
+        'oya': lambda attrib: attrib['oya'],
+        'scores': lambda attrib: _parse_score(attrib['ten']),
+        'hands': lambda attrib: [
+            _parse_str_list(attrib[key], type_=int)
+            for key in ['hai0', 'hai1', 'hai2', 'hai3'] if key in attrib
+        ],
+        'round': _seed(0),
+        'combo': _seed(1),
+        'reach': _seed(2),
+        'dices': lambda attrib: _parse_str_list(attrib['seed'], int)[3:5],
+        'dora': _seed(5),
+    },
+    'CALL': {
+        'caller': lambda attrib: int(attrib['who']),
+        'callee': lambda attrib: (
+            int(attrib['who']) + (int(attrib['m']) & 0x3)) % 4,
+        'call_type': lambda attrib: decode_meld(int(attrib['m']))[0],
+        'mentsu': lambda attrib: decode_meld(int(attrib['m']))[2],
+    },
+    'REACH': {
+        'player': lambda attrib: int(attrib['who']),
+        'step': lambda attrib: int(attrib['step']),
+        'scores': _optional('ten', _parse_score),
+    },
+    'AGARI': dict(_SC_FIELDS, **{
+        'winner': lambda attrib: int(attrib['who']),
+        'loser': _parse_loser,
+        'hand': _list_of('hai'),
+        'machi': _list_of('machi'),
+        'dora': _list_of('doraHai'),
+        'ura_dora': _list_of('doraHaiUra', default=''),
+        'yaku': lambda attrib: _nest_list(
+            _parse_str_list(attrib.get('yaku'), type_=int)),
+        'yakuman': _list_of('yakuman', default=''),
+        'ten': lambda attrib: _parse_ten(attrib['ten']),
+    }),
+    'RYUUKYOKU': dict(_SC_FIELDS, **{
+        'hands': lambda attrib: [
+            _parse_str_list(attrib[key], type_=int) if key in attrib else None
+            for key in ['hai0', 'hai1', 'hai2', 'hai3']
+        ],
+        'reason': _optional('type', lambda val: val),
+    }),
+}
+
+_OUTPUT_TAGS = set(
+    [tag for tag, _ in _NODE_PARSERS.values()] + ['RESUME', 'DRAW', 'DISCARD'])
+
+
+def compile_fields(fields):
+    """Build projection from list of field names
+
+    Parameters
+    ----------
+    fields : list of str
+        Either tag name such as ``'GO'`` for all the fields of the tag, or
+        tag and field name joined with dot such as ``'AGARI.ten'``. Names
+        are the ones of parsed result, so calls are ``'CALL'``. Fields can
+        be selected for INIT, CALL, REACH, AGARI and RYUUKYOKU.
+
+    Returns
+    -------
+    dict
+        Output tag -> tuple of field names, or None for all fields. INIT is
+        always included so that rounds can be structured.
+    """
+    projection = {'INIT': ()}
+    for field in fields:
+        tag, _, name = field.partition('.')
+        if tag not in _OUTPUT_TAGS:
+            raise ValueError('Unknown tag: {}'.format(field))
+        if not name:
+            projection[tag] = None
+            continue
+        if name not in _FIELD_PARSERS.get(tag, {}):
+            raise ValueError('Unknown field: {}'.format(field))
+        if tag not in projection or projection[tag] is not None:
+            projection[tag] = projection.get(tag, ()) + (name,)
+    return projection
+
+
+def parse_node_fields(tag, attrib, projection):
+    """Parse only the requested fields of XML node
+
+    Parameters
+    ----------
+    tag : str
+        Tags such as 'GO', 'DORA', 'AGARI' etc...
+
+    attrib: dict
+        Attribute of the node
+
+    projection : dict
+        Result of :func:`compile_fields`
+
+    Returns
+    -------
+    dict or None
+        JSON object with the requested fields, or None if the tag is not
+        requested.
+    """
+    tile_tag = _TILE_TAGS.get(tag)
+    if tile_tag is not None:
+        output_tag, player, tile = tile_tag
+        if output_tag not in projection:
+            return None
+        return {'tag': output_tag, 'data': {'player': player, 'tile': tile}}
+    if tag not in _NODE_PARSERS:
+        # Fall back to full parser, which raises on unknown tags
+        node = parse_node(tag, attrib)
+        return node if node['tag'] in projection else None
+    if tag == 'UN' and len(attrib) == 1:
+        output_tag = 'RESUME'
+    else:
+        output_tag = _NODE_PARSERS[tag][0]
+    if output_tag not in projection:
+        return None
+    names = projection[output_tag]
+    if names is None:
+        return parse_node(tag, attrib)
+    attrib = _ensure_unicode(attrib)
+    parsers = _FIELD_PARSERS[output_tag]
+    data = {}
+    for name in names:
+        value = parsers[name](attrib)
+        if value is not _ABSENT:
+            data[name] = value
+    return {'tag': output_tag, 'data': data}
+
+
+###############################################################################
+def _validate_structure(n_parsed, meta, rounds):
     # Verfiy all the items are passed
-    if not len(parsed) == len(meta) + sum(len(r) for r in rounds):
+    if not n_parsed == len(meta) + sum(len(r) for r in rounds):
         raise AssertionError('Not all the items are structured.')
     # Verfiy all the rounds start with INIT tag
     for round_ in rounds:
@@ -440,13 +704,13 @@ def _validate_structure(parsed, meta, rounds):
             raise AssertionError('Round must start with INIT tag; %s' % tag)
 
 
-def _structure_parsed_result(parsed):
+def structure_parsed_result(parsed):
     """Add structure to parsed log data
 
     Parameters
     ----------
-    parsed : list of dict
-        Each item in list corresponds to an XML node in original mjlog file.
+    parsed : iterable of dict
+        Each item corresponds to an XML node in original mjlog file.
 
     Returns
     -------
@@ -456,9 +720,10 @@ def _structure_parsed_result(parsed):
         values. 'rounds' is a list of which items correspond to one round of
         game play.
     """
-    round_ = None
+    round_, n_parsed = None, 0
     game = {'meta': {}, 'rounds': []}
     for item in parsed:
+        n_parsed += 1
         tag, data = item['tag'], item['data']
         if tag in ['SHUFFLE', 'GO', 'UN', 'TAIKYOKU']:
             game['meta'][tag] = data
@@ -475,11 +740,16 @@ def _structure_parsed_result(parsed):
             round_.append(item)
     game['rounds'].append(round_)
 
-    _validate_structure(parsed, game['meta'], game['rounds'])
+    _validate_structure(n_parsed, game['meta'], game['rounds'])
     return game
 
 
-def parse_mjlog(root_node, tags=None):
+def _check_selection(tags, fields):
+    if tags is not None and fields is not None:
+        raise ValueError('`tags` and `fields` are mutually exclusive.')
+
+
+def parse_mjlog(root_node, tags=None, fields=None):
     """Convert mjlog XML node into JSON
 
     Parameters
@@ -491,15 +761,124 @@ def parse_mjlog(root_node, tags=None):
         When present, only the given tags are parsed and no post-processing
         is carried out.
 
+    fields : list of str
+        When present, only the given fields are parsed and nodes of other
+        tags are skipped. Rounds are still structured. See
+        :func:`compile_fields`. Mutually exclusive with `tags`.
+
     Returns
     -------
     dict
         Dictionary of of child nodes parsed.
     """
+    _check_selection(tags, fields)
+    if fields is not None:
+        projection = compile_fields(fields)
+        parsed = (
+            parse_node_fields(node.tag, node.attrib, projection)
+            for node in root_node)
+        return structure_parsed_result(
+            item for item in parsed if item is not None)
     parsed = []
     for node in root_node:
         if tags is None or node.tag in tags:
             parsed.append(parse_node(node.tag, node.attrib))
     if tags is None:
-        return _structure_parsed_result(parsed)
+        return structure_parsed_result(parsed)
     return parsed
+
+
+def iter_mjlog(filepath, tags=None, fields=None):
+    """Parse mjlog file node by node without loading the whole XML tree
+
+    Parameters
+    ----------
+    filepath : str
+        Path to [gzipped] mjlog file.
+
+    tags : list of str
+        When present, only the given tags are parsed.
+
+    fields : list of str
+        When present, only the given fields are parsed and nodes of other
+        tags are skipped. See :func:`compile_fields`.
+
+    Yields
+    ------
+    dict
+        Result of :func:`parse_node` for each child node.
+    """
+    _check_selection(tags, fields)
+    if fields is not None:
+        projection = compile_fields(fields)
+        for tag, attrib in iter_mjlog_nodes(filepath):
+            item = parse_node_fields(tag, attrib, projection)
+            if item is not None:
+                yield item
+        return
+    for tag, attrib in iter_mjlog_nodes(filepath):
+        if tags is None or tag in tags:
+            yield parse_node(tag, attrib)
+
+
+def iter_game(parsed):
+    """Group parsed nodes into meta data and rounds without buffering the game
+
+    Parameters
+    ----------
+    parsed : iterable of dict
+        Result of :func:`parse_node` for each node, such as the output of
+        :func:`iter_mjlog`.
+
+    Yields
+    ------
+    dict, then lists of dict
+        Meta data (once the first round starts), then each round.
+    """
+    meta, round_ = {}, None
+    for node in parsed:
+        tag = node['tag']
+        if tag == 'INIT':
+            if round_ is None:
+                yield meta
+            else:
+                yield round_
+            round_ = [node]
+        elif round_ is None:
+            meta[tag] = node['data']
+        else:
+            round_.append(node)
+    if round_ is None:
+        yield meta
+    else:
+        yield round_
+
+
+def parse_mjlog_file(filepath, tags=None, fields=None):
+    """Parse mjlog file into JSON using :func:`iter_mjlog`
+
+    Equivalent to ``parse_mjlog(load_mjlog(filepath), tags, fields)`` but
+    the XML tree is never materialized.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to [gzipped] mjlog file.
+
+    tags : list of str
+        When present, only the given tags are parsed and no post-processing
+        is carried out.
+
+    fields : list of str
+        When present, only the given fields are parsed. See
+        :func:`parse_mjlog`.
+
+    Returns
+    -------
+    dict or list
+        See :func:`parse_mjlog`.
+    """
+    parsed = iter_mjlog(filepath, tags=tags, fields=fields)
+    if tags is None:
+        return structure_parsed_result(parsed)
+    return list(parsed)
@@ -0,0 +1,246 @@
+"""Measure time spent in each stage of processing mjlog files
+
+:class:`Profiler` wraps the functions of each stage (reading, XML parsing,
+node parsing, structuring, rendering, ...) when it is installed, and
+restores them when uninstalled. Nothing is wrapped otherwise, so the
+functions run at full speed when profiling is not requested.
+
+Stages nest (for example, XML parsing reads the file), so the time of a
+stage excludes the time of the stages called from it. Time spent outside
+of any stage is reported as 'other'.
+
+Only the calling process is measured. Work done by worker processes of
+commands such as `parse-dir` shows up as time waiting in 'other'.
+"""
+from __future__ import absolute_import
+from __future__ import division
+
+import sys
+import json
+import time
+import logging
+import functools
+import collections
+
+from tenhou_log_utils import io, parser, game, cache, renderer, viewer, ndjson
+
+_LG = logging.getLogger(__name__)
+
+if sys.version_info[0] < 3:
+    _wall_time, _cpu_time = time.time, time.clock
+else:
+    _wall_time, _cpu_time = time.perf_counter, time.process_time
+
+
+class _TimedFile(object):
+    """Attribute `read` calls of file object to a stage"""
+    def __init__(self, file_, profiler, name):
+        self._file = file_
+        self._profiler = profiler
+        self._name = name
+
+    def read(self, *args):
+        """Read from the underlying file"""
+        self._profiler.enter(self._name)
+        try:
+            return self._file.read(*args)
+        finally:
+            self._profiler.exit()
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return self._file.__exit__(*args)
+
+
+class Profiler(object):
+    """Record wall/CPU time per stage and time of `parse_node` per tag
+
+    Use :meth:`install` to start recording and :meth:`uninstall` to stop.
+    """
+    def __init__(self):
+        self.stages = collections.OrderedDict()  # name -> [calls, wall, cpu]
+        self.tags = collections.OrderedDict()  # tag -> [count, wall]
+        # [name, wall start, cpu start, wall of children, cpu of children]
+        self._stack = []
+        self._patched = []
+
+    ###########################################################################
+    def enter(self, name):
+        """Start stage. Must be paired with :meth:`exit`"""
+        self._stack.append([name, _wall_time(), _cpu_time(), 0., 0.])
+
+    def exit(self):
+        """End the current stage. Returns inclusive wall time"""
+        wall, cpu = _wall_time(), _cpu_time()
+        name, wall0, cpu0, child_wall, child_cpu = self._stack.pop()
+        wall, cpu = wall - wall0, cpu - cpu0
+        stats = self.stages.setdefault(name, [0, 0., 0.])
+        stats[0] += 1
+        stats[1] += wall - child_wall
+        stats[2] += cpu - child_cpu
+        if self._stack:
+            self._stack[-1][3] += wall
+            self._stack[-1][4] += cpu
+        return wall
+
+    ###########################################################################
+    def _wrap_function(self, name, func):
+        @functools.wraps(func)
+        def _wrapped(*args, **kwargs):
+            self.enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.exit()
+        return _wrapped
+
+    def _wrap_generator(self, name, func):
+        @functools.wraps(func)
+        def _wrapped(*args, **kwargs):
+            iterator = iter(func(*args, **kwargs))
+            while True:
+                self.enter(name)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.exit()
+                yield item
+        return _wrapped
+
+    def _wrap_parse_node(self, func):
+        @functools.wraps(func)
+        def _wrapped(*args):
+            self.enter('parse_node')
+            try:
+                result = func(*args)
+            finally:
+                elapsed = self.exit()
+            if result is not None:
+                stats = self.tags.setdefault(result['tag'], [0, 0.])
+                stats[0] += 1
+                stats[1] += elapsed
+            return result
+        return _wrapped
+
+    def _wrap_open_mjlog(self, func):
+        @functools.wraps(func)
+        def _wrapped(filepath):
+            name = 'gunzip' if '.gz' in filepath else 'read'
+            return _TimedFile(func(filepath), self, name)
+        return _wrapped
+
+    def _load_mjlog(self, filepath):
+        with io.open_mjlog(filepath) as file_:
+            return io.ET.parse(file_).getroot()
+
+    ###########################################################################
+    def _replace(self, original, replacement):
+        # Replace all references, including the ones imported with
+        # `from ... import ...` in other modules of this package.
+        for module in list(sys.modules.values()):
+            name = getattr(module, '__name__', None) or ''
+            if not name.startswith('tenhou_log_utils'):
+                continue
+            for key, value in list(vars(module).items()):
+                if value is original:
+                    self._patched.append((module, key, original))
+                    setattr(module, key, replacement)
+
+    def _replace_method(self, class_, name, stage):
+        original = class_.__dict__[name]
+        self._patched.append((class_, name, original))
+        setattr(class_, name, self._wrap_function(stage, original))
+
+    def install(self):
+        """Wrap functions of each stage and start recording"""
+        if self._patched:
+            raise RuntimeError('Profiler is already installed.')
+        wrap, wrap_gen = self._wrap_function, self._wrap_generator
+        self._replace(io.open_mjlog, self._wrap_open_mjlog(io.open_mjlog))
+        self._replace(
+            io.load_mjlog,
+            functools.wraps(io.load_mjlog)(wrap('xml', self._load_mjlog)))
+        self._replace(io.iter_mjlog_nodes, wrap_gen('xml', io.iter_mjlog_nodes))
+        # pylint: disable=protected-access
+        self._replace(game._parse_nodes, wrap('xml', game._parse_nodes))
+        for func in [parser.parse_node, parser.parse_node_fields]:
+            self._replace(func, self._wrap_parse_node(func))
+        self._replace(
+            parser.structure_parsed_result,
+            wrap('structure', parser.structure_parsed_result))
+        self._replace(parser.iter_game, wrap_gen('structure', parser.iter_game))
+        for name in ['get', 'put']:
+            self._replace_method(cache.ParseCache, name, 'cache')
+        for name in ['render_meta', 'render_round']:
+            self._replace_method(renderer.Renderer, name, 'render')
+        self._replace(viewer.print_node, wrap('render', viewer.print_node))
+        self._replace_method(ndjson.NDJSONWriter, 'write', 'write')
+        self.enter('other')
+        return self
+
+    def uninstall(self):
+        """Restore the original functions and stop recording"""
+        if self._stack:
+            self.exit()
+        for owner, key, original in reversed(self._patched):
+            setattr(owner, key, original)
+        self._patched = []
+
+    ###########################################################################
+    def summary(self):
+        """Get recorded stats
+
+        Returns
+        -------
+        dict
+            'stages' maps stage name to 'calls', 'wall' and 'cpu' seconds,
+            'total' has total 'wall' and 'cpu' seconds, and 'tags' maps tag
+            of parsed node to 'count' and 'wall' seconds of `parse_node`.
+        """
+        stages = collections.OrderedDict()
+        for name, (calls, wall, cpu) in self.stages.items():
+            stages[name] = {'calls': calls, 'wall': wall, 'cpu': cpu}
+        tags = collections.OrderedDict()
+        for tag, (count, wall) in self.tags.items():
+            tags[tag] = {'count': count, 'wall': wall}
+        return {
+            'stages': stages,
+            'total': {
+                'wall': sum(stats[1] for stats in self.stages.values()),
+                'cpu': sum(stats[2] for stats in self.stages.values()),
+            },
+            'tags': tags,
+        }
+
+    def format_table(self):
+        """Format recorded stats as text table"""
+        summary = self.summary()
+        total = summary['total']['wall'] or 1.
+        lines = ['{:>12s}: {:>9s} {:>10s} {:>10s} {:>6s}'.format(
+            'Stage', 'Calls', 'Wall [s]', 'CPU [s]', 'Wall%')]
+        for name, stats in summary['stages'].items():
+            lines.append('{:>12s}: {:9d} {:10.4f} {:10.4f} {:6.1f}'.format(
+                name, stats['calls'], stats['wall'], stats['cpu'],
+                100 * stats['wall'] / total))
+        lines.append('{:>12s}: {:>9s} {:10.4f} {:10.4f}'.format(
+            'Total', '', summary['total']['wall'], summary['total']['cpu']))
+        if summary['tags']:
+            lines.append('')
+            lines.append('{:>12s}: {:>9s} {:>10s} {:>10s}'.format(
+                'Tag', 'Nodes', 'Wall [s]', 'ns/node'))
+            for tag, stats in summary['tags'].items():
+                lines.append('{:>12s}: {:9d} {:10.4f} {:10.1f}'.format(
+                    tag, stats['count'], stats['wall'],
+                    1e9 * stats['wall'] / stats['count']))
+        return '\n'.join(lines)
+
+    def format_json(self):
+        """Format recorded stats as JSON string"""
+        return json.dumps(self.summary(), indent=2)
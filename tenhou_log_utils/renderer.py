@@ -0,0 +1,259 @@
+"""Render parsed mjlog data as text without going through logging
+
+Produces the same text as :func:`tenhou_log_utils.viewer.print_node`, but
+lines are accumulated and written to a stream one round at a time, and tile
+strings are looked up from a precomputed table.
+"""
+from __future__ import division
+from __future__ import absolute_import
+
+import sys
+import logging
+
+from tenhou_log_utils.viewer import (
+    TILE_UNICODES, LIMIT_NAMES, YAKU_NAMES, RYUUKYOKU_REASONS)
+
+_LG = logging.getLogger(__name__)
+
+# String of each 136-tile ID
+TILE_STRINGS = [
+    u'{} {}'.format(TILE_UNICODES[tile // 4], tile % 4) for tile in range(136)
+]
+_FIELDS = ['Ton', 'Nan', 'Xia', 'Pei']
+
+
+def _hand(tiles):
+    return u' '.join([TILE_STRINGS[tile] for tile in tiles])
+
+
+###############################################################################
+def _render_shuffle(data, out):
+    out.append(u'Shuffle:')
+    out.append(u'  Seed: %s' % (data['seed'],))
+    out.append(u'  Ref: %s' % (data['ref'],))
+
+
+def _render_go(data, out):
+    out.append(u'Lobby%s:' % ('' if data['lobby'] < 0 else ' %s' % data['lobby']))
+    out.append(u'  Table: %s' % (data['table'],))
+    for key, value in data['config'].items():
+        out.append(u'    %s: %s' % (key, value))
+
+
+def _render_resume(data, out):
+    out.append(u'Player %s (%s) has returned to the game.' % (
+        data['index'], data['name']))
+
+
+def _render_un(data, out):
+    out.append(u'Players:')
+    out.append(u'  %5s: %3s, %8s, %3s, %s' % ('Index', 'Dan', 'Rate', 'Sex', 'Name'))
+    for i, datum in enumerate(data):
+        out.append(u'  %5s: %3s, %8.2f, %3s, %s' % (
+            i, datum['dan'], datum['rate'], datum['sex'], datum['name']))
+
+
+def _render_taikyoku(data, out):
+    out.append(u'Dealer: %s' % (data['oya'],))
+
+
+###############################################################################
+def _render_scores(scores, out):
+    for i, score in enumerate(scores):
+        out.append(u'  %6s: %6s' % (i, score))
+
+
+def _render_init(data, out):
+    field_ = data['round'] // 4
+    repeat = field_ // 4
+    round_ = data['round'] % 4 + 1
+    field = _FIELDS[field_ % 4]
+    out.append(u'Initial Game State:')
+    if repeat:
+        out.append(u'  Round: %s %s %s Kyoku' % (repeat, field, round_))
+    else:
+        out.append(u'  Round: %s %s Kyoku' % (field, round_))
+    out.append(u'  Combo: %s' % (data['combo'],))
+    out.append(u'  Reach: %s' % (data['reach'],))
+    out.append(u'  Dice 1: %s' % (data['dices'][0],))
+    out.append(u'  Dice 2: %s' % (data['dices'][1],))
+    out.append(u'  Dora Indicator: %s' % (TILE_STRINGS[data['dora']],))
+    out.append(u'  Initial Scores:')
+    _render_scores(data['scores'], out)
+    out.append(u'  Dealer: %s' % (data['oya'],))
+    out.append(u'  Initial Hands:')
+    for i, hand in enumerate(data['hands']):
+        out.append(u'  %5s: %s' % (i, _hand(sorted(hand))))
+
+
+def _render_draw(data, out):
+    out.append(u'Player %s: Draw    %s' % (data['player'], TILE_STRINGS[data['tile']]))
+
+
+def _render_discard(data, out):
+    out.append(u'Player %s: Discard %s' % (data['player'], TILE_STRINGS[data['tile']]))
+
+
+def _render_call(data, out):
+    caller, callee, call_type = data['caller'], data['callee'], data['call_type']
+    tiles = u''.join([TILE_STRINGS[tile] for tile in data['mentsu']])
+    if call_type == 'KaKan' or caller == callee:
+        from_ = u''
+    else:
+        from_ = u' from player {}'.format(callee)
+    out.append(u'Player %s: %s%s: %s' % (caller, call_type, from_, tiles))
+
+
+def _render_reach(data, out):
+    if data['step'] == 1:
+        out.append(u'Player %s: Reach' % (data['player'],))
+    elif data['step'] == 2:
+        out.append(u'Player %s made deposite.' % (data['player'],))
+        if 'scores' in data:
+            out.append(u'New scores:')
+            _render_scores(data['scores'], out)
+    else:
+        raise NotImplementedError('Unexpected step value: {}'.format(data))
+
+
+###############################################################################
+def _render_ba(ba, out):
+    out.append(u'  Ten-bou:')
+    out.append(u'    Combo: %s' % (ba['combo'],))
+    out.append(u'    Reach: %s' % (ba['reach'],))
+
+
+def _render_result(result, out):
+    out.append(u'  Result:')
+    for score, uma in zip(result['scores'], result['uma']):
+        out.append(u'    %6s: %6s' % (score, uma))
+
+
+def _render_gains(data, out):
+    out.append(u'  Scores:')
+    for cur, gain in zip(data['scores'], data['gains']):
+        out.append(u'    %6s: %6s' % (cur, gain))
+
+
+def _render_agari(data, out):
+    out.append(u'Player %s wins.' % (data['winner'],))
+    if 'loser' in data:
+        out.append(u'  Ron from player %s' % (data['loser'],))
+    else:
+        out.append(u'  Tsumo.')
+    out.append(u'  Hand: %s' % (_hand(sorted(data['hand'])),))
+    out.append(u'  Machi: %s' % (_hand(data['machi']),))
+    out.append(u'  Dora Indicator: %s' % (_hand(data['dora']),))
+    if data['ura_dora']:
+        out.append(u'  Ura Dora: %s' % (_hand(data['ura_dora']),))
+    out.append(u'  Yaku:')
+    for yaku, han in data['yaku']:
+        out.append(u'      %-20s (%2d): %2d [Han]' % (YAKU_NAMES[yaku], yaku, han))
+    for yaku in data['yakuman']:
+        out.append(u'      %s (%s)' % (YAKU_NAMES[yaku], yaku))
+    out.append(u'  Fu: %s' % (data['ten']['fu'],))
+    out.append(u'  Score: %s' % (data['ten']['point'],))
+    if data['ten']['limit']:
+        out.append(u'    - %s' % (LIMIT_NAMES[data['ten']['limit']],))
+    _render_ba(data['ba'], out)
+    _render_gains(data, out)
+    if 'result' in data:
+        _render_result(data['result'], out)
+
+
+def _render_dora(data, out):
+    out.append(u'New Dora Indicator: %s' % (TILE_STRINGS[data['hai']],))
+
+
+def _render_ryuukyoku(data, out):
+    out.append(u'Ryukyoku:')
+    if 'reason' in data:
+        out.append(u'  Reason: %s' % (RYUUKYOKU_REASONS[data['reason']],))
+    for i, hand in enumerate(data['hands']):
+        if hand is not None:
+            out.append(u'Player %s: %s' % (i, _hand(sorted(hand))))
+    _render_gains(data, out)
+    _render_ba(data['ba'], out)
+    if 'result' in data:
+        _render_result(data['result'], out)
+
+
+def _render_bye(data, out):
+    out.append(u'Player %s has left the game.' % (data['index'],))
+
+
+_RENDERERS = {
+    'SHUFFLE': _render_shuffle,
+    'GO': _render_go,
+    'UN': _render_un,
+    'TAIKYOKU': _render_taikyoku,
+    'INIT': _render_init,
+    'DORA': _render_dora,
+    'DRAW': _render_draw,
+    'DISCARD': _render_discard,
+    'CALL': _render_call,
+    'REACH': _render_reach,
+    'AGARI': _render_agari,
+    'RYUUKYOKU': _render_ryuukyoku,
+    'BYE': _render_bye,
+    'RESUME': _render_resume,
+}
+
+
+###############################################################################
+def render_node(tag, data, out):
+    """Render parsed node as lines of text
+
+    Parameters
+    ----------
+    tag : str
+        Tags such as 'GO', 'DORA', 'AGARI' etc...
+
+    data: dict
+        Parsed info of the node
+
+    out : list of str
+        Rendered lines (without line break) are appended to this list.
+    """
+    renderer = _RENDERERS.get(tag)
+    if renderer is None:
+        raise NotImplementedError('{}: {}'.format(tag, data))
+    renderer(data, out)
+
+
+class Renderer(object):
+    """Render meta data and rounds into text stream
+
+    Output is identical to what :func:`tenhou_log_utils.viewer.print_node`
+    logs with the default log format.
+
+    Parameters
+    ----------
+    stream : file object
+        Text stream to write to. Defaults to ``sys.stdout``.
+    """
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def _write(self, lines):
+        lines.append(u'')
+        self.stream.write(u'\n'.join(lines))
+
+    def render_meta(self, meta):
+        """Render meta data of game. See 'meta' of :func:`parse_mjlog`"""
+        lines = []
+        for tag in ['SHUFFLE', 'GO', 'UN', 'TAIKYOKU']:
+            if tag in meta:
+                render_node(tag, meta[tag], lines)
+        self._write(lines)
+
+    def render_round(self, round_):
+        """Render a round, preceded by separator line"""
+        lines = [u'=' * 40]
+        for node in round_:
+            render_node(node['tag'], node['data'], lines)
+        self._write(lines)
+
+    def flush(self):
+        """Flush the underlying stream"""
+        self.stream.flush()
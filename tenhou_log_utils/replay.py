@@ -0,0 +1,326 @@
+"""Reconstruct game state (hands, kawa, melds, dora, riichi and scores)
+
+:class:`GameState` holds the state of a round in fixed-size NumPy arrays,
+which are updated in place by :meth:`GameState.apply` for each event
+produced by :func:`parse_node`. :class:`Replay` drives it over rounds of a
+game parsed with :func:`parse_mjlog`, keeping snapshots every N events so
+that the state at an arbitrary event can be restored without replaying the
+round from INIT.
+"""
+from __future__ import absolute_import
+
+import logging
+
+import numpy as np
+
+from tenhou_log_utils.parser import CALL_TYPES
+
+_LG = logging.getLogger(__name__)
+
+MAX_DISCARDS = 32
+MAX_MELDS = 4
+MAX_DORA = 5
+
+# Bit flags of `GameState.discard_flags`
+TSUMOGIRI = 0x01  # Discarded the tile just drawn
+RIICHI = 0x02  # Discarded when declaring riichi
+CALLED = 0x04  # Called by other player
+
+
+class GameState(object):
+    """State of a round
+
+    Attributes
+    ----------
+    hand_tiles : numpy.ndarray
+        bool array of shape (4, 136). Tiles (ID) each player holds.
+    hands : numpy.ndarray
+        uint8 array of shape (4, 34). The number of tiles of each kind each
+        player holds in concealed hand.
+    discards : numpy.ndarray
+        int16 array of shape (4, MAX_DISCARDS). Discarded tiles (ID) in
+        order, padded with -1.
+    discard_flags : numpy.ndarray
+        uint8 array of shape (4, MAX_DISCARDS). Combination of TSUMOGIRI,
+        RIICHI and CALLED flags.
+    n_discards : numpy.ndarray
+        int8 array of shape (4,).
+    melds : numpy.ndarray
+        int16 array of shape (4, MAX_MELDS, 4). Tiles of open/closed melds,
+        padded with -1.
+    meld_types : numpy.ndarray
+        int8 array of shape (4, MAX_MELDS). Index of ``CALL_TYPES``.
+    n_melds : numpy.ndarray
+        int8 array of shape (4,).
+    n_nuki : numpy.ndarray
+        int8 array of shape (4,). The number of North tiles extracted (Sanma)
+    dora : numpy.ndarray
+        int16 array of shape (MAX_DORA,). Dora indicators, padded with -1.
+    n_dora : int
+    riichi : numpy.ndarray
+        int8 array of shape (4,). 0: not declared, 1: declared, 2: accepted.
+    scores : numpy.ndarray
+        int32 array of shape (4,).
+    round, combo, deposits, oya : int
+        Round number (0: East 1), honba, riichi sticks on table and dealer.
+    last_player, last_tile : int
+        Player and tile of the last draw/discard. -1 before the first one.
+    """
+    _ARRAYS = [
+        'hand_tiles', 'hands', 'discards', 'discard_flags', 'n_discards',
+        'melds', 'meld_types', 'n_melds', 'n_nuki', 'dora', 'riichi',
+        'scores',
+    ]
+    _SCALARS = [
+        'n_dora', 'round', 'combo', 'deposits', 'oya',
+        'last_player', 'last_tile', '_pending_riichi',
+    ]
+
+    def __init__(self):
+        self.hand_tiles = np.empty((4, 136), dtype=np.bool_)
+        self.hands = np.empty((4, 34), dtype=np.uint8)
+        self.discards = np.empty((4, MAX_DISCARDS), dtype=np.int16)
+        self.discard_flags = np.empty((4, MAX_DISCARDS), dtype=np.uint8)
+        self.n_discards = np.empty(4, dtype=np.int8)
+        self.melds = np.empty((4, MAX_MELDS, 4), dtype=np.int16)
+        self.meld_types = np.empty((4, MAX_MELDS), dtype=np.int8)
+        self.n_melds = np.empty(4, dtype=np.int8)
+        self.n_nuki = np.empty(4, dtype=np.int8)
+        self.dora = np.empty(MAX_DORA, dtype=np.int16)
+        self.riichi = np.empty(4, dtype=np.int8)
+        self.scores = np.empty(4, dtype=np.int32)
+        self._reset()
+
+    def _reset(self):
+        # Clear in place so that arrays are not reallocated at each INIT
+        for name in ['discards', 'melds', 'meld_types', 'dora']:
+            getattr(self, name).fill(-1)
+        for name in [
+                'hand_tiles', 'hands', 'discard_flags', 'n_discards',
+                'n_melds', 'n_nuki', 'riichi', 'scores']:
+            getattr(self, name).fill(0)
+        self.n_dora = 0
+        self.round = self.combo = self.deposits = self.oya = 0
+        self.last_player = self.last_tile = -1
+        self._pending_riichi = -1
+
+    def copy(self):
+        """Create a deep copy of the state"""
+        state = GameState.__new__(GameState)
+        for name in self._ARRAYS:
+            setattr(state, name, getattr(self, name).copy())
+        for name in self._SCALARS:
+            setattr(state, name, getattr(self, name))
+        return state
+
+    ###########################################################################
+    def _add_tile(self, player, tile):
+        self.hand_tiles[player, tile] = True
+        self.hands[player, tile // 4] += 1
+
+    def _remove_tile(self, player, tile):
+        if not self.hand_tiles[player, tile]:
+            raise ValueError(
+                'Player {} does not have tile {}.'.format(player, tile))
+        self.hand_tiles[player, tile] = False
+        self.hands[player, tile // 4] -= 1
+
+    def _add_meld(self, player, type_, tiles):
+        index = self.n_melds[player]
+        self.melds[player, index, :len(tiles)] = tiles
+        self.meld_types[player, index] = CALL_TYPES.index(type_)
+        self.n_melds[player] += 1
+
+    ###########################################################################
+    def _init(self, data):
+        self._reset()
+        for player, hand in enumerate(data['hands']):
+            for tile in hand:
+                self._add_tile(player, tile)
+        self.scores[:len(data['scores'])] = data['scores']
+        self.dora[0] = data['dora']
+        self.n_dora = 1
+        self.round = data['round']
+        self.combo = data['combo']
+        self.deposits = data['reach']
+        self.oya = int(data['oya'])
+
+    def _draw(self, data):
+        player, tile = data['player'], data['tile']
+        self._add_tile(player, tile)
+        self.last_player, self.last_tile = player, tile
+
+    def _discard(self, data):
+        player, tile = data['player'], data['tile']
+        self._remove_tile(player, tile)
+        flag = 0
+        if self.last_player == player and self.last_tile == tile:
+            flag |= TSUMOGIRI
+        if self._pending_riichi == player:
+            flag |= RIICHI
+            self._pending_riichi = -1
+        index = self.n_discards[player]
+        self.discards[player, index] = tile
+        self.discard_flags[player, index] = flag
+        self.n_discards[player] += 1
+        self.last_player, self.last_tile = player, tile
+
+    def _call(self, data):
+        caller, callee = data['caller'], data['callee']
+        type_, mentsu = data['call_type'], data['mentsu']
+        if type_ in ['Chi', 'Pon', 'MinKan']:
+            # Called tile is the last discard of callee
+            called = self.discards[callee, self.n_discards[callee] - 1]
+            self.discard_flags[callee, self.n_discards[callee] - 1] |= CALLED
+            for tile in mentsu:
+                if tile != called:
+                    self._remove_tile(caller, tile)
+            self._add_meld(caller, type_, mentsu)
+        elif type_ == 'AnKan':
+            # `mentsu` of AnKan only contains two tiles. Use all four.
+            base = mentsu[0] // 4 * 4
+            tiles = list(range(base, base + 4))
+            for tile in tiles:
+                self._remove_tile(caller, tile)
+            self._add_meld(caller, type_, tiles)
+        elif type_ == 'KaKan':
+            kind = mentsu[0] // 4
+            added = [t for t in mentsu if self.hand_tiles[caller, t]][0]
+            self._remove_tile(caller, added)
+            pon = CALL_TYPES.index('Pon')
+            for index in range(self.n_melds[caller]):
+                if (self.meld_types[caller, index] == pon and
+                        self.melds[caller, index, 0] // 4 == kind):
+                    self.melds[caller, index, :] = mentsu
+                    self.meld_types[caller, index] = CALL_TYPES.index(type_)
+                    break
+            else:
+                raise ValueError('Pon for KaKan not found: {}'.format(data))
+        elif type_ == 'Nuki':
+            self._remove_tile(caller, mentsu[0])
+            self.n_nuki[caller] += 1
+        self.last_player, self.last_tile = caller, -1
+
+    def _reach(self, data):
+        player = data['player']
+        if data['step'] == 1:
+            self.riichi[player] = 1
+            self._pending_riichi = player
+        else:
+            self.riichi[player] = 2
+            self.deposits += 1
+            if 'scores' in data:
+                self.scores[:len(data['scores'])] = data['scores']
+            else:
+                self.scores[player] -= 1000
+
+    def _dora(self, data):
+        self.dora[self.n_dora] = data['hai']
+        self.n_dora += 1
+
+    def _settle(self, data):
+        scores = [s + g for s, g in zip(data['scores'], data['gains'])]
+        self.scores[:len(scores)] = scores
+
+    def _agari(self, data):
+        self._settle(data)
+        self.deposits = 0
+
+    def apply(self, tag, data):
+        """Update state in place with a parsed event
+
+        Parameters
+        ----------
+        tag : str
+            Tag of the event, such as 'INIT', 'DRAW', 'CALL'.
+
+        data : dict
+            Parsed data of the event. See :func:`parse_node`.
+        """
+        handler = _HANDLERS.get(tag)
+        if handler is not None:
+            handler(self, data)
+
+
+_HANDLERS = {
+    # pylint: disable=protected-access
+    'INIT': GameState._init,
+    'DRAW': GameState._draw,
+    'DISCARD': GameState._discard,
+    'CALL': GameState._call,
+    'REACH': GameState._reach,
+    'DORA': GameState._dora,
+    'AGARI': GameState._agari,
+    'RYUUKYOKU': GameState._settle,
+}
+
+
+###############################################################################
+class Replay(object):
+    """Replay rounds of a game with periodic snapshots
+
+    Parameters
+    ----------
+    game : dict
+        Game parsed with :func:`parse_mjlog`.
+
+    interval : int
+        Snapshot is taken every `interval` events when a round is replayed
+        for the first time. :meth:`state_at` then replays at most
+        `interval - 1` events from the nearest snapshot.
+    """
+    def __init__(self, game, interval=16):
+        self.rounds = game['rounds']
+        self.interval = interval
+        self._snapshots = {}
+
+    def iter_states(self, round_):
+        """Replay a round, yielding event and state after the event
+
+        The same state object is updated in place and yielded, so copy it
+        with :meth:`GameState.copy` to keep it.
+
+        Yields
+        ------
+        tuple of dict and GameState
+        """
+        state = GameState()
+        for item in self.rounds[round_]:
+            state.apply(item['tag'], item['data'])
+            yield item, state
+
+    def _get_snapshots(self, round_):
+        if round_ not in self._snapshots:
+            snapshots = []
+            for i, (_, state) in enumerate(self.iter_states(round_)):
+                if i % self.interval == 0:
+                    snapshots.append(state.copy())
+            self._snapshots[round_] = snapshots
+        return self._snapshots[round_]
+
+    def state_at(self, round_, event):
+        """Get the state right after the given event was applied
+
+        Parameters
+        ----------
+        round_ : int
+            Index of the round.
+
+        event : int
+            Index of the event in the round. 0 corresponds to INIT.
+
+        Returns
+        -------
+        GameState
+            A new state object, which can be modified freely.
+        """
+        events = self.rounds[round_]
+        if event < 0:
+            event += len(events)
+        if not 0 <= event < len(events):
+            raise IndexError('Event index out of range: {}'.format(event))
+        base = event // self.interval
+        state = self._get_snapshots(round_)[base].copy()
+        for item in events[base * self.interval + 1:event + 1]:
+            state.apply(item['tag'], item['data'])
+        return state
@@ -0,0 +1,317 @@
+"""Shanten, tenpai and ukeire calculation over 34-tile count arrays
+
+A hand is represented as an array of 34 counts in the order of
+man (0-8), pin (9-17), sou (18-26) and honors (27-33), which is
+``tile // 4`` of 136-tile IDs used in mjlog.
+
+Standard form shanten is computed from precomputed per-suit tables. For
+each arrangement of counts in a suit, the table holds the minimum number of
+tiles to add so that the suit contains `k` blocks (sequence or triplet)
+without / with a pair. Tables of suits are combined with min-plus
+convolution, which is vectorized over many hands with NumPy, so no
+per-hand search is involved. Tables are built once on first use.
+
+Since the tables never require a fifth copy of a tile, a hand waiting only
+on tiles it holds all four of is not counted as tenpai.
+"""
+from __future__ import absolute_import
+from __future__ import division
+
+import itertools
+import logging
+
+import numpy as np
+
+_LG = logging.getLogger(__name__)
+
+_INF = 99
+# Terminal and honor kinds used by Kokushi
+_YAOCHU = [0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33]
+_SUIT_SLICES = [slice(0, 9), slice(9, 18), slice(18, 27)]
+_HONOR_SLICE = slice(27, 34)
+
+
+###############################################################################
+# DP states: (a, b, k, q) = (the number of sequences started at the previous
+# position, the number of those started two positions before, the number of
+# blocks, the number of pairs). Pending sequences are counted as blocks.
+_STATES = [
+    (a, b, k, q)
+    for k in range(5) for a in range(k + 1) for b in range(k + 1 - a)
+    for q in range(2)
+]
+_STATE_INDEX = {state: i for i, state in enumerate(_STATES)}
+
+
+def _build_table(length, sequence, max_tiles=14):
+    """Build table of shape (5 ** length, 5, 2) with min-plus DP
+
+    DP runs along positions of the suit, and the cost is the number of
+    missing tiles. Patterns sharing prefix share DP values, so DP is carried
+    out on prefixes of increasing length. Patterns with more than
+    `max_tiles` tiles are skipped and left as _INF.
+    """
+    # pylint: disable=too-many-locals
+    keys = np.zeros(1, dtype=np.int64)
+    totals = np.zeros(1, dtype=np.int64)
+    dp = np.full((1, len(_STATES)), _INF, dtype=np.uint8)
+    dp[0, _STATE_INDEX[0, 0, 0, 0]] = 0
+    for pos in range(length):
+        # Child prefixes (`key + digit * 5 ** pos`) and their parents
+        digits = np.repeat(np.arange(5), len(keys))
+        parents = np.tile(np.arange(len(keys)), 5)
+        keep = totals[parents] + digits <= max_tiles
+        digits, parents = digits[keep], parents[keep]
+        keys = keys[parents] + digits * 5 ** pos
+        totals = totals[parents] + digits
+        costs = [np.maximum(r - digits, 0).astype(np.uint8) for r in range(5)]
+        new = np.full((len(keys), len(_STATES)), _INF, dtype=np.uint8)
+        max_s = 4 if sequence and pos <= length - 3 else 0
+        for (a, b, k, q), src in _STATE_INDEX.items():
+            prev = dp[:, src]
+            if prev.min() >= _INF:
+                continue
+            prev = prev[parents]
+            for s, t, p in itertools.product(
+                    range(max_s + 1), range(2), range(2 - q)):
+                r = a + b + s + 3 * t + 2 * p
+                if r > 4 or k + s + t > 4:
+                    continue
+                dst = _STATE_INDEX[s, a, k + s + t, q + p]
+                np.minimum(new[:, dst], prev + costs[r], out=new[:, dst])
+        dp = new
+    table = np.full((5 ** length, 5, 2), _INF, dtype=np.uint8)
+    for k, q in itertools.product(range(5), range(2)):
+        # Sequences must be complete at the end
+        table[keys, k, q] = dp[:, _STATE_INDEX[0, 0, k, q]]
+    return table
+
+
+_TABLES = {}
+
+
+def _get_tables():
+    if not _TABLES:
+        _LG.debug('Building shanten tables.')
+        _TABLES['suit'] = _build_table(9, sequence=True)
+        _TABLES['honor'] = _build_table(7, sequence=False)
+    return _TABLES['suit'], _TABLES['honor']
+
+
+###############################################################################
+_KEYS_9 = 5 ** np.arange(9, dtype=np.int64)
+_KEYS_7 = 5 ** np.arange(7, dtype=np.int64)
+
+
+def _min_plus(lhs, rhs):
+    """Min-plus convolution of arrays of shape (N, 5, 2)"""
+    out = np.full_like(lhs, _INF)
+    for k1, q1, k2, q2 in itertools.product(range(5), range(2), range(5), range(2)):
+        if k1 + k2 > 4 or q1 + q2 > 1:
+            continue
+        dst = out[:, k1 + k2, q1 + q2]
+        np.minimum(dst, lhs[:, k1, q1] + rhs[:, k2, q2], out=dst)
+    return out
+
+
+def _as_hands(hands):
+    hands = np.asarray(hands, dtype=np.int64)
+    if hands.ndim != 2 or hands.shape[1] != 34:
+        raise ValueError(
+            'Hands must be shape of (N, 34). Found: {}'.format(hands.shape))
+    if hands.size and (hands.min() < 0 or hands.max() > 4):
+        raise ValueError('Tile counts must be in [0, 4].')
+    return hands
+
+
+def _infer_melds(hands, n_melds):
+    n_tiles = hands.sum(axis=1)
+    if n_melds is None:
+        melds = (14 - n_tiles) // 3
+    else:
+        melds = np.broadcast_to(
+            np.asarray(n_melds, dtype=np.int64), (len(hands),))
+    invalid = (melds < 0) | (melds > 4) | (n_tiles + 3 * melds > 14)
+    if invalid.any():
+        index = np.nonzero(invalid)[0][0]
+        raise ValueError(
+            'Hands must have at most 14 tiles including 0-4 melds. '
+            'Found: {} tiles and {} melds.'.format(
+                n_tiles[index], melds[index]))
+    return melds
+
+
+def standard_shanten(hands, n_melds=None):
+    """Compute shanten of standard form (4 blocks and a pair) in bulk
+
+    Parameters
+    ----------
+    hands : array-like
+        Tile counts of concealed hands. Shape: (N, 34)
+
+    n_melds : int or array-like
+        The number of melds (called or kan) of each hand. Inferred from the
+        number of tiles when omitted.
+
+    Returns
+    -------
+    numpy.ndarray
+        int8 array of shape (N,). -1 means the hand is complete.
+    """
+    hands = _as_hands(hands)
+    suit, honor = _get_tables()
+    values = honor[hands[:, _HONOR_SLICE].dot(_KEYS_7)].astype(np.int16)
+    for slice_ in _SUIT_SLICES:
+        values = _min_plus(
+            values, suit[hands[:, slice_].dot(_KEYS_9)].astype(np.int16))
+    blocks = 4 - _infer_melds(hands, n_melds)
+    return (values[np.arange(len(hands)), blocks, 1] - 1).astype(np.int8)
+
+
+def chiitoitsu_shanten(hands):
+    """Compute shanten of Chii-toitsu (seven pairs) form in bulk
+
+    Parameters
+    ----------
+    hands : array-like
+        Tile counts of concealed hands. Shape: (N, 34)
+
+    Returns
+    -------
+    numpy.ndarray
+        int8 array of shape (N,).
+    """
+    hands = _as_hands(hands)
+    pairs = (hands >= 2).sum(axis=1)
+    kinds = (hands >= 1).sum(axis=1)
+    return (6 - pairs + np.maximum(7 - kinds, 0)).astype(np.int8)
+
+
+def kokushi_shanten(hands):
+    """Compute shanten of Kokushi-musou (thirteen orphans) form in bulk
+
+    Parameters
+    ----------
+    hands : array-like
+        Tile counts of concealed hands. Shape: (N, 34)
+
+    Returns
+    -------
+    numpy.ndarray
+        int8 array of shape (N,).
+    """
+    hands = _as_hands(hands)[:, _YAOCHU]
+    kinds = (hands >= 1).sum(axis=1)
+    pair = (hands >= 2).any(axis=1)
+    return (13 - kinds - pair).astype(np.int8)
+
+
+def shanten_batch(hands, n_melds=None):
+    """Compute shanten of many hands, taking minimum of all the forms
+
+    Chii-toitsu and Kokushi-musou are only considered for hands without
+    melds.
+
+    Parameters
+    ----------
+    hands : array-like
+        Tile counts of concealed hands. Shape: (N, 34)
+
+    n_melds : int or array-like
+        The number of melds of each hand. Inferred from the number of tiles
+        when omitted.
+
+    Returns
+    -------
+    numpy.ndarray
+        int8 array of shape (N,). -1 means the hand is complete and
+        0 means tenpai.
+    """
+    hands = _as_hands(hands)
+    melds = _infer_melds(hands, n_melds)
+    result = standard_shanten(hands, melds)
+    closed = melds == 0
+    others = np.minimum(chiitoitsu_shanten(hands), kokushi_shanten(hands))
+    result[closed] = np.minimum(result[closed], others[closed])
+    return result
+
+
+def shanten(hand, n_melds=None):
+    """Compute shanten of a hand
+
+    Parameters
+    ----------
+    hand : array-like
+        Tile counts of concealed hand. Shape: (34,)
+
+    n_melds : int
+        The number of melds. Inferred from the number of tiles when omitted.
+
+    Returns
+    -------
+    int
+    """
+    return int(shanten_batch([hand], n_melds)[0])
+
+
+def is_tenpai(hand, n_melds=None):
+    """Check if a hand (3n+1 tiles) is one tile away from completion"""
+    return shanten(hand, n_melds) == 0
+
+
+###############################################################################
+def ukeire_batch(hands, n_melds=None, visible=None):
+    """Find tiles which reduce shanten of hands with 3n+1 tiles
+
+    Parameters
+    ----------
+    hands : array-like
+        Tile counts of concealed hands. Shape: (N, 34)
+
+    n_melds : int or array-like
+        The number of melds of each hand. Inferred when omitted.
+
+    visible : array-like
+        Tile counts visible to the player other than own hand, such as
+        discards, melds and dora indicators. Shape: (N, 34) or (34,).
+        They are excluded from the remaining count.
+
+    Returns
+    -------
+    numpy.ndarray
+        int8 array of shape (N, 34). The number of remaining tiles of each
+        kind which reduce shanten. 0 for tiles which do not.
+    """
+    hands = _as_hands(hands)
+    melds = _infer_melds(hands, n_melds)
+    if np.any(hands.sum(axis=1) + 3 * melds != 13):
+        raise ValueError('Hands must have 3n+1 tiles with n melds.')
+    current = shanten_batch(hands, melds)
+    # Evaluate all the 34 kinds of draws at once
+    drawn = np.repeat(hands, 34, axis=0)
+    drawn[np.arange(len(drawn)), np.tile(np.arange(34), len(hands))] += 1
+    valid = drawn.max(axis=1) <= 4
+    after = np.full(len(drawn), _INF, dtype=np.int8)
+    after[valid] = shanten_batch(drawn[valid], np.repeat(melds, 34)[valid])
+    improves = after.reshape(-1, 34) < current[:, None]
+    remaining = 4 - hands
+    if visible is not None:
+        remaining = remaining - np.asarray(visible, dtype=np.int64)
+    return np.where(improves, np.maximum(remaining, 0), 0).astype(np.int8)
+
+
+def ukeire(hand, n_melds=None, visible=None):
+    """Find tiles which reduce shanten of a hand with 3n+1 tiles
+
+    Returns
+    -------
+    dict
+        Key: tile kind (0-33). Value: the number of remaining tiles.
+    """
+    counts = ukeire_batch([hand], n_melds, visible)[0]
+    return {int(kind): int(counts[kind]) for kind in np.nonzero(counts)[0]}
+
+
+def tiles_to_counts(tiles):
+    """Convert list of 136-tile IDs into 34-tile count array"""
+    return np.bincount(np.asarray(tiles, dtype=np.int64) // 4, minlength=34)
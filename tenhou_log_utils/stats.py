@@ -0,0 +1,187 @@
+"""Mergeable corpus statistics of parsed games
+
+:class:`GameStats` folds games parsed with :func:`parse_mjlog` into
+counters grouped by lobby and table type. Aggregates built in different
+processes or on different days can be combined with :meth:`GameStats.merge`
+and saved as JSON, so that statistics of a growing corpus are updated by
+folding in only new files. Aggregates hold counters only. Keeping track of
+which files are folded is up to the caller.
+"""
+from __future__ import absolute_import
+from __future__ import division
+
+import json
+import logging
+import collections
+
+_LG = logging.getLogger(__name__)
+
+# Counters held by each group
+_COUNTERS = [
+    # Scalar counts: games, rounds, player_rounds, agari, tsumo, ron, ryuukyoku
+    'count',
+    # Occurrence of each yaku ID (including dora) and yakuman ID
+    'yaku',
+    'yakuman',
+    # Occurrence of each ryuukyoku reason. 'exhaustive' for normal draw
+    'ryuukyoku',
+    # Sum and count of points by `ten.limit`
+    'point_sum',
+    'point_count',
+]
+
+
+# Fields of parsed games used by `GameStats.fold`. See `parser.compile_fields`
+FIELDS = [
+    'GO', 'AGARI.loser', 'AGARI.yaku', 'AGARI.yakuman', 'AGARI.ten',
+    'RYUUKYOKU.reason',
+]
+
+
+def get_group_key(go_data):
+    """Get the key of group from parsed GO tag. e.g. '0/tenhou'"""
+    lobby = go_data.get('lobby')
+    return '{}/{}'.format('-' if lobby is None else lobby, go_data['table'])
+
+
+def _new_group():
+    return {name: collections.Counter() for name in _COUNTERS}
+
+
+class GameStats(object):
+    """Mergeable aggregate of game statistics
+
+    Attributes
+    ----------
+    groups : dict
+        Key: group key such as ``'0/tenhou'``. Value: dict of
+        ``collections.Counter``.
+    """
+    def __init__(self):
+        self.groups = collections.defaultdict(_new_group)
+
+    def fold(self, game):
+        """Add a game parsed with :func:`parse_mjlog`
+
+        Only the fields listed in ``FIELDS`` are used, so the game can be
+        parsed with ``fields=FIELDS``.
+        """
+        meta = game['meta']
+        group = self.groups[get_group_key(meta['GO'])]
+        n_players = 3 if meta['GO']['config']['sanma'] else 4
+        count = group['count']
+        count['games'] += 1
+        count['rounds'] += len(game['rounds'])
+        count['player_rounds'] += n_players * len(game['rounds'])
+        for round_ in game['rounds']:
+            for item in round_:
+                if item['tag'] == 'AGARI':
+                    self._fold_agari(group, item['data'])
+                elif item['tag'] == 'RYUUKYOKU':
+                    count['ryuukyoku'] += 1
+                    reason = item['data'].get('reason', 'exhaustive')
+                    group['ryuukyoku'][reason] += 1
+
+    @staticmethod
+    def _fold_agari(group, data):
+        count = group['count']
+        count['agari'] += 1
+        count['ron' if 'loser' in data else 'tsumo'] += 1
+        for yaku, han in data['yaku']:
+            # Dora, ura-dora and aka-dora are listed with 0 han when absent.
+            if han:
+                group['yaku'][str(yaku)] += 1
+        for yaku in data['yakuman']:
+            group['yakuman'][str(yaku)] += 1
+        limit = str(data['ten']['limit'])
+        group['point_sum'][limit] += data['ten']['point']
+        group['point_count'][limit] += 1
+
+    def merge(self, other):
+        """Add counts of another aggregate to this one in place
+
+        Returns
+        -------
+        GameStats
+            self
+        """
+        for key, other_group in other.groups.items():
+            group = self.groups[key]
+            for name in _COUNTERS:
+                group[name].update(other_group[name])
+        return self
+
+    ###########################################################################
+    def to_dict(self):
+        """Convert to JSON-serializable dict"""
+        return {
+            'groups': {
+                key: {name: dict(group[name]) for name in _COUNTERS}
+                for key, group in self.groups.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore aggregate from :meth:`to_dict` output"""
+        stats = cls()
+        for key, group in data['groups'].items():
+            for name in _COUNTERS:
+                stats.groups[key][name].update(group.get(name, {}))
+        return stats
+
+    def save(self, filepath):
+        """Save aggregate as JSON"""
+        with open(filepath, 'w') as file_:
+            json.dump(self.to_dict(), file_)
+
+    @classmethod
+    def load(cls, filepath):
+        """Load aggregate saved with :meth:`save`"""
+        with open(filepath, 'r') as file_:
+            return cls.from_dict(json.load(file_))
+
+    ###########################################################################
+    def summarize(self):
+        """Compute rates and averages of each group
+
+        Returns
+        -------
+        dict
+            Key: group key. Value: dict with ``games``, ``rounds``,
+            ``win_rate``, ``tsumo_rate``, ``deal_in_rate`` (per player per
+            round), ``ryuukyoku_rate`` (per round), ``average_points``
+            (keyed by limit), ``yaku``, ``yakuman`` and ``ryuukyoku``
+            (occurrence per agari / ryuukyoku).
+        """
+        summary = {}
+        for key, group in sorted(self.groups.items()):
+            count = group['count']
+            player_rounds = count['player_rounds'] or 1
+            rounds = count['rounds'] or 1
+            agari = count['agari'] or 1
+            summary[key] = {
+                'games': count['games'],
+                'rounds': count['rounds'],
+                'win_rate': count['agari'] / player_rounds,
+                'tsumo_rate': count['tsumo'] / player_rounds,
+                'deal_in_rate': count['ron'] / player_rounds,
+                'ryuukyoku_rate': count['ryuukyoku'] / rounds,
+                'average_points': {
+                    int(limit): group['point_sum'][limit] / num
+                    for limit, num in group['point_count'].items()
+                },
+                'yaku': {
+                    int(yaku): num / agari
+                    for yaku, num in group['yaku'].items()
+                },
+                'yakuman': {
+                    int(yaku): num / agari
+                    for yaku, num in group['yakuman'].items()
+                },
+                'ryuukyoku': {
+                    reason: num / (count['ryuukyoku'] or 1)
+                    for reason, num in group['ryuukyoku'].items()
+                },
+            }
+        return summary
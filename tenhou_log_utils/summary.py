@@ -0,0 +1,106 @@
+"""Extract game summary from raw mjlog bytes without building XML tree
+
+Only ``GO``, ``UN``, ``AGARI`` and ``RYUUKYOKU`` elements are located with
+a byte-level scan of the decompressed data, and their attributes are
+decoded with the parsers of :mod:`tenhou_log_utils.parser`. Draw, discard
+and other nodes, which make up most of the file, are skipped over by the
+scan without being decoded.
+"""
+from __future__ import absolute_import
+
+import re
+import logging
+
+try:
+    from html import unescape
+except ImportError:
+    from HTMLParser import HTMLParser
+    unescape = HTMLParser().unescape
+
+from tenhou_log_utils.io import open_mjlog
+# pylint: disable=protected-access
+from tenhou_log_utils.parser import (
+    _parse_go, _parse_un, _parse_agari, _parse_ryuukyoku)
+
+_LG = logging.getLogger(__name__)
+
+_HEADER_ELEMENT = re.compile(br'<(GO|UN)\s([^>]*)>')
+_ATTRIBUTE = re.compile(r'([\w:.-]+)\s*=\s*"([^"]*)"')
+_RESULT_PARSERS = [
+    (b'<AGARI ', 'AGARI', _parse_agari),
+    (b'<RYUUKYOKU ', 'RYUUKYOKU', _parse_ryuukyoku),
+]
+
+
+def _decode_attrib(raw):
+    raw = raw.decode('utf-8')
+    attrib = dict(_ATTRIBUTE.findall(raw))
+    if '&' in raw:
+        # Named entities and numeric character references, as XML parser does
+        attrib = {key: unescape(value) for key, value in attrib.items()}
+    return attrib
+
+
+def _find_all(data, pattern, start):
+    pos = data.find(pattern, start)
+    while pos != -1:
+        yield pos
+        pos = data.find(pattern, pos + len(pattern))
+
+
+def scan_summary(data):
+    """Extract summary from content of mjlog file
+
+    Parameters
+    ----------
+    data : bytes
+        Content of (decompressed) mjlog file.
+
+    Returns
+    -------
+    dict
+        'GO' and 'UN' hold the same data as 'meta' of :func:`parse_mjlog`
+        (missing if not found), and 'results' is the list of AGARI and
+        RYUUKYOKU nodes in the order of appearance, each of which is the
+        same as the corresponding item of 'rounds' of :func:`parse_mjlog`.
+    """
+    summary = {}
+    # GO and UN of players come before the first round.
+    end = data.find(b'<INIT')
+    if end < 0:
+        end = len(data)
+    for match in _HEADER_ELEMENT.finditer(data, 0, end):
+        attrib = _decode_attrib(match.group(2))
+        if match.group(1) == b'GO':
+            summary['GO'] = _parse_go(attrib)
+        elif len(attrib) > 1:
+            # UN with single name is a disconnected player coming back.
+            summary['UN'] = _parse_un(attrib)
+    found = []
+    for pattern, tag, parser in _RESULT_PARSERS:
+        for pos in _find_all(data, pattern, end):
+            found.append((pos, len(pattern), tag, parser))
+    found.sort()
+    summary['results'] = [
+        {'tag': tag, 'data': parser(
+            _decode_attrib(data[pos + offset:data.find(b'>', pos)]))}
+        for pos, offset, tag, parser in found
+    ]
+    return summary
+
+
+def extract_summary(filepath):
+    """Extract summary from [gzipped] mjlog file
+
+    Parameters
+    ----------
+    filepath : str
+        Path to [gzipped] mjlog file.
+
+    Returns
+    -------
+    dict
+        See :func:`scan_summary`.
+    """
+    with open_mjlog(filepath) as file_:
+        return scan_summary(file_.read())
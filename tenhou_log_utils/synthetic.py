@@ -0,0 +1,504 @@
+"""Generate synthetic mjlog data for testing and benchmarking
+
+Games are produced by a seeded random simulation, so that the same seed
+always gives the same XML. Tile movements are consistent (drawn tiles come
+from a shuffled wall, discards and calls only use tiles in hand), while
+hands are not evaluated; wins are declared at random with made-up yaku and
+scores. The tag mix resembles real logs: mostly draws and discards, with
+calls of every type, riichi, kan dora, wins and exhaustive/abortive draws.
+"""
+from __future__ import absolute_import
+
+import os
+import gzip
+import random
+import logging
+
+try:
+    from urllib.parse import quote
+except ImportError:  # Python 2
+    from urllib import quote
+
+_LG = logging.getLogger(__name__)
+
+_DRAW_TAGS = 'TUVW'
+_DISCARD_TAGS = 'DEFG'
+_NAMES = [u'あいう', u'player', u'NoName', u'天鳳']
+
+
+###############################################################################
+# Encoders of `m` attribute. Inverse of `tenhou_log_utils.parser.decode_meld`
+def encode_chi(tiles, called, kui=3):
+    """Encode Chi. `tiles` are three tiles of a sequence"""
+    tiles = sorted(tiles)
+    kind = tiles[0] // 4
+    base = (kind // 9) * 7 + kind % 9
+    meld = ((base * 3 + tiles.index(called)) << 10) | 0x4 | kui
+    for i, tile in enumerate(tiles):
+        meld |= (tile % 4) << (3 + 2 * i)
+    return meld
+
+
+def encode_pon(tiles, called, kui):
+    """Encode Pon. `tiles` are three tiles of the same kind"""
+    tiles = sorted(tiles)
+    kind = tiles[0] // 4
+    unused = ({0, 1, 2, 3} - {tile % 4 for tile in tiles}).pop()
+    return ((kind * 3 + tiles.index(called)) << 9) | (unused << 5) | 0x8 | kui
+
+
+def encode_kakan(tiles, called, added, kui):
+    """Encode KaKan. `tiles` and `called` are those of the original Pon"""
+    tiles = sorted(tiles)
+    kind = tiles[0] // 4
+    return (
+        ((kind * 3 + tiles.index(called)) << 9) |
+        ((added % 4) << 5) | 0x10 | kui)
+
+
+def encode_kan(called, kui):
+    """Encode MinKan (kui > 0) or AnKan (kui == 0)"""
+    return (called << 8) | kui
+
+
+def encode_nuki(tile):
+    """Encode Nuki (North extraction in Sanma)"""
+    return (tile << 8) | 0x20
+
+
+###############################################################################
+def _attrs(**kwargs):
+    return ''.join(
+        ' {}="{}"'.format(key, value) for key, value in kwargs.items())
+
+
+def _join(values):
+    return ','.join(str(value) for value in values)
+
+
+class _Round(object):
+    """Simulate one round and record nodes"""
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, rng, game, nodes):
+        self.rng = rng
+        self.game = game
+        self.nodes = nodes
+        self.n_players = game.n_players
+        self.hands = [[] for _ in range(4)]
+        self.pons = [[] for _ in range(4)]  # (tiles, called, kui)
+        self.called = [False] * 4
+        self.riichi = [False] * 4
+        self.wall = []
+        self.dead_wall = []
+        self.n_kan = self.n_rinshan = 0
+        self._start = 0
+
+    ###########################################################################
+    def _emit(self, tag, **attrib):
+        self.nodes.append('<{}{}/>'.format(tag, _attrs(**attrib)))
+
+    def _emit_ordered(self, tag, attrib):
+        self.nodes.append('<{}{}/>'.format(
+            tag, ''.join(' {}="{}"'.format(k, v) for k, v in attrib)))
+
+    def _deal(self):
+        tiles = list(range(136))
+        if self.n_players == 3:
+            # Sanma does not use 2-8 man
+            tiles = [t for t in tiles if not 4 <= t < 32]
+        self.rng.shuffle(tiles)
+        self.dead_wall, tiles = tiles[:14], tiles[14:]
+        for player in range(self.n_players):
+            self.hands[player] = sorted(tiles[:13])
+            tiles = tiles[13:]
+        self.wall = tiles
+
+    def _init(self):
+        game = self.game
+        attrib = [
+            ('seed', _join([
+                game.round, game.combo, game.deposits,
+                self.rng.randint(0, 5), self.rng.randint(0, 5),
+                self.dead_wall[4]])),
+            ('ten', _join([score // 100 for score in game.scores])),
+            ('oya', game.oya),
+        ]
+        for player in range(self.n_players):
+            attrib.append(('hai{}'.format(player), _join(self.hands[player])))
+        self._emit_ordered('INIT', attrib)
+
+    ###########################################################################
+    def _draw(self, player, rinshan=False):
+        if rinshan and self.n_rinshan < 4:
+            tile = self.dead_wall[13 - self.n_rinshan]
+            self.n_rinshan += 1
+        elif rinshan:
+            # Replacement tiles run out with many Nuki. Take from the wall.
+            tile = self.wall.pop()
+        else:
+            tile = self.wall.pop(0)
+        self.hands[player].append(tile)
+        self._emit('{}{}'.format(_DRAW_TAGS[player], tile))
+        return tile
+
+    def _discard(self, player, tile):
+        self.hands[player].remove(tile)
+        self._emit('{}{}'.format(_DISCARD_TAGS[player], tile))
+
+    def _new_dora(self):
+        self.n_kan += 1
+        self._emit('DORA', hai=self.dead_wall[4 - self.n_kan])
+
+    def _choose_discard(self, player, drawn):
+        if self.riichi[player] and drawn is not None:
+            return drawn
+        return self.rng.choice(self.hands[player])
+
+    ###########################################################################
+    def _try_ankan(self, player):
+        kinds = [tile // 4 for tile in self.hands[player]]
+        for kind in set(kinds):
+            if kinds.count(kind) == 4 and self.n_kan < 4:
+                tiles = [t for t in self.hands[player] if t // 4 == kind]
+                for tile in tiles:
+                    self.hands[player].remove(tile)
+                self._emit('N', who=player, m=encode_kan(tiles[0], 0))
+                return True
+        return False
+
+    def _try_kakan(self, player):
+        for i, (tiles, called, kui) in enumerate(self.pons[player]):
+            kind = tiles[0] // 4
+            added = [t for t in self.hands[player] if t // 4 == kind]
+            if added and self.n_kan < 4:
+                self.hands[player].remove(added[0])
+                self.pons[player].pop(i)
+                self._emit(
+                    'N', who=player,
+                    m=encode_kakan(tiles, called, added[0], kui))
+                return True
+        return False
+
+    def _try_nuki(self, player):
+        north = [t for t in self.hands[player] if t // 4 == 30]
+        if self.n_players == 3 and north:
+            self.hands[player].remove(north[0])
+            self._emit('N', who=player, m=encode_nuki(north[0]))
+            return True
+        return False
+
+    def _try_call(self, discarder, tile):
+        """Let other players call the discarded tile. Returns caller"""
+        kind = tile // 4
+        for offset in range(1, self.n_players):
+            player = (discarder + offset) % self.n_players
+            if self.riichi[player]:
+                continue
+            kui = (discarder - player) % 4
+            same = [t for t in self.hands[player] if t // 4 == kind]
+            if len(same) == 3 and self.rng.random() < 0.3 and self.n_kan < 4:
+                for held in same:
+                    self.hands[player].remove(held)
+                self._emit('N', who=player, m=encode_kan(tile, kui))
+                self.called[player] = True
+                return player, True
+            if len(same) >= 2 and self.rng.random() < 0.3:
+                tiles = same[:2] + [tile]
+                for held in same[:2]:
+                    self.hands[player].remove(held)
+                self.pons[player].append((tiles, tile, kui))
+                self._emit('N', who=player, m=encode_pon(tiles, tile, kui))
+                self.called[player] = True
+                return player, False
+        player = (discarder + 1) % self.n_players
+        if self.n_players == 4 and kind < 27 and not self.riichi[player]:
+            chi = self._find_chi(player, tile)
+            if chi and self.rng.random() < 0.3:
+                for held in chi:
+                    self.hands[player].remove(held)
+                self._emit('N', who=player, m=encode_chi(chi + [tile], tile))
+                self.called[player] = True
+                return player, False
+        return None, False
+
+    def _find_chi(self, player, tile):
+        kind = tile // 4
+        number = kind % 9
+        by_kind = {}
+        for held in self.hands[player]:
+            by_kind.setdefault(held // 4, held)
+        for start in range(max(0, number - 2), min(6, number) + 1):
+            kinds = [kind - number + start + i for i in range(3)]
+            kinds.remove(kind)
+            if all(k in by_kind for k in kinds):
+                return [by_kind[k] for k in kinds]
+        return None
+
+    ###########################################################################
+    def _agari(self, winner, from_who, machi):
+        game = self.game
+        point = self.rng.choice([1000, 2000, 3900, 7700, 8000, 12000])
+        limit = {8000: 1, 12000: 2}.get(point, 0)
+        gains = [0] * 4
+        if winner == from_who:
+            for player in range(self.n_players):
+                if player != winner:
+                    gains[player] = -point // (self.n_players - 1) // 100 * 100
+            gains[winner] = -sum(gains)
+        else:
+            gains[from_who] = -point
+            gains[winner] = point
+        gains[winner] += game.deposits * 1000
+        hand = sorted(self.hands[winner] + ([] if winner == from_who else [machi]))
+        yaku = [1, 1, 0, 1] if self.riichi[winner] else [7, 1]
+        attrib = [
+            ('ba', _join([game.combo, game.deposits])),
+            ('hai', _join(hand)),
+            ('machi', machi),
+            ('ten', _join([30, point, limit])),
+        ]
+        if self.rng.random() < 0.02:
+            attrib.append(('yakuman', '39'))
+        else:
+            attrib.append(('yaku', _join(yaku + [52, self.rng.randint(0, 3)])))
+        kans = range(self.n_kan + 1)
+        attrib.append(('doraHai', _join(self.dead_wall[4 - i] for i in kans)))
+        if self.riichi[winner]:
+            attrib.append(
+                ('doraHaiUra', _join(self.dead_wall[9 - i] for i in kans)))
+        attrib += [('who', winner), ('fromWho', from_who)]
+        self._finish(attrib, gains, 'AGARI')
+        game.deposits = 0
+        game.combo = game.combo + 1 if winner == game.oya else 0
+        game.advance(winner != game.oya)
+
+    def _ryuukyoku(self, reason=None):
+        game = self.game
+        attrib = [('ba', _join([game.combo, game.deposits]))]
+        gains = [0] * 4
+        tenpai = []
+        if reason is None:
+            tenpai = [p for p in range(self.n_players) if self.rng.random() < 0.4]
+            if tenpai and len(tenpai) < self.n_players:
+                for player in range(self.n_players):
+                    gains[player] = (
+                        3000 // len(tenpai) if player in tenpai else
+                        -3000 // (self.n_players - len(tenpai)))
+        for player in tenpai:
+            attrib.append(('hai{}'.format(player), _join(sorted(self.hands[player]))))
+        if reason:
+            attrib.append(('type', reason))
+        self._finish(attrib, gains, 'RYUUKYOKU')
+        game.combo += 1
+        game.advance(reason is None and game.oya not in tenpai)
+
+    def _finish(self, attrib, gains, tag):
+        game = self.game
+        attrib.append(('sc', _join(
+            v for s, g in zip(game.scores, gains)
+            for v in (s // 100, g // 100))))
+        game.scores = [s + g for s, g in zip(game.scores, gains)]
+        if game.is_last():
+            ordered = sorted(range(self.n_players), key=lambda p: -game.scores[p])
+            uma = [0.] * 4
+            for rank, player in enumerate(ordered):
+                uma[player] = round(
+                    (game.scores[player] - 30000) / 1000. +
+                    [20, 10, -10, -20][rank], 1)
+            uma[ordered[0]] = round(uma[ordered[0]] - sum(uma), 1)
+            attrib.append(('owari', _join(
+                v for s, u in zip(game.scores, uma) for v in (s // 100, u))))
+        self._emit_ordered(tag, attrib)
+
+    ###########################################################################
+    def _turn(self, player, after_call=False, rinshan=False):
+        """Returns next player, or None if the round ended"""
+        rng = self.rng
+        drawn = None
+        if not after_call:
+            if not self.wall:
+                self._ryuukyoku()
+                return None
+            drawn = self._draw(player, rinshan)
+            if self.nodes_in_round() < 10 and rng.random() < 0.003:
+                self._ryuukyoku('yao9')
+                return None
+            if rng.random() < 0.01 * (2 if self.riichi[player] else 1):
+                self._agari(player, player, drawn)
+                return None
+            if not self.riichi[player] and (
+                    self._try_ankan(player) or self._try_kakan(player)):
+                self._new_dora()
+                return self._turn(player, rinshan=True)
+            if self.wall and rng.random() < 0.5 and self._try_nuki(player):
+                return self._turn(player, rinshan=True)
+        declare = (
+            not after_call and not self.riichi[player] and
+            not self.called[player] and len(self.wall) > 4 and
+            self.game.scores[player] >= 1000 and rng.random() < 0.04)
+        if declare:
+            self._emit('REACH', who=player, step=1)
+        tile = self._choose_discard(player, drawn)
+        self._discard(player, tile)
+        if rng.random() < 0.01:
+            for offset in range(1, self.n_players):
+                winner = (player + offset) % self.n_players
+                if self.riichi[winner] or rng.random() < 0.3:
+                    self._agari(winner, player, tile)
+                    return None
+        if declare:
+            self.riichi[player] = True
+            self.game.scores[player] -= 1000
+            self.game.deposits += 1
+            if self.game.old_format:
+                self._emit('REACH', who=player, step=2)
+            else:
+                self._emit_ordered('REACH', [
+                    ('who', player),
+                    ('ten', _join(s // 100 for s in self.game.scores)),
+                    ('step', 2)])
+        if self.wall:
+            caller, kan = self._try_call(player, tile)
+            if caller is not None:
+                if kan:
+                    self._new_dora()
+                    return self._turn(caller, rinshan=True)
+                return self._turn(caller, after_call=True)
+        return (player + 1) % self.n_players
+
+    def nodes_in_round(self):
+        """The number of nodes emitted since INIT"""
+        return len(self.nodes) - self._start
+
+    def play(self):
+        """Simulate the round"""
+        self._deal()
+        self._init()
+        self._start = len(self.nodes)
+        player = self.game.oya
+        while player is not None:
+            player = self._turn(player)
+            if player is not None and self.rng.random() < 0.002:
+                self._emit('BYE', who=player)
+                self._emit('UN', **{'n{}'.format(player): quote(
+                    self.game.names[player].encode('utf-8'))})
+
+
+class _Game(object):
+    def __init__(self, rng, sanma, old_format, n_rounds):
+        self.rng = rng
+        self.n_players = 3 if sanma else 4
+        self.old_format = old_format
+        self.n_rounds = n_rounds
+        self.names = rng.sample(_NAMES, self.n_players)
+        self.scores = [35000] * 3 + [0] if sanma else [25000] * 4
+        self.round = self.combo = self.deposits = self.oya = 0
+        self.n_played = 0
+
+    def is_last(self):
+        """True if the current round is the last one"""
+        return self.n_played + 1 >= self.n_rounds
+
+    def advance(self, rotate):
+        """Move to the next round"""
+        self.n_played += 1
+        if rotate:
+            self.round += 1
+            self.oya = (self.oya + 1) % self.n_players
+
+
+def generate_mjlog(seed, sanma=False, old_format=False, n_rounds=None):
+    """Generate mjlog XML string of one game
+
+    Parameters
+    ----------
+    seed : int
+        Random seed. The same seed gives the same output.
+
+    sanma : bool
+        Generate three-player game, which uses Nuki calls.
+
+    old_format : bool
+        Omit attributes missing in old logs; `dan` of UN and `ten` of
+        REACH.
+
+    n_rounds : int
+        The number of rounds. Random when omitted.
+
+    Returns
+    -------
+    str
+    """
+    rng = random.Random(seed)
+    game = _Game(rng, sanma, old_format, n_rounds or rng.randint(4, 12))
+    game_type = 0x01 | 0x08 | (0x10 if sanma else 0) | rng.choice(
+        [0x00, 0x20, 0x80, 0xa0])
+    nodes = ['<mjloggm ver="2.3">']
+    nodes.append('<SHUFFLE seed="mt19937ar-sha512-n288-base64,{}" ref=""/>'.format(
+        rng.getrandbits(64)))
+    nodes.append('<GO type="{}" lobby="0"/>'.format(game_type))
+    un_attrib = [
+        ('n{}'.format(i), quote(name.encode('utf-8')))
+        for i, name in enumerate(game.names)]
+    if sanma:
+        un_attrib.append(('n3', ''))
+    if not old_format:
+        un_attrib.append(
+            ('dan', _join(rng.randint(0, 20) for _ in range(4))))
+    un_attrib += [
+        ('rate', _join('{:.2f}'.format(rng.uniform(1500, 2300))
+                       for _ in range(4))),
+        ('sx', _join(rng.choice('MF') for _ in range(4))),
+    ]
+    nodes.append('<UN{}/>'.format(
+        ''.join(' {}="{}"'.format(k, v) for k, v in un_attrib)))
+    nodes.append('<TAIKYOKU oya="0"/>')
+    while game.n_played < game.n_rounds:
+        _Round(rng, game, nodes).play()
+    nodes.append('</mjloggm>')
+    return ''.join(nodes)
+
+
+def write_corpus(directory, n_games, seed=0, gzip_ratio=0.5,
+                 sanma_ratio=0.1, old_format_ratio=0.1):
+    """Write synthetic mjlog files into directory
+
+    Parameters
+    ----------
+    directory : str
+        Output directory. Created if missing.
+
+    n_games : int
+        The number of games (files) to generate.
+
+    seed : int
+        Base random seed. Game `i` is generated with seed `seed + i`.
+
+    gzip_ratio, sanma_ratio, old_format_ratio : float
+        Fraction of games saved as `.mjlog.gz`, three-player games and old
+        format games.
+
+    Returns
+    -------
+    list of str
+        Paths of the generated files.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(n_games):
+        xml = generate_mjlog(
+            seed + i, sanma=rng.random() < sanma_ratio,
+            old_format=rng.random() < old_format_ratio).encode('utf-8')
+        if rng.random() < gzip_ratio:
+            path = os.path.join(directory, '{:06d}.mjlog.gz'.format(i))
+            with gzip.open(path, 'wb') as file_:
+                file_.write(xml)
+        else:
+            path = os.path.join(directory, '{:06d}.mjlog'.format(i))
+            with open(path, 'wb') as file_:
+                file_.write(xml)
+        paths.append(path)
+    return paths
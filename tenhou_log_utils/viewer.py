@@ -7,48 +7,50 @@ import logging
 _LG = logging.getLogger(__name__)
 
 
+TILE_UNICODES = [
+    # M
+    u'\U0001f007',
+    u'\U0001f008',
+    u'\U0001f009',
+    u'\U0001f00a',
+    u'\U0001f00b',
+    u'\U0001f00c',
+    u'\U0001f00d',
+    u'\U0001f00e',
+    u'\U0001f00f',
+    # P
+    u'\U0001f019',
+    u'\U0001f01a',
+    u'\U0001f01b',
+    u'\U0001f01c',
+    u'\U0001f01d',
+    u'\U0001f01e',
+    u'\U0001f01f',
+    u'\U0001f020',
+    u'\U0001f021',
+    # S
+    u'\U0001f010',
+    u'\U0001f011',
+    u'\U0001f012',
+    u'\U0001f013',
+    u'\U0001f014',
+    u'\U0001f015',
+    u'\U0001f016',
+    u'\U0001f017',
+    u'\U0001f018',
+    # Z
+    u'\U0001f000',
+    u'\U0001f001',
+    u'\U0001f002',
+    u'\U0001f003',
+    u'\U0001f006',
+    u'\U0001f005',
+    u'\U0001f004',
+]
+
+
 def _tile2unicode(tile):
-    tile_unicodes = [
-        # M
-        u'\U0001f007',
-        u'\U0001f008',
-        u'\U0001f009',
-        u'\U0001f00a',
-        u'\U0001f00b',
-        u'\U0001f00c',
-        u'\U0001f00d',
-        u'\U0001f00e',
-        u'\U0001f00f',
-        # P
-        u'\U0001f019',
-        u'\U0001f01a',
-        u'\U0001f01b',
-        u'\U0001f01c',
-        u'\U0001f01d',
-        u'\U0001f01e',
-        u'\U0001f01f',
-        u'\U0001f020',
-        u'\U0001f021',
-        # S
-        u'\U0001f010',
-        u'\U0001f011',
-        u'\U0001f012',
-        u'\U0001f013',
-        u'\U0001f014',
-        u'\U0001f015',
-        u'\U0001f016',
-        u'\U0001f017',
-        u'\U0001f018',
-        # Z
-        u'\U0001f000',
-        u'\U0001f001',
-        u'\U0001f002',
-        u'\U0001f003',
-        u'\U0001f006',
-        u'\U0001f005',
-        u'\U0001f004',
-    ]
-    return u'{} {}'.format(tile_unicodes[tile//4], tile % 4)
+    return u'{} {}'.format(TILE_UNICODES[tile//4], tile % 4)
 
 
 def convert_hand(tiles):
@@ -156,6 +158,93 @@ def _print_reach(data):
         raise NotImplementedError('Unexpected step value: {}'.format(data))
 
 
+################################################################################
+LIMIT_NAMES = [
+    'No limit',
+    'Mangan',
+    'Haneman',
+    'Baiman',
+    'Sanbaiman',
+    'Yakuman',
+]
+
+YAKU_NAMES = [
+    # 1 han
+    'Tsumo',
+    'Reach',
+    'Ippatsu',
+    'Chankan',
+    'Rinshan-kaihou',
+    'Hai-tei-rao-yue',
+    'Hou-tei-rao-yui',
+    'Pin-fu',
+    'Tan-yao-chu',
+    'Ii-pei-ko',
+    # Ji-kaze
+    'Ton',
+    'Nan',
+    'Xia',
+    'Pei',
+    # Ba-kaze
+    'Ton',
+    'Nan',
+    'Xia',
+    'Pei',
+    'Haku',
+    'Hatsu',
+    'Chun',
+    # 2 han
+    'Double reach',
+    'Chii-toi-tsu',
+    'Chanta',
+    'Ikki-tsuukan',
+    'San-shoku-dou-jun',
+    'San-shoku-dou-kou',
+    'San-kan-tsu',
+    'Toi-Toi-hou',
+    'San-ankou',
+    'Shou-sangen',
+    'Hon-rou-tou',
+    # 3 han
+    'Ryan-pei-kou',
+    'Junchan',
+    'Hon-itsu',
+    # 6 han
+    'Chin-itsu',
+    # mangan
+    'Ren-hou',
+    # yakuman
+    'Ten-hou',
+    'Chi-hou',
+    'Dai-sangen',
+    'Suu-ankou',
+    'Suu-ankou Tanki',
+    'Tsu-iisou',
+    'Ryu-iisou',
+    'Chin-routo',
+    'Chuuren-poutou',
+    'Jyunsei Chuuren-poutou 9',
+    'Kokushi-musou',
+    'Kokushi-musou 13',
+    'Dai-suushi',
+    'Shou-suushi',
+    'Su-kantsu',
+    # kensyou
+    'Dora',
+    'Ura-dora',
+    'Aka-dora',
+]
+
+RYUUKYOKU_REASONS = {
+    'nm': 'Nagashi Mangan',
+    'yao9': '9-Shu 9-Hai',
+    'kaze4': '4 Fu',
+    'reach4': '4 Reach',
+    'ron3': '3 Ron',
+    'kan4': '4 Kan',
+}
+
+
 ################################################################################
 def _print_ba(ba):
     _LG.info('  Ten-bou:')
@@ -170,81 +259,6 @@ def _print_result(result):
 
 
 def _print_agari(data):
-    limit = [
-        'No limit',
-        'Mangan',
-        'Haneman',
-        'Baiman',
-        'Sanbaiman',
-        'Yakuman',
-    ]
-
-    yaku_name = [
-        # 1 han
-        'Tsumo',
-        'Reach',
-        'Ippatsu',
-        'Chankan',
-        'Rinshan-kaihou',
-        'Hai-tei-rao-yue',
-        'Hou-tei-rao-yui',
-        'Pin-fu',
-        'Tan-yao-chu',
-        'Ii-pei-ko',
-        # Ji-kaze
-        'Ton',
-        'Nan',
-        'Xia',
-        'Pei',
-        # Ba-kaze
-        'Ton',
-        'Nan',
-        'Xia',
-        'Pei',
-        'Haku',
-        'Hatsu',
-        'Chun',
-        # 2 han
-        'Double reach',
-        'Chii-toi-tsu',
-        'Chanta',
-        'Ikki-tsuukan',
-        'San-shoku-dou-jun',
-        'San-shoku-dou-kou',
-        'San-kan-tsu',
-        'Toi-Toi-hou',
-        'San-ankou',
-        'Shou-sangen',
-        'Hon-rou-tou',
-        # 3 han
-        'Ryan-pei-kou',
-        'Junchan',
-        'Hon-itsu',
-        # 6 han
-        'Chin-itsu',
-        # mangan
-        'Ren-hou',
-        # yakuman
-        'Ten-hou',
-        'Chi-hou',
-        'Dai-sangen',
-        'Suu-ankou',
-        'Suu-ankou Tanki',
-        'Tsu-iisou',
-        'Ryu-iisou',
-        'Chin-routo',
-        'Chuuren-poutou',
-        'Jyunsei Chuuren-poutou 9',
-        'Kokushi-musou',
-        'Kokushi-musou 13',
-        'Dai-suushi',
-        'Shou-suushi',
-        'Su-kantsu',
-        # kensyou
-        'Dora',
-        'Ura-dora',
-        'Aka-dora',
-    ]
     _LG.info('Player %s wins.', data['winner'])
     if 'loser' in data:
         _LG.info('  Ron from player %s', data['loser'])
@@ -257,14 +271,14 @@ def _print_agari(data):
         _LG.info('  Ura Dora: %s', convert_hand(data['ura_dora']))
     _LG.info('  Yaku:')
     for yaku, han in data['yaku']:
-        _LG.info('      %-20s (%2d): %2d [Han]', yaku_name[yaku], yaku, han)
+        _LG.info('      %-20s (%2d): %2d [Han]', YAKU_NAMES[yaku], yaku, han)
     if data['yakuman']:
         for yaku in data['yakuman']:
-            _LG.info('      %s (%s)', yaku_name[yaku], yaku)
+            _LG.info('      %s (%s)', YAKU_NAMES[yaku], yaku)
     _LG.info('  Fu: %s', data['ten']['fu'])
     _LG.info('  Score: %s', data['ten']['point'])
     if data['ten']['limit']:
-        _LG.info('    - %s', limit[data['ten']['limit']])
+        _LG.info('    - %s', LIMIT_NAMES[data['ten']['limit']])
     _print_ba(data['ba'])
     _LG.info('  Scores:')
     for cur, gain in zip(data['scores'], data['gains']):
@@ -281,18 +295,9 @@ def _print_dora(data):
 
 ###############################################################################
 def _print_ryuukyoku(data):
-    reason = {
-        'nm': 'Nagashi Mangan',
-        'yao9': '9-Shu 9-Hai',
-        'kaze4': '4 Fu',
-        'reach4': '4 Reach',
-        'ron3': '3 Ron',
-        'kan4': '4 Kan',
-    }
-
     _LG.info('Ryukyoku:')
     if 'reason' in data:
-        _LG.info('  Reason: %s', reason[data['reason']])
+        _LG.info('  Reason: %s', RYUUKYOKU_REASONS[data['reason']])
     for i, hand in enumerate(data['hands']):
         if hand is not None:
             _LG.info('Player %s: %s', i, convert_hand(sorted(hand)))
@@ -0,0 +1,167 @@
+"""Incrementally process mjlog files arriving in a directory
+
+:class:`Watcher` polls directories for ``*.mjlog[.gz]`` files and passes
+files which are new or changed since the last poll to handlers. The
+modification time and size of processed files are kept in a JSON
+checkpoint, so that files processed before a restart are not processed
+again.
+"""
+from __future__ import absolute_import
+
+import os
+import json
+import time
+import errno
+import logging
+import tempfile
+
+from tenhou_log_utils.io import find_mjlog_files
+
+_LG = logging.getLogger(__name__)
+
+
+class Watcher(object):
+    """Poll directories and process new or changed mjlog files
+
+    Parameters
+    ----------
+    paths : list of str
+        Directories (searched recursively), glob patterns or file paths.
+
+    handlers : list of callable
+        Called with ``(path, mtime, size)`` of each new or changed file.
+        If a handler raises, the file is recorded as failed and is not
+        retried until it changes. If a handler has ``flush`` method, it is
+        called before the checkpoint is saved.
+
+    checkpoint : str
+        JSON file to persist the state of processed files. When omitted,
+        all the existing files are processed at the first poll.
+
+    settle : float
+        Files modified within this many seconds are left for a later poll,
+        so that files being written are not read.
+
+    checkpoint_every : int
+        Flush handlers and save the checkpoint after this many files, and at
+        the end of each poll. At most this many files are processed again
+        after a crash.
+    """
+    def __init__(self, paths, handlers, checkpoint=None, settle=1.,
+                 checkpoint_every=100):
+        # pylint: disable=too-many-arguments
+        self.paths = paths
+        self.handlers = handlers
+        self.checkpoint = checkpoint
+        self.settle = settle
+        self.checkpoint_every = checkpoint_every
+        # Path -> [mtime, size, succeeded]
+        self.state = {}
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint, 'r') as file_:
+                self.state = json.load(file_)
+            _LG.debug('Loaded checkpoint with %s files.', len(self.state))
+
+    def _commit(self):
+        for handler in self.handlers:
+            if hasattr(handler, 'flush'):
+                handler.flush()
+        if self.checkpoint:
+            self._save()
+
+    def _save(self):
+        # Write to temporary file first so that interruption does not leave
+        # broken checkpoint
+        dirpath = os.path.dirname(os.path.abspath(self.checkpoint))
+        fd_, tmppath = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+        with os.fdopen(fd_, 'w') as file_:
+            json.dump(self.state, file_)
+        os.rename(tmppath, self.checkpoint)
+
+    def scan(self):
+        """Find files which are new or changed since processed
+
+        Returns
+        -------
+        list of tuple
+            ``(path, mtime, size)`` in the order of path.
+        """
+        now = time.time()
+        found = []
+        for path in find_mjlog_files(self.paths):
+            try:
+                stat = os.stat(path)
+            except OSError as error:
+                # Removed after listed
+                if error.errno != errno.ENOENT:
+                    raise
+                continue
+            if now - stat.st_mtime < self.settle:
+                continue
+            processed = self.state.get(path)
+            if processed and processed[:2] == [stat.st_mtime, stat.st_size]:
+                continue
+            found.append((path, stat.st_mtime, stat.st_size))
+        return found
+
+    def poll(self):
+        """Process new or changed files once
+
+        Returns
+        -------
+        tuple of int
+            The numbers of files processed and failed.
+        """
+        n_processed, n_failed, n_pending = 0, 0, 0
+        for path, mtime, size in self.scan():
+            succeeded = True
+            for handler in self.handlers:
+                try:
+                    handler(path, mtime, size)
+                except Exception:  # pylint: disable=broad-except
+                    _LG.exception('Failed to process %s', path)
+                    succeeded = False
+                    break
+            self.state[path] = [mtime, size, succeeded]
+            n_processed += 1
+            n_failed += not succeeded
+            n_pending += 1
+            if n_pending >= self.checkpoint_every:
+                self._commit()
+                n_pending = 0
+        if n_pending:
+            self._commit()
+        return n_processed, n_failed
+
+    def run(self, interval=2., once=False):
+        """Poll repeatedly until interrupted
+
+        Parameters
+        ----------
+        interval : float
+            Seconds between the end of one poll and the start of the next.
+
+        once : bool
+            Poll only once and return.
+
+        Returns
+        -------
+        tuple of int
+            The total numbers of files processed and failed.
+        """
+        total_processed, total_failed = 0, 0
+        try:
+            while True:
+                n_processed, n_failed = self.poll()
+                if n_processed:
+                    _LG.debug(
+                        'Processed %s files. (%s failed)',
+                        n_processed, n_failed)
+                total_processed += n_processed
+                total_failed += n_failed
+                if once:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        return total_processed, total_failed
@@ -0,0 +1,15 @@
+"""Shared fixtures of tests"""
+from __future__ import absolute_import
+
+import pytest
+
+from tenhou_log_utils.synthetic import write_corpus
+
+
+@pytest.fixture(scope='session')
+def corpus(tmpdir_factory):
+    """Paths of small synthetic corpus, mixing gzip, sanma and old format"""
+    directory = str(tmpdir_factory.mktemp('corpus'))
+    return write_corpus(
+        directory, n_games=12, seed=0, gzip_ratio=0.5, sanma_ratio=0.3,
+        old_format_ratio=0.3)
@@ -0,0 +1,48 @@
+"""Test binary event format round-trips parse results"""
+from __future__ import absolute_import
+
+import os
+
+import pytest
+
+from tenhou_log_utils.binary import write_binary, BinaryLogReader
+from tenhou_log_utils.parser import parse_mjlog_file
+
+
+@pytest.fixture(scope='module')
+def packed(corpus, tmpdir_factory):
+    path = os.path.join(str(tmpdir_factory.mktemp('binary')), 'corpus.bin')
+    write_binary(corpus, path)
+    return path
+
+
+def test_read_game(corpus, packed):
+    with BinaryLogReader(packed) as reader:
+        assert len(reader) == len(corpus)
+        for i, filepath in enumerate(corpus):
+            assert reader.read_game(i) == parse_mjlog_file(filepath)
+
+
+def test_read_meta(corpus, packed):
+    with BinaryLogReader(packed) as reader:
+        for i, filepath in enumerate(corpus):
+            assert reader.read_meta(i) == parse_mjlog_file(filepath)['meta']
+
+
+def test_read_round(corpus, packed):
+    with BinaryLogReader(packed) as reader:
+        for i, filepath in enumerate(corpus):
+            rounds = parse_mjlog_file(filepath)['rounds']
+            assert reader.num_rounds(i) == len(rounds)
+            for k, round_ in enumerate(rounds):
+                assert reader.read_round(i, k) == round_
+                assert reader.read_round(i, k - len(rounds)) == round_
+
+
+def test_read_round_out_of_range(packed):
+    with BinaryLogReader(packed) as reader:
+        n_rounds = reader.num_rounds(0)
+        with pytest.raises(IndexError):
+            reader.read_round(0, n_rounds)
+        with pytest.raises(IndexError):
+            reader.read_round(0, -n_rounds - 1)
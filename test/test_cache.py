@@ -0,0 +1,89 @@
+"""Test on-disk parse cache"""
+from __future__ import absolute_import
+
+import os
+import errno
+import pickle
+
+import pytest
+
+# pylint: disable=protected-access
+from tenhou_log_utils.cache import ParseCache, _hash_file
+from tenhou_log_utils.parser import parse_mjlog_file
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return ParseCache(directory=str(tmpdir.join('cache')), max_size=1 << 30)
+
+
+def test_parse(cache, corpus):
+    for filepath in corpus[:3]:
+        expected = parse_mjlog_file(filepath)
+        assert cache.parse(filepath) == expected
+        assert cache.get(_hash_file(filepath)) == expected
+    assert cache.stats()['entries'] == 3
+
+
+@pytest.mark.parametrize('content', [
+    b'',
+    b'\x80\x04\x95',
+    pickle.dumps({'a': 1})[:-3],
+    b'\x80\xff',
+])
+def test_broken_entry(cache, content):
+    cache.put('0123', {'a': 1})
+    with open(cache._get_path('0123'), 'wb') as file_:
+        file_.write(content)
+    assert cache.get('0123') is None
+    assert not os.path.exists(cache._get_path('0123'))
+
+
+def test_evict(tmpdir):
+    cache = ParseCache(directory=str(tmpdir), max_size=10000)
+    data = b'x' * 1000
+    for i in range(30):
+        cache.put('{:04d}'.format(i), data)
+        os.utime(cache._get_path('{:04d}'.format(i)), (i, i))
+    stats = cache.stats()
+    assert 0 < stats['size'] <= 10000
+    # Least recently used entries are evicted first
+    assert cache.get('0029') == data
+    assert cache.get('0000') is None
+
+
+def test_clear_keeps_other_files(tmpdir):
+    unrelated = tmpdir.join('notes.txt')
+    unrelated.write('keep')
+    tmpdir.join('ab').mkdir().join('data.bin').write('keep')
+    cache = ParseCache(directory=str(tmpdir))
+    cache.put('0123', {'a': 1})
+    cache.put('4567', {'a': 2})
+    cache.clear()
+    assert cache.stats()['entries'] == 0
+    assert unrelated.read() == 'keep'
+    assert tmpdir.join('ab', 'data.bin').read() == 'keep'
+    assert not tmpdir.join('01').exists()
+
+
+def test_unwritable_directory(tmpdir, corpus):
+    # A file in place of the directory makes any write fail, regardless of
+    # the user privilege.
+    blocker = tmpdir.join('cache')
+    blocker.write('')
+    cache = ParseCache(directory=str(blocker.join('parse')))
+    assert cache.put('0123', {'a': 1}) is False
+    assert cache.get('0123') is None
+    assert cache.parse(corpus[0]) == parse_mjlog_file(corpus[0])
+
+
+
+def test_write_failure(tmpdir, monkeypatch):
+    def _rename(*_):
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+    cache = ParseCache(directory=str(tmpdir))
+    monkeypatch.setattr(os, 'rename', _rename)
+    assert cache.put('0123', {'a': 1}) is False
+    # Temporary file is removed
+    assert tmpdir.join('01').listdir() == []
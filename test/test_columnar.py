@@ -0,0 +1,87 @@
+"""Test columnar export against parsed games"""
+from __future__ import absolute_import
+
+import argparse
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# pylint: disable=wrong-import-position
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.parser import parse_mjlog_file, CALL_TYPES
+from tenhou_log_utils.columnar import TAG_CODES, export_npz
+from tenhou_log_utils.command.export_npz import main
+
+_TAGS = {code: tag for tag, code in TAG_CODES.items()}
+
+
+def _check_columns(columns, games, game_offset=0):
+    n_events = len(columns['tag'])
+    assert len(columns['offset']) == n_events + 1
+    assert columns['offset'][-1] == len(columns['tiles'])
+    i = 0
+    for i_game, game in enumerate(games, start=game_offset):
+        for i_round, round_ in enumerate(game['rounds']):
+            for i_event, item in enumerate(round_):
+                tag, data = item['tag'], item['data']
+                assert columns['game'][i] == i_game
+                assert columns['round'][i] == i_round
+                assert columns['event'][i] == i_event
+                assert _TAGS[columns['tag'][i]] == tag
+                tiles = columns['tiles'][
+                    columns['offset'][i]:columns['offset'][i + 1]].tolist()
+                if tag in ['DRAW', 'DISCARD']:
+                    assert columns['player'][i] == data['player']
+                    assert columns['tile'][i] == data['tile']
+                elif tag == 'CALL':
+                    assert columns['player'][i] == data['caller']
+                    assert columns['callee'][i] == data['callee']
+                    assert (CALL_TYPES[columns['call_type'][i]] ==
+                            data['call_type'])
+                    assert tiles == data['mentsu']
+                elif tag == 'INIT':
+                    assert tiles == sum(data['hands'], [])
+                elif tag == 'AGARI':
+                    assert columns['player'][i] == data['winner']
+                    assert columns['callee'][i] == data.get(
+                        'loser', data['winner'])
+                    assert tiles == data['hand']
+                i += 1
+    assert i == n_events
+
+
+def test_export_npz(corpus, tmpdir):
+    files = find_mjlog_files(corpus)
+    prefix = str(tmpdir.join('out', 'events'))
+    main(argparse.Namespace(inputs=corpus, prefix=prefix, games_per_shard=5))
+    games = [parse_mjlog_file(path) for path in files]
+    for index, start in enumerate(range(0, len(games), 5)):
+        with np.load('{}-{:05d}.npz'.format(prefix, index)) as data:
+            # Game indices are contiguous across shards
+            _check_columns(data, games[start:start + 5], game_offset=start)
+    assert not tmpdir.join('out', 'events-{:05d}.npz'.format(
+        index + 1)).check()
+
+
+def test_export_lazily(corpus, tmpdir, monkeypatch):
+    consumed, saved = [], []
+
+    def _iter_games():
+        for path in corpus[:5]:
+            consumed.append(path)
+            yield parse_mjlog_file(path)
+
+    savez = np.savez
+
+    def _savez(path, **kwargs):
+        saved.append(len(consumed))
+        savez(path, **kwargs)
+
+    monkeypatch.setattr(np, 'savez', _savez)
+    paths = export_npz(
+        _iter_games(), str(tmpdir.join('events')), games_per_shard=2)
+    # Each shard is written before the games of the next one are parsed
+    assert saved == [2, 4, 5]
+    assert [path[-10:] for path in paths] == [
+        '-00000.npz', '-00001.npz', '-00002.npz']
@@ -0,0 +1,71 @@
+"""Test memory-mapped sample dataset"""
+from __future__ import absolute_import
+
+import os
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# pylint: disable=wrong-import-position
+from tenhou_log_utils.features import (
+    SAMPLE_DTYPE, ShardWriter, write_manifest)
+from tenhou_log_utils.dataset import SampleDataset
+
+
+def _write(tmpdir, n_samples, samples_per_shard):
+    samples = np.zeros(n_samples, dtype=SAMPLE_DTYPE)
+    samples['label_tile'] = np.arange(n_samples) % 136
+    samples['info'][:, 0] = np.arange(n_samples) // 136
+    writer = ShardWriter(str(tmpdir.join('samples')), samples_per_shard)
+    writer.write(samples)
+    writer.flush()
+    manifest = str(tmpdir.join('manifest.json'))
+    write_manifest(manifest, writer.shards)
+    return manifest, samples
+
+
+def test_iter_batches(tmpdir):
+    manifest, samples = _write(tmpdir, 1000, 300)
+    with SampleDataset(manifest) as dataset:
+        assert len(dataset.shard(3)) == 100
+        batches = list(dataset.iter_batches(64, shuffle=False))
+        assert [len(batch) for batch in batches] == [64] * 15 + [40]
+        assert np.array_equal(np.concatenate(batches), samples)
+        batches = list(dataset.iter_batches(
+            64, seed=0, rank=1, world_size=2, drop_last=True))
+        assert [len(batch) for batch in batches] == [64] * 7
+        with pytest.raises(ValueError):
+            dataset.get_indices(rank=2, world_size=2)
+
+
+def test_close(tmpdir):
+    manifest, samples = _write(tmpdir, 100, 30)
+    dataset = SampleDataset(manifest)
+    sample, batch = dataset[-1], dataset.get_batch([3, 1])
+    dataset.close()
+    # Views taken before closing are still valid
+    assert sample == samples[-1]
+    assert np.array_equal(batch, samples[[3, 1]])
+    assert len(dataset) == 0
+    with pytest.raises(IndexError):
+        dataset[0]  # pylint: disable=pointless-statement
+
+
+def test_manifest_mismatch(tmpdir):
+    manifest, _ = _write(tmpdir, 100, 30)
+    with open(manifest, 'r') as file_:
+        data = json.load(file_)
+    data['shards'][0]['n_samples'] += 1
+    with open(manifest, 'w') as file_:
+        json.dump(data, file_)
+    with pytest.raises(ValueError):
+        SampleDataset(manifest)
+    data['shards'][0]['n_samples'] -= 1
+    with open(manifest, 'w') as file_:
+        json.dump(data, file_)
+    SampleDataset(manifest).close()
+    os.remove(str(tmpdir.join(data['shards'][1]['path'])))
+    with pytest.raises(IOError):
+        SampleDataset(manifest)
@@ -0,0 +1,148 @@
+"""Test bulk download against local HTTP server"""
+from __future__ import absolute_import
+
+import os
+import argparse
+import threading
+import collections
+import xml.etree.ElementTree as ET
+
+import pytest
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+from tenhou_log_utils.command.download import _BulkDownloader, bulk_main
+from tenhou_log_utils.parser import parse_mjlog_file, parse_mjlog
+from tenhou_log_utils.synthetic import generate_mjlog
+
+_MJLOG = generate_mjlog(0).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Respond according to log ID
+
+    - ``missing-*``: 404
+    - ``flaky-*``: 503 at the first request, then the log
+    - ``broken-*``: 200 with invalid body
+    - Others: the log
+    """
+    requests = collections.Counter()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        log_id = self.path.split('?', 1)[1]
+        self.requests[log_id] += 1
+        if log_id.startswith('missing-'):
+            self._respond(404, b'Not found')
+        elif log_id.startswith('flaky-') and self.requests[log_id] == 1:
+            self._respond(503, b'Unavailable')
+        elif log_id.startswith('broken-'):
+            self._respond(200, b'<html>')
+        else:
+            self._respond(200, _MJLOG)
+
+    def _respond(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.requests.clear()
+    httpd = HTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:{}/?'.format(httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get_downloader(output_dir, archive_url, retries=2):
+    return _BulkDownloader(
+        output_dir, workers=2, rate=0, retries=retries, backoff=0.01,
+        archive_url=archive_url)
+
+
+def test_download(server, tmpdir):
+    downloader = _get_downloader(str(tmpdir), server)
+    assert downloader.download('ok-0') == 'downloaded'
+    outpath = downloader.get_output_path('ok-0')
+    assert outpath.endswith('.mjlog.gz')
+    assert parse_mjlog_file(outpath) == parse_mjlog(ET.fromstring(_MJLOG))
+
+
+def test_not_found(server, tmpdir):
+    downloader = _get_downloader(str(tmpdir), server)
+    assert downloader.download('missing-0') == 'failed'
+    # 404 is not retried
+    assert _Handler.requests['missing-0'] == 1
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_retry(server, tmpdir):
+    downloader = _get_downloader(str(tmpdir), server)
+    assert downloader.download('flaky-0') == 'downloaded'
+    assert _Handler.requests['flaky-0'] == 2
+    assert os.path.exists(downloader.get_output_path('flaky-0'))
+
+
+def test_retry_exhausted(server, tmpdir):
+    downloader = _get_downloader(str(tmpdir), server, retries=0)
+    assert downloader.download('flaky-0') == 'failed'
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_invalid_data(server, tmpdir):
+    downloader = _get_downloader(str(tmpdir), server)
+    assert downloader.download('broken-0') == 'failed'
+    # No partial file is left
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_skip_existing(server, tmpdir):
+    downloader = _get_downloader(str(tmpdir), server)
+    outpath = downloader.get_output_path('ok-0')
+    with open(outpath, 'wb'):
+        pass
+    assert downloader.download('ok-0') == 'skipped'
+    assert not _Handler.requests
+
+
+def test_bulk_main(server, tmpdir):
+    id_file = tmpdir.join('ids.txt')
+    id_file.write('# comment\nok-0\nok-1\nok-0\n\nflaky-0\nok-1\n')
+    output_dir = str(tmpdir.join('logs'))
+    args = argparse.Namespace(
+        id_file=str(id_file), output_dir=output_dir, workers=4, rate=0,
+        retries=2, backoff=0.01, archive_url=server, no_gzip=False)
+    bulk_main(args)
+    assert sorted(os.listdir(output_dir)) == [
+        'flaky-0.mjlog.gz', 'ok-0.mjlog.gz', 'ok-1.mjlog.gz']
+    # Duplicated IDs are downloaded only once
+    assert _Handler.requests == {'ok-0': 1, 'ok-1': 1, 'flaky-0': 2}
+
+
+def test_bulk_main_failure(server, tmpdir):
+    id_file = tmpdir.join('ids.txt')
+    id_file.write('ok-0\nmissing-0\n')
+    output_dir = str(tmpdir.join('logs'))
+    args = argparse.Namespace(
+        id_file=str(id_file), output_dir=output_dir, workers=2, rate=0,
+        retries=2, backoff=0.01, archive_url=server, no_gzip=True)
+    with pytest.raises(SystemExit):
+        bulk_main(args)
+    assert os.listdir(output_dir) == ['ok-0.mjlog']
+
+
+def test_default_archive_url(tmpdir):
+    downloader = _BulkDownloader(
+        str(tmpdir), workers=1, rate=0, retries=0, backoff=0)
+    assert downloader.archive_url == 'http://tenhou.net/0/log/?'
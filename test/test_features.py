@@ -0,0 +1,118 @@
+"""Test feature extraction round trip through shards and dataset"""
+from __future__ import absolute_import
+
+import os
+import json
+import argparse
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# pylint: disable=wrong-import-position
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.parser import parse_mjlog_file
+from tenhou_log_utils.replay import GameState
+from tenhou_log_utils.features import extract_file, SCORE_OFFSET, PAD
+from tenhou_log_utils.dataset import SampleDataset
+from tenhou_log_utils.command.extract_features import main
+
+
+@pytest.fixture(scope='module')
+def extracted(corpus, tmpdir_factory):
+    """Manifest path and expected samples in the order of the dataset"""
+    output_dir = str(tmpdir_factory.mktemp('features'))
+    args = argparse.Namespace(
+        inputs=[os.path.dirname(corpus[0])], output_dir=output_dir,
+        samples_per_shard=500, files_per_job=5, workers=1)
+    main(args)
+    files = find_mjlog_files(args.inputs)
+    expected = np.concatenate([extract_file(path) for path in files])
+    return os.path.join(output_dir, 'manifest.json'), files, expected
+
+
+def test_manifest(extracted):
+    manifest, files, expected = extracted
+    with open(manifest, 'r') as file_:
+        data = json.load(file_)
+    assert data['n_files'] == len(files)
+    assert data['n_samples'] == len(expected)
+    # Several jobs, some of which write several shards
+    assert len(data['shards']) > 3
+    assert sum(shard['n_samples'] for shard in data['shards']) == len(expected)
+    assert all(shard['n_samples'] <= 500 for shard in data['shards'])
+
+
+def test_random_access(extracted):
+    manifest, _, expected = extracted
+    with SampleDataset(manifest) as dataset:
+        assert len(dataset) == len(expected)
+        for index in [0, 1, 499, 500, len(expected) - 1]:
+            assert dataset[index] == expected[index]
+            assert dataset[index - len(expected)] == expected[index]
+        assert dataset[-1] == expected[-1]
+        with pytest.raises(IndexError):
+            dataset[len(expected)]  # pylint: disable=pointless-statement
+        assert np.array_equal(
+            dataset.get_batch(np.arange(len(expected))), expected)
+        # Unordered batch spanning shards
+        indices = np.random.RandomState(0).permutation(len(expected))[:777]
+        assert np.array_equal(dataset.get_batch(indices), expected[indices])
+        assert np.array_equal(np.array(list(dataset)), expected)
+
+
+@pytest.mark.parametrize('world_size', [1, 2, 3, 8])
+def test_get_indices(extracted, world_size):
+    manifest, _, _ = extracted
+    with SampleDataset(manifest) as dataset:
+        parts = [
+            dataset.get_indices(seed=1, epoch=2, rank=rank,
+                                world_size=world_size)
+            for rank in range(world_size)
+        ]
+        merged = np.concatenate(parts)
+        # Disjoint and covering all the samples
+        assert len(merged) == len(dataset)
+        assert np.array_equal(np.sort(merged), np.arange(len(dataset)))
+        assert max(map(len, parts)) - min(map(len, parts)) <= 1
+        # Workers share the permutation, which changes with epoch
+        assert np.array_equal(
+            parts[0], dataset.get_indices(
+                seed=1, epoch=2, rank=0, world_size=world_size))
+        assert not np.array_equal(
+            merged, np.concatenate([
+                dataset.get_indices(seed=1, epoch=3, rank=rank,
+                                    world_size=world_size)
+                for rank in range(world_size)]))
+
+
+def test_sample_matches_replay(extracted):
+    manifest, files, _ = extracted
+    game = parse_mjlog_file(files[0])
+    n_players = 3 if game['meta']['GO']['config']['sanma'] else 4
+    # Pick a discard in the middle of the first round
+    state, index = GameState(), 0
+    for item in game['rounds'][0]:
+        if item['tag'] == 'DISCARD' and index == 10:
+            break
+        index += item['tag'] == 'DISCARD'
+        state.apply(item['tag'], item['data'])
+    assert item['tag'] == 'DISCARD' and index == 10
+    player, tile = item['data']['player'], item['data']['tile']
+    with SampleDataset(manifest) as dataset:
+        sample = dataset[10].copy()
+    assert sample['label'] == tile // 4
+    assert sample['label_tile'] == tile
+    hand = state.hands[player]
+    for i in range(4):
+        assert sample['hand'][i].tolist() == (hand > i).astype(int).tolist()
+    for seat in range(4):
+        if seat == 3 and n_players == 3:
+            assert sample['scores'][seat] == PAD
+            continue
+        other = (player + seat) % n_players
+        assert sample['scores'][seat] == (
+            state.scores[other] // 1000 + SCORE_OFFSET)
+        n_discards = state.n_discards[other]
+        assert sample['kawa'][seat, :n_discards].tolist() == (
+            state.discards[other, :n_discards].tolist())
@@ -0,0 +1,78 @@
+"""Test header reading and `grep` command"""
+from __future__ import absolute_import
+
+import os
+import logging
+import argparse
+
+import pytest
+
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.index import GameIndex, extract_metadata
+from tenhou_log_utils.header import read_header, HeaderFilter
+from tenhou_log_utils.parser import parse_mjlog_file
+from tenhou_log_utils.command.grep import main
+
+_CONDITIONS = [
+    {}, {'sanma': True}, {'ton_nan': False}, {'table': 'tenhou'},
+    {'min_rate': 2200.}, {'max_rate': 1600.}, {'min_dan': 18},
+    {'min_dan': 12, 'sanma': False}, {'player': 'NoName'},
+]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 4096])
+def test_read_header(corpus, chunk_size):
+    for filepath in corpus:
+        expected = parse_mjlog_file(filepath)['meta']
+        assert read_header(filepath, chunk_size=chunk_size) == expected
+
+
+def test_filter(corpus, tmpdir):
+    # Same result as the index
+    files = sorted(os.path.abspath(path) for path in corpus)
+    with GameIndex(str(tmpdir.join('index.db'))) as index:
+        for path in files:
+            stat = os.stat(path)
+            index.put(
+                path, stat.st_mtime, stat.st_size, extract_metadata(path))
+        for condition in _CONDITIONS:
+            expected = [game['path'] for game in index.query(**condition)]
+            header_filter = HeaderFilter(**condition)
+            matched = [
+                path for path in files if header_filter(read_header(path))]
+            assert matched == expected, condition
+
+
+def _grep(inputs, caplog, workers=1, limit=None, **condition):
+    args = argparse.Namespace(
+        inputs=inputs, player=None, min_rate=None, max_rate=None,
+        min_dan=None, table=None, lobby=None, ton_nan=None, sanma=None,
+        workers=workers, chunksize=2, limit=limit)
+    for key, value in condition.items():
+        setattr(args, key, value)
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger='tenhou_log_utils.command'):
+        main(args)
+    return [
+        record.getMessage() for record in caplog.records
+        if record.levelno == logging.INFO]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_grep(corpus, caplog, workers):
+    files = find_mjlog_files(corpus)
+    expected = [
+        path for path in files
+        if not parse_mjlog_file(path)['meta']['GO']['config']['sanma']]
+    assert 2 < len(expected) < len(files)
+    assert _grep(corpus, caplog, workers, sanma=False) == expected
+    # Matches are printed in the order of files, up to the limit
+    assert _grep(
+        corpus, caplog, workers, limit=2, sanma=False) == expected[:2]
+
+
+def test_grep_failure(corpus, caplog, tmpdir):
+    broken = tmpdir.join('broken.mjlog')
+    broken.write('<mjloggm ver="2.3"><GO type=')
+    with pytest.raises(SystemExit):
+        _grep([corpus[0], str(broken)], caplog)
@@ -0,0 +1,110 @@
+"""Test SQLite game index against parsed games"""
+from __future__ import absolute_import
+
+import os
+import shutil
+import collections
+import argparse
+
+import pytest
+
+from tenhou_log_utils.io import find_mjlog_files
+from tenhou_log_utils.index import GameIndex
+from tenhou_log_utils.parser import parse_mjlog_file
+from tenhou_log_utils.command.index import main
+
+
+@pytest.fixture
+def indexed(corpus, tmpdir):
+    """Copy of the corpus, index built on it and parsed games"""
+    directory = tmpdir.mkdir('logs')
+    for path in corpus:
+        shutil.copy(path, str(directory))
+    db_path = str(tmpdir.join('index.db'))
+    _index(str(directory), db_path)
+    games = {
+        os.path.abspath(path): parse_mjlog_file(path)
+        for path in find_mjlog_files([str(directory)])
+    }
+    return str(directory), db_path, games
+
+
+def _index(directory, db_path, prune=False):
+    main(argparse.Namespace(
+        inputs=[directory], index=db_path, prune=prune, workers=1,
+        chunksize=4))
+
+
+def _matches(game, player=None, min_rate=None, sanma=None):
+    if sanma is not None and game['meta']['GO']['config']['sanma'] != sanma:
+        return False
+    players = [
+        p for p in game['meta']['UN']
+        if player is None or p['name'] == player]
+    if min_rate is not None:
+        players = [p for p in players if p['rate'] >= min_rate]
+    return bool(players)
+
+
+def test_index(indexed):
+    _, db_path, games = indexed
+    with GameIndex(db_path) as index:
+        assert index.count() == len(games)
+        results = index.query()
+    assert [game['path'] for game in results] == sorted(games)
+    for result in results:
+        game = games[result['path']]
+        meta = game['meta']
+        assert result['table'] == meta['GO']['table']
+        assert result['lobby'] == meta['GO']['lobby']
+        assert result['sanma'] == meta['GO']['config']['sanma']
+        assert result['ton-nan'] == meta['GO']['config']['ton-nan']
+        assert result['n_rounds'] == len(game['rounds'])
+        scores = game['rounds'][-1][-1]['data']['result']['scores']
+        assert [p['name'] for p in result['players']] == [
+            p['name'] for p in meta['UN']]
+        assert [p['score'] for p in result['players']] == scores
+
+
+def test_query(indexed):
+    _, db_path, games = indexed
+    # Player who took part in some of the games only
+    names = collections.Counter(
+        player['name'] for game in games.values()
+        for player in game['meta']['UN'] if player['name'])
+    name = names.most_common()[-1][0]
+    conditions = [
+        {'sanma': True}, {'sanma': False}, {'player': name},
+        {'player': name, 'sanma': False}, {'min_rate': 2200.},
+        {'player': name, 'min_rate': 1800.},
+    ]
+    with GameIndex(db_path) as index:
+        for condition in conditions:
+            expected = sorted(
+                path for path, game in games.items()
+                if _matches(game, **condition))
+            results = index.query(**condition)
+            if len(condition) == 1:
+                assert 0 < len(expected) < len(games), condition
+            assert [game['path'] for game in results] == expected, condition
+            assert [
+                game['path'] for game in index.query(limit=2, **condition)
+            ] == expected[:2]
+
+
+def test_refresh(indexed):
+    directory, db_path, games = indexed
+    paths = sorted(games)
+    with GameIndex(db_path) as index:
+        assert index.find_stale(paths) == []
+        # Only the modified file is indexed again
+        stat = os.stat(paths[0])
+        os.utime(paths[0], (stat.st_atime, stat.st_mtime + 10))
+        assert [path for path, _, _ in index.find_stale(paths)] == paths[:1]
+    _index(directory, db_path)
+    os.remove(paths[1])
+    _index(directory, db_path, prune=True)
+    with GameIndex(db_path) as index:
+        assert index.find_stale(paths[:1] + paths[2:]) == []
+        assert index.count() == len(paths) - 1
+        assert paths[1] not in [game['path'] for game in index.query()]
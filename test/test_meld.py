@@ -0,0 +1,55 @@
+"""Test table-driven meld decoding over the whole 16-bit domain"""
+from __future__ import absolute_import
+
+import pytest
+
+# pylint: disable=protected-access
+from tenhou_log_utils import parser
+from tenhou_log_utils.parser import CALL_TYPES, decode_meld, decode_melds
+
+
+def _reference(meld):
+    """Dispatch of `_parse_call` before `decode_meld` was introduced"""
+    callee_rel = meld & 0x3
+    if meld & (1 << 2):
+        return 'Chi', callee_rel, parser._parse_shuntsu(meld)
+    if meld & (1 << 3):
+        return 'Pon', callee_rel, parser._parse_koutsu(meld)
+    if meld & (1 << 4):
+        return 'KaKan', callee_rel, parser._parse_kakan(meld)
+    if meld & (1 << 5):
+        return 'Nuki', callee_rel, [meld >> 8]
+    type_ = 'MinKan' if callee_rel else 'AnKan'
+    return type_, callee_rel, parser._parse_kan(meld)
+
+
+EXPECTED = [_reference(meld) for meld in range(1 << 16)]
+
+
+def test_decode_meld():
+    for meld, expected in enumerate(EXPECTED):
+        assert decode_meld(meld) == expected
+        # Cached result
+        assert decode_meld(meld) == expected
+
+
+def test_parse_call():
+    for meld in range(0, 1 << 16, 7):
+        type_, callee_rel, mentsu = EXPECTED[meld]
+        for caller in range(4):
+            call = parser._parse_call({'who': str(caller), 'm': str(meld)})
+            assert call == {
+                'caller': caller, 'callee': (caller + callee_rel) % 4,
+                'call_type': type_, 'mentsu': mentsu,
+            }
+
+
+def test_decode_melds():
+    np = pytest.importorskip('numpy')
+    types, callees, mentsu = decode_melds(np.arange(1 << 16))
+    assert mentsu.shape == (1 << 16, 4)
+    for meld, (type_, callee_rel, tiles) in enumerate(EXPECTED):
+        assert CALL_TYPES[types[meld]] == type_
+        assert callees[meld] == callee_rel
+        row = mentsu[meld].tolist()
+        assert row == tiles + [-1] * (4 - len(tiles))
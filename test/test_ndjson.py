@@ -0,0 +1,57 @@
+"""Test NDJSON output of parse command"""
+from __future__ import absolute_import
+
+import json
+import argparse
+
+from tenhou_log_utils.parser import parse_mjlog_file, iter_mjlog
+from tenhou_log_utils.command.parse import main
+
+
+def _parse(filepath, output, unit='event', tags=None, fields=None):
+    main(argparse.Namespace(
+        input=filepath, output=output, format='ndjson', unit=unit, tags=tags,
+        fields=fields, no_cache=True))
+    with open(output, 'rb') as file_:
+        return [json.loads(line.decode('utf-8')) for line in file_]
+
+
+def _normalize(obj):
+    # Tuples become lists
+    return json.loads(json.dumps(obj))
+
+
+def test_event(corpus, tmpdir):
+    output = str(tmpdir.join('out.ndjson'))
+    for filepath in corpus:
+        expected = _normalize(list(iter_mjlog(filepath)))
+        assert _parse(filepath, output) == expected
+        expected = _normalize(list(iter_mjlog(filepath, tags=['AGARI'])))
+        assert _parse(filepath, output, tags=['AGARI']) == expected
+
+
+def test_round(corpus, tmpdir):
+    output = str(tmpdir.join('out.ndjson'))
+    for filepath in corpus:
+        game = _normalize(parse_mjlog_file(filepath))
+        lines = _parse(filepath, output, unit='round')
+        assert lines[0] == {'meta': game['meta']}
+        assert lines[1:] == [
+            {'round': i, 'events': round_}
+            for i, round_ in enumerate(game['rounds'])]
+
+
+def test_round_with_tags(corpus, tmpdir):
+    output = str(tmpdir.join('out.ndjson'))
+    for filepath in corpus:
+        game = _normalize(parse_mjlog_file(filepath))
+        lines = _parse(
+            filepath, output, unit='round', tags=['AGARI', 'RYUUKYOKU'])
+        # INIT is kept to delimit rounds, though not requested
+        assert lines[0] == {'meta': {}}
+        assert len(lines) == len(game['rounds']) + 1
+        for line, round_ in zip(lines[1:], game['rounds']):
+            assert line['events'] == [
+                event for event in round_
+                if event['tag'] in ['INIT', 'AGARI', 'RYUUKYOKU']]
+            assert line['events'][0]['tag'] == 'INIT'
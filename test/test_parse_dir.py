@@ -0,0 +1,32 @@
+"""Test output paths of `parse-dir`"""
+from __future__ import absolute_import
+
+import os
+
+import pytest
+
+# pylint: disable=protected-access
+from tenhou_log_utils.command.parse_dir import _get_output_paths
+
+
+def test_mirror_relative_paths():
+    files = [
+        os.path.join('logs', 'a', 'g.mjlog'),
+        os.path.join('logs', 'b', 'g.mjlog.gz'),
+    ]
+    assert _get_output_paths(files, 'out') == [
+        os.path.join('out', 'a', 'g.json'),
+        os.path.join('out', 'b', 'g.json'),
+    ]
+
+
+def test_single_directory():
+    files = [os.path.join('logs', 'g.mjlog'), os.path.join('logs', 'h.mjlog')]
+    assert _get_output_paths(files, 'out') == [
+        os.path.join('out', 'g.json'), os.path.join('out', 'h.json')]
+
+
+def test_collision():
+    files = [os.path.join('logs', 'g.mjlog'), os.path.join('logs', 'g.mjlog.gz')]
+    with pytest.raises(ValueError):
+        _get_output_paths(files, 'out')
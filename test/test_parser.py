@@ -0,0 +1,55 @@
+"""Test field projection against full parser"""
+from __future__ import absolute_import
+
+import pytest
+
+from tenhou_log_utils.io import load_mjlog
+from tenhou_log_utils.parser import (
+    parse_node, parse_node_fields, parse_mjlog_file, compile_fields,
+    iter_mjlog, _FIELD_PARSERS, _OUTPUT_TAGS)
+from tenhou_log_utils.stats import GameStats, FIELDS
+
+
+def _all_fields():
+    fields = []
+    for tag in sorted(_OUTPUT_TAGS):
+        if tag in _FIELD_PARSERS:
+            fields.extend(
+                '{}.{}'.format(tag, name) for name in _FIELD_PARSERS[tag])
+        else:
+            fields.append(tag)
+    return fields
+
+
+def test_all_fields(corpus):
+    projection = compile_fields(_all_fields())
+    assert all(projection[tag] for tag in _FIELD_PARSERS)
+    n_nodes = 0
+    for filepath in corpus:
+        for node in load_mjlog(filepath):
+            expected = parse_node(node.tag, node.attrib)
+            assert parse_node_fields(
+                node.tag, node.attrib, projection) == expected
+            n_nodes += 1
+        assert parse_mjlog_file(
+            filepath, fields=_all_fields()) == parse_mjlog_file(filepath)
+        assert list(iter_mjlog(
+            filepath, fields=_all_fields())) == list(iter_mjlog(filepath))
+    assert n_nodes
+
+
+def test_stats_fields(corpus):
+    full, projected = GameStats(), GameStats()
+    for filepath in corpus:
+        full.fold(parse_mjlog_file(filepath))
+        projected.fold(parse_mjlog_file(filepath, fields=FIELDS))
+    assert projected.to_dict() == full.to_dict()
+    assert full.to_dict()['groups']
+
+
+def test_unknown_tag():
+    projection = compile_fields(['AGARI'])
+    with pytest.raises(NotImplementedError):
+        parse_node('BAR', {})
+    with pytest.raises(NotImplementedError):
+        parse_node_fields('BAR', {}, projection)
@@ -0,0 +1,82 @@
+"""Test buffered renderer against logging-based viewer"""
+from __future__ import absolute_import
+
+import io
+import logging
+import argparse
+
+import pytest
+
+from tenhou_log_utils.parser import parse_mjlog_file
+from tenhou_log_utils.renderer import Renderer
+from tenhou_log_utils.viewer import print_node
+from tenhou_log_utils.command.view import main as view_main
+
+
+@pytest.fixture
+def captured():
+    """Capture viewer logs with the format used by the command"""
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = logging.getLogger('tenhou_log_utils.viewer')
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield stream
+    logger.removeHandler(handler)
+    logger.setLevel(level)
+
+
+def _render_legacy(game, stream):
+    for tag in ['SHUFFLE', 'GO', 'UN', 'TAIKYOKU']:
+        if tag in game['meta']:
+            print_node(tag, game['meta'][tag])
+    for round_ in game['rounds']:
+        # Separator logged by `view` command
+        stream.write(u'=' * 40 + u'\n')
+        for node in round_:
+            print_node(node['tag'], node['data'])
+
+
+def test_renderer(corpus, captured):
+    for filepath in corpus:
+        game = parse_mjlog_file(filepath)
+        captured.seek(0)
+        captured.truncate()
+        _render_legacy(game, captured)
+
+        rendered = io.StringIO()
+        renderer = Renderer(rendered)
+        renderer.render_meta(game['meta'])
+        for round_ in game['rounds']:
+            renderer.render_round(round_)
+        expected = captured.getvalue().encode('utf-8')
+        assert expected
+        assert rendered.getvalue().encode('utf-8') == expected
+
+
+def _view_args(input_, round_):
+    return argparse.Namespace(
+        input=input_, round=round_, no_cache=True, legacy_renderer=False)
+
+
+def test_view_round(corpus, capsys):
+    game = parse_mjlog_file(corpus[0])
+    n_rounds = len(game['rounds'])
+    view_main(_view_args(corpus[0], n_rounds - 1))
+    rendered = io.StringIO()
+    renderer = Renderer(rendered)
+    renderer.render_meta(game['meta'])
+    renderer.render_round(game['rounds'][-1])
+    assert capsys.readouterr().out == rendered.getvalue()
+
+
+@pytest.mark.parametrize('offset', [0, 5])
+def test_view_round_out_of_range(corpus, capsys, offset):
+    n_rounds = len(parse_mjlog_file(corpus[0])['rounds'])
+    for round_ in [n_rounds + offset, -n_rounds - 1 - offset]:
+        with pytest.raises(SystemExit) as error:
+            view_main(_view_args(corpus[0], round_))
+        assert error.value.code
+        assert capsys.readouterr().out == ''
@@ -0,0 +1,72 @@
+"""Test game state replay against parsed logs"""
+from __future__ import absolute_import
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# pylint: disable=wrong-import-position
+from tenhou_log_utils.parser import parse_mjlog_file
+from tenhou_log_utils.replay import GameState, Replay
+
+
+def _assert_state_equal(state, expected):
+    # pylint: disable=protected-access
+    for name in GameState._ARRAYS:
+        np.testing.assert_array_equal(
+            getattr(state, name), getattr(expected, name), err_msg=name)
+    for name in GameState._SCALARS:
+        assert getattr(state, name) == getattr(expected, name), name
+
+
+@pytest.mark.parametrize('interval', [1, 5, 16])
+def test_state_at(corpus, interval):
+    for filepath in corpus[:4]:
+        replay = Replay(parse_mjlog_file(filepath), interval=interval)
+        for round_ in range(len(replay.rounds)):
+            # Query out of order so that snapshots are used
+            states = [s.copy() for _, s in replay.iter_states(round_)]
+            for event in reversed(range(len(states))):
+                _assert_state_equal(
+                    replay.state_at(round_, event), states[event])
+            _assert_state_equal(replay.state_at(round_, -1), states[-1])
+            with pytest.raises(IndexError):
+                replay.state_at(round_, len(states))
+
+
+def test_scores(corpus):
+    n_checked = 0
+    for filepath in corpus:
+        rounds = parse_mjlog_file(filepath)['rounds']
+        for round_, next_round in zip(rounds, rounds[1:]):
+            state = GameState()
+            for item in round_:
+                data = item['data']
+                if item['tag'] in ['AGARI', 'RYUUKYOKU']:
+                    # Scores tracked from INIT and riichi deposits
+                    n_scores = len(data['scores'])
+                    assert state.scores[:n_scores].tolist() == data['scores']
+                    expected = [
+                        score + gain
+                        for score, gain in zip(data['scores'], data['gains'])]
+                state.apply(item['tag'], data)
+            assert state.scores[:n_scores].tolist() == expected
+            assert expected == next_round[0]['data']['scores']
+            n_checked += 1
+    assert n_checked
+
+
+def test_reset_in_place(corpus):
+    game = parse_mjlog_file(corpus[0])
+    state = GameState()
+    # pylint: disable=protected-access
+    arrays = [getattr(state, name) for name in GameState._ARRAYS]
+    for round_ in game['rounds']:
+        for item in round_:
+            state.apply(item['tag'], item['data'])
+    fresh = GameState()
+    fresh.apply('INIT', game['rounds'][-1][0]['data'])
+    state.apply('INIT', game['rounds'][-1][0]['data'])
+    _assert_state_equal(state, fresh)
+    for name, array in zip(GameState._ARRAYS, arrays):
+        assert getattr(state, name) is array
@@ -0,0 +1,206 @@
+"""Test shanten and ukeire against brute-force search"""
+from __future__ import absolute_import
+
+import random
+import itertools
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# pylint: disable=wrong-import-position
+from tenhou_log_utils.shanten import (
+    shanten, shanten_batch, standard_shanten, chiitoitsu_shanten,
+    kokushi_shanten, is_tenpai, ukeire, ukeire_batch)
+
+_YAOCHU = [0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33]
+
+
+###############################################################################
+# Brute force: the minimum number of tiles to add so that the tiles of the
+# hand are contained in a complete hand, minus one, searched over all the
+# decompositions of complete hands kind by kind. Complete hands never hold
+# more than four copies of a tile.
+def _brute_standard(hand, n_melds):
+    memo = {}
+
+    def _search(kind, prev1, prev2, blocks, pair):
+        # prev1, prev2: sequences started at the previous two kinds
+        if kind == 34:
+            return 0 if blocks == pair == 0 else 99
+        key = kind, prev1, prev2, blocks, pair
+        if key not in memo:
+            best = 99
+            max_seq = blocks if kind < 27 and kind % 9 <= 6 else 0
+            for seq, triplet, pair_ in itertools.product(
+                    range(max_seq + 1), range(2), range(pair + 1)):
+                need = prev1 + prev2 + seq + 3 * triplet + 2 * pair_
+                if need > 4 or seq + triplet > blocks:
+                    continue
+                best = min(best, max(need - hand[kind], 0) + _search(
+                    kind + 1, seq, prev1, blocks - seq - triplet,
+                    pair - pair_))
+            memo[key] = best
+        return memo[key]
+
+    return _search(0, 0, 0, 4 - n_melds, 1) - 1
+
+
+def _brute_chiitoitsu(hand):
+    # Best seven distinct kinds
+    best = sorted((min(count, 2) for count in hand), reverse=True)[:7]
+    return 14 - sum(best) - 1
+
+
+def _brute_kokushi(hand):
+    costs = []
+    for double in _YAOCHU:
+        costs.append(sum(
+            max((2 if kind == double else 1) - hand[kind], 0)
+            for kind in _YAOCHU))
+    return min(costs) - 1
+
+
+def _brute(hand, n_melds=0):
+    result = _brute_standard(hand, n_melds)
+    if n_melds == 0:
+        result = min(result, _brute_chiitoitsu(hand), _brute_kokushi(hand))
+    return result
+
+
+###############################################################################
+def _random_hands(n_hands, n_tiles, seed):
+    rng = random.Random(seed)
+    hands = np.zeros((n_hands, 34), dtype=np.int64)
+    for i in range(n_hands):
+        for tile in rng.sample(range(136), n_tiles):
+            hands[i, tile // 4] += 1
+    return hands
+
+
+def _near_complete_hands(n_hands, seed):
+    """13-tile hands made by dropping a tile from a complete-ish hand"""
+    rng = random.Random(seed)
+    hands = np.zeros((n_hands, 34), dtype=np.int64)
+    for i in range(n_hands):
+        hand = hands[i]
+        while hand.sum() < 12:
+            if rng.random() < 0.5:
+                kind = rng.choice([k for k in range(27) if k % 9 <= 6])
+                tiles = [kind, kind + 1, kind + 2]
+            else:
+                tiles = [rng.randrange(34)] * 3
+            if all(hand[t] + tiles.count(t) <= 4 for t in tiles):
+                for tile in tiles:
+                    hand[tile] += 1
+        kinds = [k for k in range(34) if hand[k] <= 2]
+        hand[rng.choice(kinds)] += 1
+    return hands
+
+
+@pytest.mark.parametrize('n_tiles,seed', [(13, 0), (14, 1), (7, 2), (10, 3)])
+def test_random_hands(n_tiles, seed):
+    hands = _random_hands(300, n_tiles, seed)
+    n_melds = (14 - n_tiles) // 3
+    result = shanten_batch(hands)
+    expected = [_brute(hand.tolist(), n_melds) for hand in hands]
+    assert result.tolist() == expected
+
+
+def test_near_complete_hands():
+    hands = _near_complete_hands(300, seed=4)
+    result = shanten_batch(hands)
+    expected = [_brute(hand.tolist()) for hand in hands]
+    assert result.tolist() == expected
+    assert min(expected) == 0
+
+
+def test_ukeire():
+    hands = np.concatenate(
+        [_random_hands(20, 13, 5), _near_complete_hands(20, seed=6)])
+    result = ukeire_batch(hands)
+    for hand, counts in zip(hands.tolist(), result.tolist()):
+        current = _brute(hand)
+        for kind in range(34):
+            expected = 0
+            if hand[kind] < 4:
+                hand[kind] += 1
+                if _brute(hand) < current:
+                    expected = 4 - (hand[kind] - 1)
+                hand[kind] -= 1
+            assert counts[kind] == expected
+
+
+###############################################################################
+def _counts(kinds):
+    hand = [0] * 34
+    for kind in kinds:
+        hand[kind] += 1
+    return hand
+
+
+def test_chiitoitsu():
+    hand = _counts([0, 0, 4, 4, 10, 10, 15, 15, 20, 20, 30, 30, 33])
+    assert chiitoitsu_shanten([hand]).tolist() == [0]
+    assert shanten(hand) == 0
+    assert ukeire(hand) == {33: 3}
+    # Four of a kind is not two pairs: 5 pairs, and a single tile
+    hand = _counts([0, 0, 0, 0, 4, 4, 10, 10, 15, 15, 20, 20, 33])
+    assert chiitoitsu_shanten([hand]).tolist() == [2]
+    assert _brute_chiitoitsu(hand) == 2
+    complete = _counts([0, 0, 4, 4, 10, 10, 15, 15, 20, 20, 30, 30, 33, 33])
+    assert shanten(complete) == -1
+
+
+def test_kokushi():
+    hand = _counts(_YAOCHU)
+    assert kokushi_shanten([hand]).tolist() == [0]
+    assert shanten(hand) == 0
+    # Thirteen-sided wait
+    assert ukeire(hand) == {kind: 3 for kind in _YAOCHU}
+    assert shanten(_counts(_YAOCHU + [0])) == -1
+    hand = _counts(_YAOCHU[:12] + [0])
+    assert shanten(hand) == 0
+    assert ukeire(hand) == {33: 4}
+
+
+def test_tenpai():
+    # 123m 456m 789m 11p 23s: waits on 1s and 4s
+    hand = _counts([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 19, 20])
+    assert is_tenpai(hand)
+    assert ukeire(hand) == {18: 4, 21: 4}
+    visible = [0] * 34
+    visible[18] = 3
+    assert ukeire(hand, visible=visible) == {18: 1, 21: 4}
+    assert standard_shanten([hand]).tolist() == [0]
+    assert not is_tenpai(_counts([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 11, 19, 27]))
+
+
+def test_waiting_on_held_tiles():
+    # 1111m + 234p 567p 789s: waits only on the fifth 1m
+    hand = _counts([0, 0, 0, 0, 10, 11, 12, 13, 14, 15, 24, 25, 26])
+    assert shanten(hand) == _brute(hand) == 1
+
+
+def test_melds():
+    # Two calls: 123m 45p 99s (7 tiles)
+    hand = _counts([0, 1, 2, 12, 13, 26, 26])
+    assert shanten(hand) == 0
+    assert shanten(hand, n_melds=2) == 0
+    assert ukeire(hand) == {11: 4, 14: 4}
+    # Chii-toitsu is not allowed after calls
+    pairs = _counts([0, 0, 4, 4, 10, 10, 33])
+    assert shanten(pairs) == _brute(pairs, n_melds=2) == 1
+
+
+def test_invalid_hands():
+    with pytest.raises(ValueError):
+        shanten(_counts(list(range(15))))
+    with pytest.raises(ValueError):
+        shanten(_counts(list(range(13))), n_melds=1)
+    with pytest.raises(ValueError):
+        shanten([5] + [0] * 33)
+    with pytest.raises(ValueError):
+        shanten_batch([[0] * 33])
+    with pytest.raises(ValueError):
+        ukeire(_counts(list(range(14))))
@@ -0,0 +1,64 @@
+"""Test mergeable game statistics"""
+from __future__ import absolute_import
+
+import xml.etree.ElementTree as ET
+
+from tenhou_log_utils.parser import parse_mjlog
+from tenhou_log_utils.stats import GameStats
+
+_HAI = ','.join(str(i) for i in range(13))
+_MJLOG = '''<mjloggm ver="2.3">
+<GO type="169" lobby="0"/>
+<UN n0="a" n1="b" n2="c" n3="d" dan="9,9,9,9"
+    rate="1500.00,1500.00,1500.00,1500.00" sx="M,M,M,M"/>
+<TAIKYOKU oya="0"/>
+<INIT seed="0,0,0,1,2,3" ten="250,250,250,250" oya="0"
+    hai0="{hai}" hai1="{hai}" hai2="{hai}" hai3="{hai}"/>
+<AGARI ba="0,1" hai="0,4,8,12,16,20,24,28,32,36,40,44,48,52" machi="52"
+    ten="40,8000,1" yaku="1,1,0,1,52,0,53,2,54,0" doraHai="60"
+    doraHaiUra="64" who="0" fromWho="1" sc="250,90,250,-90,250,0,250,0"/>
+<INIT seed="1,0,0,1,2,3" ten="340,160,250,250" oya="1"
+    hai0="{hai}" hai1="{hai}" hai2="{hai}" hai3="{hai}"/>
+<RYUUKYOKU ba="0,0" sc="340,0,160,0,250,0,250,0"
+    owari="340,44.0,160,-24.0,250,5.0,250,-25.0"/>
+</mjloggm>'''.format(hai=_HAI)
+
+
+def _get_game():
+    return parse_mjlog(ET.fromstring(_MJLOG))
+
+
+def test_fold():
+    stats = GameStats()
+    stats.fold(_get_game())
+    group = stats.groups['0/tenhou']
+    assert group['count'] == {
+        'games': 1, 'rounds': 2, 'player_rounds': 8, 'agari': 1, 'ron': 1,
+        'ryuukyoku': 1}
+    # Dora (52) and aka-dora (54) with 0 han are not counted.
+    assert group['yaku'] == {'1': 1, '0': 1, '53': 1}
+    assert group['ryuukyoku'] == {'exhaustive': 1}
+    assert group['point_sum'] == {'1': 8000}
+    assert group['point_count'] == {'1': 1}
+    summary = stats.summarize()['0/tenhou']
+    assert summary['yaku'] == {1: 1., 0: 1., 53: 1.}
+    assert summary['deal_in_rate'] == 1 / 8.
+
+
+def test_merge_and_serialize(tmpdir):
+    stats1, stats2 = GameStats(), GameStats()
+    stats1.fold(_get_game())
+    stats2.fold(_get_game())
+    stats2.fold(_get_game())
+    merged = GameStats().merge(stats1).merge(stats2)
+    group = merged.groups['0/tenhou']
+    assert group['count']['games'] == 3
+    assert group['yaku'] == {'1': 3, '0': 3, '53': 3}
+
+    path = str(tmpdir.join('stats.json'))
+    merged.save(path)
+    restored = GameStats.load(path)
+    assert restored.to_dict() == merged.to_dict()
+    assert restored.summarize() == merged.summarize()
+    assert set(merged.to_dict()) == {'groups'}
+
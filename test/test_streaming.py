@@ -0,0 +1,29 @@
+"""Test streaming parser against parsing the whole XML tree"""
+from __future__ import absolute_import
+
+from tenhou_log_utils.io import load_mjlog, iter_mjlog_nodes
+from tenhou_log_utils.parser import (
+    parse_mjlog, parse_mjlog_file, iter_mjlog, iter_game)
+
+
+def test_iter_mjlog_nodes(corpus):
+    for filepath in corpus:
+        expected = [(node.tag, node.attrib) for node in load_mjlog(filepath)]
+        assert list(iter_mjlog_nodes(filepath)) == expected
+
+
+def test_parse_mjlog_file(corpus):
+    for filepath in corpus:
+        root = load_mjlog(filepath)
+        assert parse_mjlog_file(filepath) == parse_mjlog(root)
+        tags = ['INIT', 'AGARI', 'N']
+        assert parse_mjlog_file(filepath, tags=tags) == parse_mjlog(root, tags)
+        assert list(iter_mjlog(filepath, tags=tags)) == parse_mjlog(root, tags)
+
+
+def test_iter_game(corpus):
+    for filepath in corpus:
+        expected = parse_mjlog(load_mjlog(filepath))
+        game = iter_game(iter_mjlog(filepath))
+        assert next(game) == expected['meta']
+        assert list(game) == expected['rounds']
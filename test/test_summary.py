@@ -0,0 +1,43 @@
+"""Test byte-level summary scanner against the full parser"""
+from __future__ import absolute_import
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from tenhou_log_utils.parser import parse_mjlog, parse_mjlog_file
+from tenhou_log_utils.summary import extract_summary, scan_summary
+from tenhou_log_utils.synthetic import generate_mjlog
+
+
+def _expected(game):
+    meta = game['meta']
+    expected = {
+        'results': [
+            item for round_ in game['rounds'] for item in round_
+            if item['tag'] in ['AGARI', 'RYUUKYOKU']
+        ],
+    }
+    for tag in ['GO', 'UN']:
+        if tag in meta:
+            expected[tag] = meta[tag]
+    return expected
+
+
+def test_extract_summary(corpus):
+    for filepath in corpus:
+        expected = _expected(parse_mjlog_file(filepath))
+        assert extract_summary(filepath) == expected
+
+
+@pytest.mark.parametrize('name', [
+    'a&#38;b',
+    'a&#x26;b&#x3C;',
+    '&amp;&lt;&gt;&quot;&apos;',
+    '&#12354;&#x3044;',
+])
+def test_character_references(name):
+    data = generate_mjlog(0).replace('n2="player"', 'n2="{}"'.format(name))
+    data = data.encode('utf-8')
+    expected = _expected(parse_mjlog(ET.fromstring(data)))
+    assert scan_summary(data) == expected
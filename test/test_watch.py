@@ -0,0 +1,87 @@
+"""Test incremental processing of `Watcher`"""
+from __future__ import absolute_import
+
+import os
+import shutil
+
+import pytest
+
+from tenhou_log_utils.watch import Watcher
+
+
+class _Crash(BaseException):
+    pass
+
+
+class _Recorder(object):
+    def __init__(self, crash_at=None, fail=()):
+        self.processed = []
+        self.flushed = 0
+        self.crash_at = crash_at
+        self.fail = fail
+
+    def __call__(self, path, *_):
+        if len(self.processed) == self.crash_at:
+            raise _Crash()
+        self.processed.append(os.path.basename(path))
+        if os.path.basename(path) in self.fail:
+            raise ValueError(path)
+
+    def flush(self):
+        self.flushed += 1
+
+
+@pytest.fixture
+def spool(corpus, tmpdir):
+    directory = tmpdir.mkdir('spool')
+    for filepath in corpus[:10]:
+        shutil.copy(filepath, str(directory))
+    return str(directory)
+
+
+def _names(spool):
+    return sorted(os.listdir(spool))
+
+
+def test_poll(spool, tmpdir):
+    checkpoint = str(tmpdir.join('checkpoint.json'))
+    recorder = _Recorder(fail=[_names(spool)[0]])
+    watcher = Watcher([spool], [recorder], checkpoint=checkpoint, settle=0)
+    assert watcher.poll() == (10, 1)
+    assert recorder.processed == _names(spool)
+    assert watcher.poll() == (0, 0)
+
+    # Restart: only new and modified files are processed.
+    recorder = _Recorder()
+    watcher = Watcher([spool], [recorder], checkpoint=checkpoint, settle=0)
+    modified = os.path.join(spool, _names(spool)[1])
+    os.utime(modified, (0, 0))
+    shutil.copy(modified, os.path.join(spool, 'new.mjlog'))
+    assert watcher.poll() == (2, 0)
+    assert sorted(recorder.processed) == [_names(spool)[1], 'new.mjlog']
+
+
+def test_settle(spool):
+    recorder = _Recorder()
+    watcher = Watcher([spool], [recorder], settle=3600)
+    assert watcher.poll() == (0, 0)
+
+
+def test_crash(spool, tmpdir):
+    checkpoint = str(tmpdir.join('checkpoint.json'))
+    recorder = _Recorder(crash_at=7)
+    watcher = Watcher(
+        [spool], [recorder], checkpoint=checkpoint, settle=0,
+        checkpoint_every=3)
+    with pytest.raises(_Crash):
+        watcher.poll()
+    # Handlers are flushed before each checkpoint
+    assert recorder.flushed == 2
+
+    # Only the files after the last checkpoint are processed again.
+    recorder = _Recorder()
+    watcher = Watcher(
+        [spool], [recorder], checkpoint=checkpoint, settle=0,
+        checkpoint_every=3)
+    assert watcher.poll() == (4, 0)
+    assert recorder.processed == _names(spool)[6:]